@@ -0,0 +1,39 @@
+"""
+Micro-benchmark: load all config, suite and test data json files by parsing json (before) and from the compiled
+config snapshot (after), including the one-time snapshot read.
+    pytaf>python -m benchmarks.bench_config_cache
+"""
+import glob
+import json
+from timeit import timeit
+
+from lib import config_cache
+
+ROUNDS = 200
+
+
+def parse_json(files: list) -> None:
+    for file_path in files:
+        with open(file_path, 'rb') as f:
+            json.loads(f.read())
+
+
+def from_snapshot(files: list) -> None:
+    # start from disk like a new run
+    config_cache._entries = None
+    for file_path in files:
+        config_cache.load_json(file_path)
+
+
+def run() -> None:
+    config_cache.compile_snapshot()
+    files = [file_path for source_dir in config_cache.SOURCE_DIRS
+             for file_path in glob.iglob(f'{config_cache.THIS_DIR_PATH}/../{source_dir}/**/*.json', recursive=True)
+             if not file_path.endswith(config_cache.SKIP_FILES)]
+    for name, func in (('before (json parse)', parse_json), ('after (snapshot)', from_snapshot)):
+        seconds = timeit(lambda: func(files), number=ROUNDS)
+        print(f'{name:<20} {seconds / ROUNDS * 1000:>8.3f} ms for {len(files)} files')
+
+
+if __name__ == '__main__':
+    run()
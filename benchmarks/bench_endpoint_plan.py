@@ -0,0 +1,61 @@
+"""
+Micro-benchmark: endpoint preparation calls/sec before (per-call resolution) and after (compiled EndpointPlan).
+Only EndPoint preparation is measured, no request is sent.
+    pytaf>python -m benchmarks.bench_endpoint_plan
+"""
+from timeit import timeit
+
+from requests import PreparedRequest
+
+from lib.common_namedtuples import EndPoint
+from lib.get_endpoint import endpoints, build_endpoint, get_suite_level_data, get_internal_test_data, \
+    get_client_options
+from lib.manage_test_data import get_test_data
+from lib.test_suite_config import load_suite_config
+from lib.utils import get_auth
+
+CALLS = 20000
+
+
+def legacy_build_endpoint(endpoint_config, method=None, command_args=None, input_args=None, **kwargs) -> EndPoint:
+    """build_endpoint as it was before EndpointPlan, every call resolves suite config, path and headers"""
+    configs = load_suite_config(**command_args) if command_args else load_suite_config()
+    _env = configs.get('environment')
+    _suite = configs.get('suites').get(endpoint_config.suite)
+    _base_url, _suite_args, _suite_params, _suite_headers = get_suite_level_data(_suite, _env, endpoint_config.endpoint)
+    _td_args, _td_params, _td_headers, _td_data, _td_json = get_internal_test_data(_env, **kwargs)
+    _input_args = input_args if input_args else {}
+    _endpoint_args = {**_suite_args, **_td_args, **_input_args}
+    _endpoint_args = {**_endpoint_args, **command_args} if command_args else _endpoint_args
+    _params = {**_suite_params, **_td_params}
+    _endpoint_path = _suite.get('endpoints').get(endpoint_config.endpoint).get('path').format(**_endpoint_args)
+    _uri = f"{_base_url}{_endpoint_path}"
+    _headers = {**_suite_headers, **_td_headers, **kwargs.get('add_headers', {}), **get_auth()}
+    _method = method if method else _suite.get('endpoints').get(endpoint_config.endpoint).get('method')
+    _options = get_client_options(_suite, endpoint_config.endpoint)
+    return EndPoint(uri=_uri, method=_method.lower(), env=_env, headers=_headers, params=_params,
+                    data=_td_data, json=_td_json, options=_options)
+
+
+def full_url(endpoint: EndPoint) -> str:
+    request = PreparedRequest()
+    request.prepare_url(endpoint.uri, endpoint.params)
+    return request.url
+
+
+def run() -> None:
+    endpoint_inputs = get_test_data('company_tasks_svc/update_company_tasks.json')['endpoint_inputs']
+    endpoint_config = endpoints.company_tasks_svc.updateCompanyTasks
+    before, after = legacy_build_endpoint(endpoint_config, **endpoint_inputs), build_endpoint(endpoint_config,
+                                                                                             **endpoint_inputs)
+    # query portion of the path is sent as params since path templates are compiled
+    assert full_url(before) == full_url(after) and before._replace(uri=None, params=None) == after._replace(
+        uri=None, params=None)
+    for name, func in (('before (per-call resolution)', legacy_build_endpoint),
+                       ('after (compiled plan)', build_endpoint)):
+        seconds = timeit(lambda: func(endpoint_config, **endpoint_inputs), number=CALLS)
+        print(f'{name:<30} {CALLS / seconds:>12,.0f} calls/sec')
+
+
+if __name__ == '__main__':
+    run()
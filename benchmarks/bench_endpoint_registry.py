@@ -0,0 +1,51 @@
+"""
+Micro-benchmark: cold start of endpoint access with a generated resource config tree of SUITES services,
+before (endpoint_suites() builds every suite) and after (EndpointRegistry loads only the accessed suite).
+    pytaf>python -m benchmarks.bench_endpoint_registry
+"""
+import json
+import tempfile
+from timeit import timeit
+
+from lib import utils
+from lib.get_endpoint import EndpointRegistry, endpoint_suites
+
+SUITES = 60
+ENDPOINTS = 20
+ROUNDS = 20
+
+
+def write_resource_configs(config_dir: str) -> None:
+    suite_files = {}
+    for i in range(SUITES):
+        suite = f'service{i}_svc'
+        suite_files[suite] = f'{suite}.json'
+        endpoints = {f'endpoint{j}': {'path': f'/api/v1/items{j}/{{itemid}}', 'method': 'GET'}
+                     for j in range(ENDPOINTS)}
+        with open(f'{config_dir}/{suite}.json', 'w') as f:
+            json.dump({suite: {'baseurl': f'https://{suite}.{{environment}}.com', 'endpoints': endpoints}}, f)
+    with open(f'{config_dir}/{utils.RESOURCE_CONFIG}', 'w') as f:
+        json.dump({'suites': suite_files}, f)
+
+
+def before() -> None:
+    endpoint_suites.cache_clear()
+    endpoint_suites().service7_svc.endpoint3
+
+
+def after() -> None:
+    utils._suite_files.clear()
+    EndpointRegistry().service7_svc.endpoint3
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory() as config_dir:
+        write_resource_configs(config_dir)
+        utils.RESOURCE_CONFIGS_DIR = config_dir
+        for name, func in (('before (all suites)', before), ('after (lazy registry)', after)):
+            seconds = timeit(func, number=ROUNDS)
+            print(f'{name:<22} {seconds / ROUNDS * 1000:>8.2f} ms to first endpoint, {SUITES} suites')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,56 @@
+"""
+Micro-benchmark: failing comparison of a large search response, before (pop volatile fields then assertListEqual)
+and after (assertJsonEqual with ignore path).
+    pytaf>python -m benchmarks.bench_json_diff
+"""
+import unittest
+from copy import deepcopy
+from time import perf_counter
+
+from lib import add_web_service_tests
+
+TASKS = 5000
+
+
+def tasks() -> list:
+    return [{'id': f'task{i}', 'companyid': 'COMP1', 'category': f'CAT{i % 7}', 'status': 'CREATED',
+             'details': {'lastname': 'Pollock', 'firstname': 'Kyle'},
+             'assignees': [{'advSecGuid': f'9028GHF82089{i}', 'ueid': f'ueid{i}'}],
+             'trackingData': {'createdAt': f'2020-01-01T00:00:{i % 60:02}', 'createdBy': 'svc'}} for i in range(TASKS)]
+
+
+@add_web_service_tests()
+class Compare(unittest.TestCase):
+    maxDiff = None
+
+    def before(self, expected, actual):
+        for each_task in expected:
+            each_task.pop('trackingData')
+        for each_task in actual:
+            each_task.pop('trackingData')
+        self.assertListEqual(actual, expected)
+
+    def after(self, expected, actual):
+        self.assertJsonEqual(expected, actual, ignore=['[*].trackingData'])
+
+
+def run() -> None:
+    expected = tasks()
+    actual = deepcopy(expected)
+    actual[TASKS // 2]['status'] = 'COMPLETED'
+    for task in actual:
+        task['trackingData']['createdBy'] = 'other'
+    compare = Compare()
+    for name in ('before', 'after'):
+        _expected, _actual = deepcopy(expected), deepcopy(actual)
+        start = perf_counter()
+        try:
+            getattr(compare, name)(_expected, _actual)
+        except AssertionError as e:
+            report = str(e)
+        print(f'{name:<7} {(perf_counter() - start) * 1000:>9.1f} ms, failure report {len(report):>8,} chars')
+    print(report)
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,73 @@
+"""
+Micro-benchmark: load a generated large test data file whole (before) and only its endpoint_inputs and one expected
+response through the json index (after), time and peak memory. "after, cold" includes scanning the file for the index.
+    pytaf>python -m benchmarks.bench_json_index
+"""
+import json
+import os
+import tempfile
+import tracemalloc
+from time import perf_counter
+
+from lib import json_index
+
+RECORDS = 60000
+
+
+def write_fixture(file_path: str) -> None:
+    records = [{'companyid': f'COMP{i}', 'category': f'CAT{i % 7}', 'status': 'CREATED', 'type': 'TYPE01',
+                'details': {'lastname': 'Pollock', 'firstname': 'Kyle', 'note': 'brackets } ] in "text"'},
+                'assignees': [{'advSecGuid': f'9028GHF82089{i}', 'ueid': f'ueid{i}'}]} for i in range(RECORDS)]
+    fixture = {'endpoint_inputs': {'headers': {'Content-Type': 'application/json'}, 'args': {'companyid': 'COMP1'}},
+               'expected_response': {'expected_content': records, 'expected_count': {'count': RECORDS}},
+               'dev': {'endpoint_inputs': {'args': {'companyid': 'DEVCOMP1'}}, 'expected_content': records}}
+    with open(file_path, 'w') as f:
+        json.dump(fixture, f, indent=2)
+
+
+def measure(name: str, func, setup) -> None:
+    setup()
+    start = perf_counter()
+    func()
+    seconds = perf_counter() - start
+    # memory in a second pass, tracing slows the first one down
+    setup()
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f'{name:<22} {seconds * 1000:>9.1f} ms {peak / 2 ** 20:>9.1f} MiB peak')
+
+
+def whole(file_path: str) -> tuple:
+    with open(file_path, 'rb') as f:
+        data = json.loads(f.read())
+    return data['endpoint_inputs'], data['expected_response']['expected_count']
+
+
+def sections(file_path: str) -> tuple:
+    index = json_index.json_index(file_path)
+    return index.get('endpoint_inputs'), index.get('expected_response', 'expected_count')
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        json_index.INDEX_DIR = tmp_dir
+        file_path = f'{tmp_dir}/fixture.json'
+        write_fixture(file_path)
+        print(f'fixture {os.path.getsize(file_path) / 2 ** 20:.1f} MiB')
+        assert whole(file_path) == sections(file_path)
+
+        def no_index():
+            json_index.close_indexes()
+            os.remove(json_index._index_path(file_path))
+
+        measure('before (whole file)', lambda: whole(file_path), lambda: None)
+        measure('after, cold (scan)', lambda: sections(file_path), no_index)
+        measure('after, saved index', lambda: sections(file_path), json_index.close_indexes)
+        measure('after, in process', lambda: sections(file_path), lambda: None)
+        json_index.close_indexes()
+
+
+if __name__ == '__main__':
+    run()
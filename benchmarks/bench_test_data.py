@@ -0,0 +1,38 @@
+"""
+Micro-benchmark: env_test_data (@test_data decorator) before (cargs() and json load plus env merge per call) and
+after (merged test data cached per file and env).
+    pytaf>python -m benchmarks.bench_test_data
+"""
+from timeit import timeit
+
+from lib.commandline_args import cargs
+from lib.manage_test_data import env_test_data, get_test_data, merge_env_test_data
+from lib.utils import load_data
+
+TEST_DATA_FILE = 'company_tasks_svc/update_company_tasks.json'
+CALLS = 20000
+
+
+def legacy_env_test_data(test_data_file) -> dict:
+    """env_test_data as it was before the cache"""
+    _cargs = cargs()
+    _env = _cargs.environment
+    _ext_td = _cargs.test_data
+    _td_file = _ext_td if _ext_td else test_data_file
+    _test_data = get_test_data(_td_file)
+    assert '.json' in _td_file, 'Invalid test_data file name, provide valid json file'
+    _test_data = get_test_data(_td_file)
+    if not _test_data:
+        _test_data = load_data(_td_file)
+    return merge_env_test_data(_test_data, _env)
+
+
+def run() -> None:
+    assert legacy_env_test_data(TEST_DATA_FILE) == env_test_data(TEST_DATA_FILE)
+    for name, func in (('before', legacy_env_test_data), ('after (cached)', env_test_data)):
+        seconds = timeit(lambda: func(TEST_DATA_FILE), number=CALLS)
+        print(f'{name:<15} {CALLS / seconds:>10,.0f} calls/sec')
+
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,77 @@
+"""
+Micro-benchmark: listing tests (-ts) of a generated tree of MODULES test modules,
+before (every test module is imported and TestCase subclasses are walked) and after (cached ast test index).
+Each generated module imports lib.manage_test_data and uses @test_data as the real test modules do.
+    pytaf>python -m benchmarks.bench_test_index
+"""
+import glob
+import importlib
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+from lib import test_index
+
+MODULES = 200
+CLASSES = 2
+METHODS = 10
+
+
+def write_test_modules(base_dir: str) -> str:
+    test_dir = f'{base_dir}/bench_tests'
+    os.makedirs(test_dir)
+    open(f'{test_dir}/__init__.py', 'w').close()
+    for i in range(MODULES):
+        lines = ['import unittest', '', 'from lib.manage_test_data import test_data', '']
+        for j in range(CLASSES):
+            lines.append(f'class TestService{i}Case{j}(unittest.TestCase):')
+            for k in range(METHODS):
+                lines += [f'    @test_data(file_name="service{i}/case{j}.json")',
+                          f'    def test_method{k}(self, **kwargs):', '        self.assertTrue(kwargs)', '']
+        with open(f'{test_dir}/test_service{i}.py', 'w') as f:
+            f.write('\n'.join(lines))
+    return test_dir
+
+
+def before(test_dir: str) -> list:
+    for filename in glob.iglob(f'{test_dir}/**/*.py', recursive=True):
+        module = os.path.relpath(filename, os.path.dirname(test_dir))[:-3].replace('/', '.')
+        importlib.import_module(module)
+    tests = []
+    for _class in unittest.TestCase.__subclasses__():
+        if _class.__module__.startswith('bench_tests.'):
+            for name in unittest.defaultTestLoader.getTestCaseNames(_class):
+                tests.append(f'{_class.__module__}.{_class.__name__}.{name}')
+    return tests
+
+
+def after(test_dir: str) -> list:
+    return test_index.search_tests('*', test_dir)
+
+
+def run() -> None:
+    with tempfile.TemporaryDirectory() as base_dir:
+        test_dir = write_test_modules(base_dir)
+        sys.path.insert(0, base_dir)
+        test_index.INDEX_FILE = f'{base_dir}/test_index.pickle'
+        start = time.perf_counter()
+        cold = after(test_dir)
+        cold_ms = (time.perf_counter() - start) * 1000
+        test_index._index = None
+        start = time.perf_counter()
+        warm = after(test_dir)
+        warm_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        imported = before(test_dir)
+        before_ms = (time.perf_counter() - start) * 1000
+        assert sorted(imported) == sorted(cold) == sorted(warm)
+        print(f'{len(imported)} tests in {MODULES} modules')
+        print(f'{"before (import all)":<28} {before_ms:>8.1f} ms')
+        print(f'{"after (cold, parse all)":<28} {cold_ms:>8.1f} ms')
+        print(f'{"after (saved index)":<28} {warm_ms:>8.1f} ms')
+
+
+if __name__ == '__main__':
+    run()
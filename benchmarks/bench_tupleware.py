@@ -0,0 +1,59 @@
+"""
+Micro-benchmark: tupleware before (new namedtuple class per dict) and after (class cached per field names) on a
+large nested resource config and on repeated commandline args conversion (cargs()).
+    pytaf>python -m benchmarks.bench_tupleware
+"""
+from collections import OrderedDict, namedtuple
+from timeit import timeit
+
+from lib.tupleware import tupleware
+
+SUITES = 60
+ENDPOINTS = 20
+
+
+def legacy_tupleware(obj):
+    """tupleware as it was before the class cache"""
+    if isinstance(obj, dict):
+        fields = sorted(obj.keys())
+        namedtuple_type = namedtuple(
+            typename='TWare',
+            field_names=fields,
+            rename=True,
+        )
+        field_value_pairs = OrderedDict(
+            (str(field), legacy_tupleware(obj[field])) for field in fields)
+        try:
+            return namedtuple_type(**field_value_pairs)
+        except TypeError:
+            # Cannot create namedtuple instance so fallback to dict (invalid attribute names)
+            return dict(**field_value_pairs)
+    elif isinstance(obj, (list, set, tuple, frozenset)):
+        return [legacy_tupleware(item) for item in obj]
+    else:
+        return obj
+
+
+def large_config() -> dict:
+    return {f'service{i}_svc': {
+        'suite': f'service{i}_svc',
+        **{f'endpoint{j}': {'suite': f'service{i}_svc', 'endpoint': f'endpoint{j}', 'method': 'GET',
+                            'path': f'https://service{i}.{{environment}}.com/api/v1/items{j}/{{itemid}}',
+                            'client': {'cache': True}, 'Content-Type': 'application/json'}
+           for j in range(ENDPOINTS)}}
+        for i in range(SUITES)}
+
+
+def run() -> None:
+    config = large_config()
+    args = {'environment': 'dev', 'suite': 'sanity_suite', 'add_tests': None, 'test_search': None, 'test_data': None,
+            'log_level': 'INFO', 'transport_mode': 'live', 'deadline': None}
+    assert legacy_tupleware(config) == tupleware(config)
+    for case, data, number in (('large config', config, 20), ('commandline args', args, 20000)):
+        for name, func in (('before', legacy_tupleware), ('after', tupleware)):
+            seconds = timeit(lambda: func(data), number=number)
+            print(f'{case:<17} {name:<7} {seconds / number * 1e6:>12.1f} us per call')
+
+
+if __name__ == '__main__':
+    run()
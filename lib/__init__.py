@@ -1,2 +1,4 @@
 from .web_service_client import *
-from .web_service_tests import add_web_service_tests
+from .http_cache import cache_stats
+from .session_pool import close_sessions
+from .web_service_tests import add_web_service_tests, run_serially
@@ -1,4 +1,4 @@
-from argparse import ArgumentParser
+from argparse import ArgumentParser, ArgumentTypeError
 from functools import lru_cache
 
 from lib.tupleware import tupleware
@@ -15,8 +15,47 @@ def get_args_dict() -> dict:
                         help='Tests Search using text entry or default "*" which returns all tests')
     parser.add_argument('-td', '--test_data', help='Test data file name or full qualified file path')
     parser.add_argument('-l', '--log_level', help='Log level, default is INFO', default='INFO')
+    parser.add_argument('-tm', '--transport_mode', choices=['live', 'record', 'replay'], default='live',
+                        help='live calls services, record also saves responses to cassettes, replay serves responses '
+                             'from cassettes without network (default=live)')
+    parser.add_argument('-dl', '--deadline', type=float,
+                        help='Run deadline in seconds, tests not started by then are marked as timed out')
+    parallel = parser.add_mutually_exclusive_group()
+    parallel.add_argument('-j', '--workers', type=int, default=1,
+                          help='Run test classes in N parallel worker processes (default=1, sequential)')
+    parallel.add_argument('-th', '--threads', type=int, default=1,
+                          help='Run test methods on N threads of the launcher process, for I/O bound tests, '
+                               'not with -tm record (default=1, sequential)')
+    parser.add_argument('-sh', '--shard', type=shard,
+                        help='Run one slice of the selected tests, INDEX/COUNT with INDEX from 1, '
+                             'Ex. 2/4 on the second of four CI nodes')
+    parser.add_argument('-shh', '--shard_history',
+                        help='Duration history file for a duration-weighted shard partition, the same file on all '
+                             'nodes, Ex. a copy of zlogs/test_durations.sqlite3 restored from CI cache '
+                             '(default hash partition)')
 
-    return format_env(parser.parse_args().__dict__)
+    args = parser.parse_args()
+    if args.threads > 1 and args.transport_mode == 'record':
+        # tests of a module share its cassette, interactions recorded from concurrent tests do not replay in order
+        parser.error('argument -th/--threads: not allowed with -tm record, use -j/--workers to record in parallel')
+    return format_env(args.__dict__)
+
+
+def shard(value: str) -> tuple:
+    """
+    Parse shard argument
+    :param value: INDEX/COUNT, index from 1, Ex. 2/4
+    :return: tuple of index and count
+    :raise ArgumentTypeError: invalid value
+    """
+    index, _, count = value.partition('/')
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ArgumentTypeError(f"invalid shard '{value}', use INDEX/COUNT, Ex. 1/4") from None
+    if not 1 <= index <= count:
+        raise ArgumentTypeError(f"invalid shard '{value}', INDEX must be from 1 to COUNT")
+    return index, count
 
 
 def cargs():
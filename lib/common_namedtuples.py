@@ -1,7 +1,28 @@
+import codecs
+import json
+import mmap
+from json import JSONDecodeError
 from typing import NamedTuple, Any
 
+from requests.compat import chardet
+
 transaction_id = 'x-txid'
 NO_VALUE = ''
+# body bytes used to guess the charset of a text body without one, as requests' Response.apparent_encoding
+APPARENT_ENCODING_BYTES = 64 * 1024
+
+
+class _Undecoded:
+    """Placeholder stored in HttpResponse until the raw body is decoded"""
+
+    def __repr__(self) -> str:
+        return '<undecoded>'
+
+    def __reduce__(self) -> str:
+        return 'UNDECODED'
+
+
+UNDECODED = _Undecoded()
 
 
 class EndPoint(NamedTuple):
@@ -13,14 +34,187 @@ class EndPoint(NamedTuple):
     data: Any = {}
     json: Any = {}
     files: Any = {}
+    options: dict = {}
+
+
+class StreamedBody(NamedTuple):
+    """Response body streamed to a file"""
+    path: str
+    size: int
+    digest: str
+    algorithm: str = 'sha256'
+
+    def open(self):
+        return open(self.path, 'rb')
 
+    def read(self) -> bytes:
+        with self.open() as f:
+            return f.read()
 
-class HttpResponse(NamedTuple):
+    def mmap(self) -> mmap.mmap:
+        """Read-only memory map of the body, not available for an empty body"""
+        with self.open() as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Timing(NamedTuple):
+    """Request phases in seconds and body sizes in bytes, see lib.timing"""
+    dns: float = 0.0
+    connect: float = 0.0
+    tls: float = 0.0
+    ttfb: float = 0.0
+    download: float = 0.0
+    total: float = 0.0
+    request_bytes: int = 0
+    response_bytes: int = 0
+    reused: bool = True
+
+    def __str__(self) -> str:
+        return f"dns={self.dns * 1000:.1f}ms connect={self.connect * 1000:.1f}ms tls={self.tls * 1000:.1f}ms " \
+               f"ttfb={self.ttfb * 1000:.1f}ms download={self.download * 1000:.1f}ms total={self.total * 1000:.1f}ms " \
+               f"sent={self.request_bytes}B received={self.response_bytes}B " \
+               f"{'reused connection' if self.reused else 'new connection'}"
+
+
+class _HttpResponse(NamedTuple):
     env: str
     url: str
     status: str
-    headers: Any
+    headers: Any = {}
     data: Any = NO_VALUE
     content: bytes = b''
     error: Any = NO_VALUE
     transaction_id: str = NO_VALUE
+    body: Any = NO_VALUE
+    retries: int = 0
+    circuit: str = NO_VALUE
+    timing: Any = NO_VALUE
+    cache: str = NO_VALUE
+
+
+_DATA = _HttpResponse._fields.index('data')
+_CONTENT = _HttpResponse._fields.index('content')
+_BODY = _HttpResponse._fields.index('body')
+
+
+class HttpResponse(_HttpResponse):
+    """
+    Endpoint call response. When created with from_body() or from_file(), 'data' is decoded from the raw body bytes on
+    first access, so a test which only checks 'status' never pays for json parsing. Responses created with from_file()
+    read the file only when 'data' or 'content' is accessed.
+    """
+
+    @classmethod
+    def from_body(cls, body: bytes, encoding: str = None, keep_content: bool = True, **fields) -> 'HttpResponse':
+        """
+        Create response with lazily decoded data
+        :param body: raw response body
+        :param encoding: charset from response headers, used when body is not json
+        :param keep_content: if False drop raw body once data is decoded, 'content' is then b''
+        :param fields: other HttpResponse fields
+        :return: HttpResponse
+        """
+        response = cls(data=UNDECODED, content=UNDECODED, **fields)
+        response.__dict__.update(_body=body, _encoding=encoding, _keep_content=keep_content)
+        return response
+
+    @classmethod
+    def from_file(cls, body: StreamedBody, encoding: str = None, **fields) -> 'HttpResponse':
+        """
+        Create response for body streamed to a file, 'data' and 'content' read the file on access
+        :param body: streamed body details
+        :param encoding: charset from response headers, used when body is not json
+        :param fields: other HttpResponse fields
+        :return: HttpResponse
+        """
+        response = cls(data=UNDECODED, content=UNDECODED, body=body, **fields)
+        response.__dict__.update(_encoding=encoding, _keep_content=True)
+        return response
+
+    @property
+    def data(self) -> Any:
+        data = tuple.__getitem__(self, _DATA)
+        if data is not UNDECODED:
+            return data
+        if '_data' not in self.__dict__:
+            self.__dict__['_data'] = decode_body(self._raw_body(), self._encoding)
+            if not self._keep_content:
+                self.__dict__['_body'] = b''
+        return self.__dict__['_data']
+
+    @property
+    def content(self) -> bytes:
+        content = tuple.__getitem__(self, _CONTENT)
+        return self._raw_body() if content is UNDECODED else content
+
+    def _raw_body(self) -> bytes:
+        return self.__dict__['_body'] if '_body' in self.__dict__ else self.body.read()
+
+    def _replace(self, **fields) -> 'HttpResponse':
+        """Same as NamedTuple._replace, body is not decoded and stays lazy"""
+        response = self._make(fields.pop(name, tuple.__getitem__(self, index))
+                              for index, name in enumerate(self._fields))
+        if fields:
+            raise ValueError(f'Got unexpected field names: {list(fields)}')
+        response.__dict__.update(self.__dict__)
+        return response
+
+    def __iter__(self):
+        # a streamed body is not read, iteration (==, hash, _asdict, repr) compares it by its StreamedBody digest
+        if isinstance(tuple.__getitem__(self, _BODY), StreamedBody):
+            return tuple.__iter__(self)
+        return (getattr(self, field) for field in self._fields)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return tuple(getattr(self, field) for field in self._fields[item])
+        return getattr(self, self._fields[item])
+
+    def __eq__(self, other) -> bool:
+        return tuple(self) == tuple(other) if isinstance(other, tuple) else NotImplemented
+
+    def __ne__(self, other) -> bool:
+        return not self == other
+
+    def __hash__(self) -> int:
+        return hash(tuple(self))
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({', '.join(f'{k}={v!r}' for k, v in zip(self._fields, self))})"
+
+
+def decode_body(body: bytes, encoding: str = None) -> Any:
+    """
+    Decode response body as requests' Response.json() and Response.text do. Json in utf-8/16/32 (or without charset) is
+    parsed straight from bytes, json in another charset is parsed from the text decoded with it, other bodies are
+    returned as text decoded with the response charset or, when there is none, the charset guessed from the body.
+    :param body: raw response body
+    :param encoding: charset from response headers
+    :return: decoded data
+    """
+    encoding = _codec_name(encoding)
+    if encoding is not None and not encoding.startswith('utf'):
+        text = body.decode(encoding, errors='replace')
+        try:
+            return json.loads(text)
+        except JSONDecodeError:
+            return text
+    try:
+        return json.loads(body)
+    except (JSONDecodeError, UnicodeDecodeError):
+        return body.decode(encoding or _codec_name(apparent_encoding(body)) or 'utf-8', errors='replace')
+
+
+def apparent_encoding(body: bytes) -> str:
+    """Charset guessed from the start of body, None when unknown"""
+    return chardet.detect(body[:APPARENT_ENCODING_BYTES])['encoding']
+
+
+def _codec_name(encoding: str) -> str:
+    """Normalized codec name (Ex. 'utf_8', 'iso8859-1'), None for no or unknown charset"""
+    if not encoding:
+        return None
+    try:
+        return codecs.lookup(encoding).name
+    except LookupError:
+        return None
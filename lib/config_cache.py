@@ -0,0 +1,139 @@
+"""
+Compiled snapshot of config, suite and test data json files for fast startup
+
+Parsed content of every json file under config, suite and test_data read through lib.utils.load_data is kept in one
+binary snapshot (zlogs/.pytaf_cache/config_snapshot.pickle) keyed by file path and stamped with the file mtime and size.
+Next run reads the snapshot once and serves unchanged files from it; a file whose mtime or size changed is parsed
+from json again and its snapshot entry is replaced when the run exits (lazy compile).
+Entries are per parsed file, not per merged suite config: suites are merged from their resource and default data files
+lazily on first access (lib.test_suite_config.SuiteConfigs), the merge is a shallow dict update and parsing is the cost.
+Files outside these directories (Ex. -td test data passed on the command line) are not snapshotted unless requested.
+Compile all config, suite and test data files ahead of a run:
+    pytaf>python -m lib.config_cache
+Delete zlogs/.pytaf_cache to drop the snapshot.
+"""
+import atexit
+import glob
+import json
+import marshal
+import os
+import pickle
+import sys
+import threading
+
+THIS_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = f'{THIS_DIR_PATH}/../zlogs/.pytaf_cache'
+SNAPSHOT_FILE = 'config_snapshot.pickle'
+SOURCE_DIRS = ('config', 'suite', 'test_data')
+# credentials are not written to the snapshot
+SKIP_FILES = ('auth.json',)
+# marshal format is python version specific
+SNAPSHOT_VERSION = (1, sys.version_info[:2])
+
+_entries = None
+_dirty = False
+_lock = threading.Lock()
+
+
+def is_source_file(file_path: str, root: str = f'{THIS_DIR_PATH}/..') -> bool:
+    """
+    True for files under the snapshot source directories (config, suite, test_data) of the project
+    :param file_path: file path
+    :param root: project root directory
+    :return: bool
+    """
+    file_path = os.path.abspath(file_path)
+    return any(file_path.startswith(os.path.join(os.path.abspath(root), source_dir, '')) for source_dir in SOURCE_DIRS)
+
+
+def load_json(file_path: str):
+    """
+    Parsed json file, from snapshot when the file is unchanged since it was compiled
+    :param file_path: json file path
+    :return: new copy of parsed content
+    :raise OSError: file is not readable
+    """
+    global _dirty
+    key = os.path.abspath(file_path)
+    _stat = os.stat(key)
+    stamp = (_stat.st_mtime_ns, _stat.st_size)
+    entry = _snapshot().get(key)
+    if entry is not None and entry[0] == stamp:
+        # each call gets its own copy, callers are free to modify it
+        return marshal.loads(entry[1])
+    with open(key, 'rb') as f:
+        data = json.loads(f.read())
+    with _lock:
+        _entries[key] = (stamp, marshal.dumps(data))
+        _dirty = True
+    return data
+
+
+def compile_snapshot(root: str = f'{THIS_DIR_PATH}/..') -> int:
+    """
+    Parse all json files of config, suite and test_data directories and write the snapshot
+    :param root: project root directory
+    :return: number of compiled files
+    """
+    count = 0
+    for source_dir in SOURCE_DIRS:
+        for file_path in glob.iglob(f'{root}/{source_dir}/**/*.json', recursive=True):
+            if os.path.basename(file_path) in SKIP_FILES:
+                continue
+            try:
+                load_json(file_path)
+                count += 1
+            except (OSError, ValueError) as e:
+                print(f"Warning: {file_path} not compiled, {e}")
+    save_snapshot()
+    return count
+
+
+def save_snapshot() -> None:
+    """
+    Write snapshot if any entry changed during the run
+    :return: None
+    """
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        # drop entries of deleted files
+        entries = {key: entry for key, entry in _entries.items() if os.path.exists(key)}
+        _dirty = False
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = f'{CACHE_DIR}/{SNAPSHOT_FILE}.{os.getpid()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump((SNAPSHOT_VERSION, entries), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, f'{CACHE_DIR}/{SNAPSHOT_FILE}')
+    except OSError as e:
+        print(f"Warning: Config snapshot not saved, {e}")
+
+
+def _snapshot() -> dict:
+    """Snapshot entries, read from disk on first use"""
+    global _entries
+    if _entries is None:
+        with _lock:
+            if _entries is None:
+                _entries = _read_snapshot()
+                atexit.register(save_snapshot)
+    return _entries
+
+
+def _read_snapshot() -> dict:
+    try:
+        with open(f'{CACHE_DIR}/{SNAPSHOT_FILE}', 'rb') as f:
+            version, entries = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, ValueError, TypeError):
+        return {}
+    return entries if version == SNAPSHOT_VERSION else {}
+
+
+if __name__ == '__main__':
+    # use the module instance imported by lib.utils, not this __main__ copy, so only one snapshot state is saved
+    from lib import config_cache
+
+    print(f"Compiled {config_cache.compile_snapshot()} json files into "
+          f"{os.path.abspath(CACHE_DIR)}/{SNAPSHOT_FILE}")
@@ -0,0 +1,167 @@
+"""
+Seeded, declarative generator of bulk payloads, Ex. createCompanyTasks bodies for scale tests
+
+The spec is test data json, values of the template are literals or generator directives:
+    "factory": {
+      "seed": 42,                   # same seed, template and count always give the same payloads
+      "count": 20000,               # default number of records
+      "batch_size": 100,            # records per request, optional, callers cap it at the endpoint batch_limit
+      "template": {
+        "companyid": {"$arg": "companyid"},                                         # value passed by caller
+        "category": {"$choice": ["ONBOARDING", "BANKING"], "$weights": [3, 1]},     # weighted pick
+        "status": {"$choice": ["CREATED", "COMPLETED"]},                            # uniform pick
+        "externalId": {"$format": "EXT{seq:06d}"},                                  # seq is the record number
+        "priority": {"$int": [1, 5]},                                               # int in range, both included
+        "assignees": {"$list": {"ueid": {"$format": "ueid{i}"}}, "$min": 1, "$max": 3},   # i is the item number
+        "requestId": {"$uuid": true},
+        "details": {"note": {"$optional": 0.2, "$value": "generated"}}              # key present in 20% of records
+      }
+    }
+Usage:
+    factory = DataFactory.from_spec(kwargs['factory'], args={'companyid': companyid})
+    for batch in factory.batches():
+        create_company_tasks(json=batch, ...)
+"""
+import random
+import uuid
+from itertools import islice
+from typing import Iterator
+
+DEFAULT_BATCH_SIZE = 100
+# marks an absent optional value
+_ABSENT = object()
+
+
+class DataFactory:
+    def __init__(self, template, seed: int = 0, count: int = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 args: dict = None):
+        """
+        :param template: record template with generator directives
+        :param seed: random seed
+        :param count: default number of records
+        :param batch_size: default records per batch
+        :param args: values for $arg directives
+        :raise ValueError: invalid directive in template
+        """
+        self.seed = seed
+        self.count = count
+        self.batch_size = batch_size
+        self.args = args or {}
+        self._generate = _compile(template)
+
+    @classmethod
+    def from_spec(cls, spec: dict, args: dict = None, **overrides) -> 'DataFactory':
+        """
+        Factory from test data spec
+        :param spec: dict with template and optional seed, count and batch_size
+        :param args: values for $arg directives
+        :param overrides: seed, count or batch_size overriding the spec
+        :return: DataFactory
+        """
+        settings = {key: spec[key] for key in ('seed', 'count', 'batch_size') if key in spec}
+        settings.update({key: value for key, value in overrides.items() if value is not None})
+        return cls(spec['template'], args=args, **settings)
+
+    def records(self, count: int = None) -> Iterator:
+        """
+        Generate records lazily
+        :param count: number of records, default from spec, None with no default generates endlessly
+        :return: generator of records
+        """
+        count = count if count is not None else self.count
+        rng = random.Random(self.seed)
+        seq = 0
+        while count is None or seq < count:
+            yield self._generate(rng, {**self.args, 'seq': seq})
+            seq += 1
+
+    def batches(self, count: int = None, batch_size: int = None) -> Iterator[list]:
+        """
+        Generate records in lists of batch_size, the last batch may be shorter
+        :param count: number of records, default from spec
+        :param batch_size: records per batch, default from spec
+        :return: generator of record lists
+        """
+        records = self.records(count)
+        batch_size = batch_size or self.batch_size
+        batch = list(islice(records, batch_size))
+        while batch:
+            yield batch
+            batch = list(islice(records, batch_size))
+
+
+def _compile(spec):
+    """
+    Compile template into a function of (random generator, context) returning the generated value
+    :param spec: template value
+    :return: function
+    """
+    if isinstance(spec, dict):
+        directives = [key for key in spec if key.startswith('$')]
+        if directives:
+            return _compile_directive(spec, directives)
+        fields = [(key, _compile(value)) for key, value in spec.items()]
+
+        def generate_dict(rng, context):
+            record = {}
+            for key, generate in fields:
+                value = generate(rng, context)
+                if value is not _ABSENT:
+                    record[key] = value
+            return record
+
+        return generate_dict
+    if isinstance(spec, list):
+        items = [_compile(item) for item in spec]
+        return lambda rng, context: [value for value in (generate(rng, context) for generate in items)
+                                     if value is not _ABSENT]
+    return lambda rng, context: spec
+
+
+def _compile_directive(spec: dict, directives: list):
+    if '$choice' in spec:
+        choices = [_compile(choice) for choice in spec['$choice']]
+        weights = spec.get('$weights')
+        if not choices or (weights is not None and len(weights) != len(choices)):
+            raise ValueError(f"Invalid $choice spec {spec}, $weights must match $choice")
+        if weights is None:
+            return lambda rng, context: rng.choice(choices)(rng, context)
+        cum_weights = []
+        total = 0
+        for weight in weights:
+            total += weight
+            cum_weights.append(total)
+        return lambda rng, context: rng.choices(choices, cum_weights=cum_weights)[0](rng, context)
+    if '$int' in spec:
+        low, high = spec['$int']
+        return lambda rng, context: rng.randint(low, high)
+    if '$format' in spec:
+        pattern = spec['$format']
+        return lambda rng, context: pattern.format(**context)
+    if '$arg' in spec:
+        name = spec['$arg']
+        default = spec.get('$default', _ABSENT)
+
+        def generate_arg(rng, context):
+            value = context.get(name, default)
+            if value is _ABSENT:
+                raise KeyError(f"Data factory arg '{name}' is not provided")
+            return value
+
+        return generate_arg
+    if '$uuid' in spec:
+        return lambda rng, context: str(uuid.UUID(int=rng.getrandbits(128), version=4))
+    if '$list' in spec:
+        item = _compile(spec['$list'])
+        low, high = spec.get('$min', spec.get('$count', 1)), spec.get('$max', spec.get('$count', 1))
+
+        def generate_list(rng, context):
+            size = low if low == high else rng.randint(low, high)
+            return [item(rng, {**context, 'i': i}) for i in range(size)]
+
+        return generate_list
+    if '$optional' in spec:
+        probability = spec['$optional']
+        value = _compile(spec.get('$value'))
+        return lambda rng, context: value(rng, context) if rng.random() < probability else _ABSENT
+    raise ValueError(f"Unknown data factory directive {directives} in {spec}")
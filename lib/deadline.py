@@ -0,0 +1,68 @@
+"""
+Run deadline for test_launcher (-dl/--deadline seconds)
+
+Once the deadline is set, request timeouts are clipped to the remaining budget so in-flight requests end by the deadline,
+new requests fail fast with the client error response and tests which did not start yet are marked as timed out.
+"""
+import time
+from typing import Optional
+from unittest import TextTestResult
+
+_deadline = None
+
+
+class DeadlineExceededError(TimeoutError):
+    """Run deadline exceeded"""
+
+
+def set_deadline(seconds: float = None, at: float = None) -> None:
+    """
+    Set run deadline, no argument removes it
+    :param seconds: budget in seconds from now
+    :param at: absolute deadline as time.time() value, Ex. deadline of the parent process
+    :return: None
+    """
+    global _deadline
+    _deadline = at if at else (time.time() + float(seconds) if seconds else None)
+
+
+def get_deadline() -> Optional[float]:
+    return _deadline
+
+
+def remaining() -> Optional[float]:
+    """
+    Seconds left until the deadline
+    :return: seconds, None when no deadline is set
+    """
+    return None if _deadline is None else _deadline - time.time()
+
+
+def expired() -> bool:
+    return _deadline is not None and time.time() >= _deadline
+
+
+def clip_timeout(timeout: Optional[float]) -> Optional[float]:
+    """
+    Limit timeout to the remaining run budget
+    :param timeout: timeout in seconds or None (no timeout)
+    :return: timeout in seconds or None
+    """
+    _remaining = remaining()
+    if _remaining is None:
+        return timeout
+    _remaining = max(_remaining, 0.001)
+    return _remaining if timeout is None else min(timeout, _remaining)
+
+
+class DeadlineTestResult(TextTestResult):
+    """TextTestResult which reports tests starting after the run deadline as errors without running them"""
+
+    def startTest(self, test) -> None:
+        if expired():
+            def timed_out():
+                raise DeadlineExceededError('Test not run, run deadline exceeded')
+
+            # setUp failure skips the test method and tearDown
+            test.setUp = timed_out
+        super().startTest(test)
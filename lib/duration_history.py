@@ -0,0 +1,181 @@
+"""
+Test duration history (zlogs/test_durations.sqlite3)
+
+Duration and status of every test (module.Class.method) run by test_launcher are saved per environment, runs with
+-tm replay are not saved as responses from cassettes take no network time. The parallel runners use the history to
+start the longest tests first, so workers finish together instead of waiting on one straggler. The estimate of a test
+is the mean of its last runs, tests without history get the median of known tests. Delete the file to drop the history.
+"""
+import os
+import sqlite3
+import statistics
+import time
+
+from lib.deadline import DeadlineTestResult
+
+THIS_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+HISTORY_FILE = f'{THIS_DIR_PATH}/../zlogs/test_durations.sqlite3'
+# runs kept per test and environment
+KEEP_RUNS = 20
+# runs averaged for the estimate
+ESTIMATE_RUNS = 5
+# estimate of every test when there is no history at all
+DEFAULT_DURATION = 1.0
+
+SUCCESS = 'success'
+FAILURE = 'failure'
+ERROR = 'error'
+SKIP = 'skip'
+EXPECTED_FAILURE = 'expected_failure'
+UNEXPECTED_SUCCESS = 'unexpected_success'
+# statuses with a representative duration, errors and skips often end early
+ESTIMATE_STATUSES = (SUCCESS, FAILURE, EXPECTED_FAILURE, UNEXPECTED_SUCCESS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS test_durations (
+    test_id TEXT NOT NULL,
+    env TEXT NOT NULL,
+    status TEXT NOT NULL,
+    duration REAL NOT NULL,
+    finished_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS test_durations_test ON test_durations (env, test_id, finished_at);
+"""
+
+
+def _connect(history_file: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(history_file), exist_ok=True)
+    # several launchers (Ex. shards on one machine) may write at the same time
+    connection = sqlite3.connect(history_file, timeout=30)
+    connection.executescript(_SCHEMA)
+    return connection
+
+
+def record_durations(durations: dict, env: str, history_file: str = HISTORY_FILE) -> None:
+    """
+    Save durations of a run, runs older than KEEP_RUNS per test are removed
+    :param durations: dict of test id to (status, duration in seconds)
+    :param env: environment
+    :param history_file: sqlite file path
+    :return: None
+    """
+    if not durations:
+        return
+    finished_at = time.time()
+    try:
+        connection = _connect(history_file)
+        try:
+            with connection:
+                connection.executemany(
+                    'INSERT INTO test_durations (test_id, env, status, duration, finished_at) VALUES (?, ?, ?, ?, ?)',
+                    [(test_id, env, status, duration, finished_at)
+                     for test_id, (status, duration) in durations.items()])
+                connection.execute(
+                    'DELETE FROM test_durations WHERE rowid IN (SELECT rowid FROM ('
+                    '  SELECT rowid, ROW_NUMBER() OVER (PARTITION BY env, test_id ORDER BY finished_at DESC) AS run'
+                    '  FROM test_durations WHERE env = ?) WHERE run > ?)', (env, KEEP_RUNS))
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Test durations not saved to {history_file}, {e}")
+
+
+def load_durations(env: str, history_file: str = HISTORY_FILE) -> dict:
+    """
+    Estimated duration of tests with history
+    :param env: environment
+    :param history_file: sqlite file path
+    :return: dict of test id to seconds
+    """
+    if not os.path.exists(history_file):
+        return {}
+    runs = {}
+    try:
+        connection = _connect(history_file)
+        try:
+            rows = connection.execute(
+                'SELECT test_id, status, duration FROM test_durations WHERE env = ? ORDER BY finished_at DESC', (env,))
+            for test_id, status, duration in rows:
+                runs.setdefault(test_id, []).append((status, duration))
+        finally:
+            connection.close()
+    except sqlite3.Error as e:
+        print(f"Warning: Test durations not loaded from {history_file}, {e}")
+    estimates = {}
+    for test_id, test_runs in runs.items():
+        durations = [duration for status, duration in test_runs if status in ESTIMATE_STATUSES] or \
+                    [duration for _, duration in test_runs]
+        estimates[test_id] = statistics.fmean(durations[:ESTIMATE_RUNS])
+    return estimates
+
+
+def estimate_durations(test_ids, env: str, history_file: str = HISTORY_FILE, known: dict = None) -> dict:
+    """
+    Estimated duration of every test, tests without history get the median of known estimates
+    :param test_ids: test ids
+    :param env: environment
+    :param history_file: sqlite file path
+    :param known: estimates already loaded with load_durations, the history file is then not read
+    :return: dict of test id to seconds
+    """
+    known = load_durations(env, history_file) if known is None else known
+    default = statistics.median(known.values()) if known else DEFAULT_DURATION
+    return {test_id: known.get(test_id, default) for test_id in test_ids}
+
+
+class DurationsMixin:
+    """TestResult mixin collecting status and duration of each started test, test_durations is saved to history"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # test id: (status, duration)
+        self.test_durations = {}
+        self._started = {}
+
+    def startTest(self, test) -> None:
+        self._started[test.id()] = [time.perf_counter(), SUCCESS]
+        super().startTest(test)
+
+    def stopTest(self, test) -> None:
+        super().stopTest(test)
+        started = self._started.pop(test.id(), None)
+        if started is not None:
+            # tests replayed from parallel workers carry the duration measured in the worker
+            duration = getattr(test, 'duration', None)
+            self.test_durations[test.id()] = (started[1], time.perf_counter() - started[0] if duration is None
+                                              else duration)
+
+    def addFailure(self, test, err) -> None:
+        super().addFailure(test, err)
+        self._status(test, FAILURE)
+
+    def addError(self, test, err) -> None:
+        super().addError(test, err)
+        self._status(test, ERROR)
+
+    def addSkip(self, test, reason) -> None:
+        super().addSkip(test, reason)
+        self._status(test, SKIP)
+
+    def addExpectedFailure(self, test, err) -> None:
+        super().addExpectedFailure(test, err)
+        self._status(test, EXPECTED_FAILURE)
+
+    def addUnexpectedSuccess(self, test) -> None:
+        super().addUnexpectedSuccess(test)
+        self._status(test, UNEXPECTED_SUCCESS)
+
+    def addSubTest(self, test, subtest, err) -> None:
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            self._status(test, FAILURE if issubclass(err[0], test.failureException) else ERROR)
+
+    def _status(self, test, status: str) -> None:
+        started = self._started.get(test.id())
+        # first failure of a test with subtests decides its status
+        if started is not None and started[1] == SUCCESS:
+            started[1] = status
+
+
+class HistoryTestResult(DurationsMixin, DeadlineTestResult):
+    """Result of sequential runs"""
@@ -1,11 +1,13 @@
 import json
 from functools import lru_cache
+from typing import Iterable, Iterator
 
-from lib import send_request, HttpResponse
+from lib import send_request, send_request_async, send_requests, HttpResponse
 from lib.common_namedtuples import EndPoint
+from lib.path_template import compile_template
 from lib.test_suite_config import load_suite_config
 from lib.tupleware import tupleware
-from lib.utils import get_auth, get_resource_config
+from lib.utils import get_auth, get_resource_config, get_suite_resource_config, get_suite_names
 
 
 def call_endpoint(endpoint_config: 'TWare', method: str = None, command_args: dict = None, input_args: dict = None,
@@ -17,36 +19,119 @@ def call_endpoint(endpoint_config: 'TWare', method: str = None, command_args: di
     :param command_args: commandline arguments for non test utilities
     :param input_args: input arguments to prepare endpoint url
     :param kwargs: other keyword arguments
+    :return: HttpResponse
+    """
+    return send_request(build_endpoint(endpoint_config, method, command_args, input_args, **kwargs))
+
+
+async def call_endpoint_async(endpoint_config: 'TWare', method: str = None, command_args: dict = None,
+                              input_args: dict = None, **kwargs) -> HttpResponse:
+    """
+    Awaitable call_endpoint, use asyncio.gather to run many endpoint calls concurrently
+    :param endpoint_config: endpoint object contains suite name, endpoint name key to prepare complete endpoint
+    :param method: http method, use if provided
+    :param command_args: commandline arguments for non test utilities
+    :param input_args: input arguments to prepare endpoint url
+    :param kwargs: other keyword arguments
+    :return: HttpResponse
+    """
+    return await send_request_async(build_endpoint(endpoint_config, method, command_args, input_args, **kwargs))
+
+
+def call_endpoints(calls: Iterable[tuple], max_in_flight: int = 8, per_host: int = None,
+                   ordered: bool = True) -> Iterator[HttpResponse]:
+    """
+    Call many endpoints on a worker pool, Ex. seed tasks for many companies
+        call_endpoints((endpoints.company_tasks_svc.createCompanyTasks, inputs) for inputs in company_inputs)
+    :param calls: iterable of (endpoint_config, endpoint inputs dict) tuples, inputs are call_endpoint kwargs
+    :param max_in_flight: max number of requests running at the same time
+    :param per_host: max number of requests running at the same time against one service host
+    :param ordered: if True yield responses in input order, otherwise as they complete
+    :return: generator of HttpResponse
+    """
+    _endpoints = (build_endpoint(endpoint_config, **endpoint_inputs) for endpoint_config, endpoint_inputs in calls)
+    return send_requests(_endpoints, max_in_flight=max_in_flight, per_host=per_host, ordered=ordered)
+
+
+def build_endpoint(endpoint_config: 'TWare', method: str = None, command_args: dict = None, input_args: dict = None,
+                   **kwargs) -> EndPoint:
+    """
+    Prepare endpoint with appropriate url and headers
+    :param endpoint_config: endpoint object contains suite name, endpoint name key to prepare complete endpoint
+    :param method: http method, use if provided
+    :param command_args: commandline arguments for non test utilities
+    :param input_args: input arguments to prepare endpoint url
+    :param kwargs: other keyword arguments
     :return: EndPoint
     """
-    configs = load_suite_config(**command_args) if command_args else load_suite_config()
-    _env = configs.get('environment')
-    _suite = configs.get('suites').get(endpoint_config.suite)
+    return get_endpoint_plan(endpoint_config, command_args).build(method, command_args, input_args, **kwargs)
 
-    # Suite level data (considered as default)
-    _base_url, _suite_args, _suite_params, _suite_headers = get_suite_level_data(_suite, _env, endpoint_config.endpoint)
-    # Test data set in internal/test_data directory (it will override suite level default data)
-    _td_args, _td_params, _td_headers, _td_data, _td_json = get_internal_test_data(_env, **kwargs)
 
-    # Prepare endpoint, headers, data, files and json
-    _input_args = input_args if input_args else {}
-    _endpoint_args = {**_suite_args, **_td_args, **_input_args}
-    _endpoint_args = {**_endpoint_args, **command_args} if command_args else _endpoint_args
+class EndpointPlan:
+    """
+    Endpoint call compiled once per (suite, endpoint, environment): base url, suite level (default) args, params and
+    headers, method, client options and parsed path template are resolved up front, so a call only merges test data
+    overrides and substitutes path args.
+    """
+    __slots__ = ('env', 'method', 'path', 'args', 'params', 'headers', 'options')
+
+    def __init__(self, suite: dict, env: str, endpoint_key: str):
+        _endpoint = suite.get('endpoints').get(endpoint_key)
+        # Suite level data (considered as default)
+        _base_url, self.args, self.params, self.headers = get_suite_level_data(suite, env, endpoint_key)
+        self.env = env
+        self.method = _endpoint.get('method')
+        self.path = compile_template(f"{_base_url}{_endpoint.get('path')}")
+        self.options = get_client_options(suite, endpoint_key)
 
-    # Parameters for GET request
-    _params = {**_suite_params, **_td_params}
+    def build(self, method: str = None, command_args: dict = None, input_args: dict = None, **kwargs) -> EndPoint:
+        """
+        Prepare endpoint for a call
+        :param method: http method, use if provided
+        :param command_args: commandline arguments for non test utilities
+        :param input_args: input arguments to prepare endpoint url
+        :param kwargs: test data and other keyword arguments
+        :return: EndPoint
+        """
+        # Test data set in internal/test_data directory (it will override suite level default data)
+        _td_args, _td_params, _td_headers, _td_data, _td_json = get_internal_test_data(self.env, **kwargs)
 
-    _endpoint_path = _suite.get('endpoints').get(endpoint_config.endpoint).get('path').format(**_endpoint_args)
-    _uri = f"{_base_url}{_endpoint_path}"
+        # Prepare endpoint, headers, data, files and json
+        _endpoint_args = {**self.args, **_td_args, **input_args} if input_args else {**self.args, **_td_args}
+        _endpoint_args = {**_endpoint_args, **command_args} if command_args else _endpoint_args
 
-    # Add additional headers if provided by calling method
-    _headers = {**_suite_headers, **_td_headers, **kwargs.get('add_headers', {}), **get_auth()}
+        # Parameters for GET request, query portion of endpoint path comes first
+        _params = {**self.path.expand_params(_endpoint_args), **self.params, **_td_params} if self.path.query \
+            else {**self.params, **_td_params}
 
-    _method = method if method else _suite.get('endpoints').get(endpoint_config.endpoint).get('method')
-    endpoint_obj = EndPoint(uri=_uri, method=_method.lower(), env=_env, headers=_headers, params=_params,
-                            data=_td_data, json=_td_json)
+        # Add additional headers if provided by calling method
+        _headers = {**self.headers, **_td_headers, **kwargs.get('add_headers', {}), **get_auth()}
 
-    return send_request(endpoint_obj)
+        _method = method if method else self.method
+        # Stream response body to a file, Ex. stream=True or stream={"path": "zlogs/feed.json"}
+        _options = {**self.options, 'stream': kwargs.get('stream')} if 'stream' in kwargs else self.options
+        return EndPoint(uri=self.path.expand(_endpoint_args), method=_method.lower(), env=self.env, headers=_headers,
+                        params=_params, data=_td_data, json=_td_json, options=_options)
+
+
+_endpoint_plans = {}
+
+
+def get_endpoint_plan(endpoint_config: 'TWare', command_args: dict = None) -> EndpointPlan:
+    """
+    Compiled plan for endpoint in current environment, built on first use
+    :param endpoint_config: endpoint object contains suite name, endpoint name key
+    :param command_args: commandline arguments for non test utilities
+    :return: EndpointPlan
+    """
+    configs = load_suite_config(**command_args) if command_args else load_suite_config()
+    _env = configs.get('environment')
+    _key = (endpoint_config.suite, endpoint_config.endpoint, _env)
+    plan = _endpoint_plans.get(_key)
+    if plan is None:
+        plan = EndpointPlan(configs.get('suites').get(endpoint_config.suite), _env, endpoint_config.endpoint)
+        _endpoint_plans[_key] = plan
+    return plan
 
 
 def get_suite_level_data(suite: dict, env: str, endpoint_key: str) -> tuple:
@@ -65,6 +150,28 @@ def get_suite_level_data(suite: dict, env: str, endpoint_key: str) -> tuple:
     return _base_url, _suite_args, _suite_params, _suite_headers
 
 
+def get_client_options(suite: dict, endpoint_key: str) -> dict:
+    """
+    Client options set in resource config, endpoint level "client" block overrides suite level. Supported elements:
+        pool - keep-alive connection pool settings (see lib.session_pool)
+        keep_content - false drops raw response body once response data is decoded
+        stream - true or {"path", "chunk_size", "algorithm"} streams response body to a file
+        retry, circuit_breaker - retry policy and host circuit breaker (see lib.resilience)
+        timeout - {"connect": sec, "read": sec} or sec for both, default connect 10 and read 120
+        cache - true or {"disk": true} enables conditional GET response cache (see lib.http_cache)
+    :param suite: suite config
+    :param endpoint_key: endpoint key
+    :return: client options dict
+    """
+    _suite_options = suite.get('client', {})
+    _endpoint_options = suite.get('endpoints').get(endpoint_key).get('client', {})
+    _options = {**_suite_options, **_endpoint_options}
+    for k, v in _suite_options.items():
+        if type(v) == dict and type(_endpoint_options.get(k)) == dict:
+            _options[k] = {**v, **_endpoint_options.get(k)}
+    return _options
+
+
 def get_internal_test_data(env: str, **test_data) -> tuple:
     """
     This data is coming from test_data directory json file. It will override the suite level data.
@@ -99,23 +206,58 @@ def get_internal_test_data(env: str, **test_data) -> tuple:
 @lru_cache()
 def endpoint_suites() -> 'TWare':
     """
-    Formatted Endpoints data to access as endpoints.<endpoint suite>.<end point>
+    Formatted Endpoints data of all suites to access as endpoint_suites().<endpoint suite>.<end point>
     :return:TWare object
     """
-    _suites = {}
-    for k, v in get_resource_config()['suites'].items():
-        _suite = {'suite': k}
-        base_url = v['baseurl']
-        del v['baseurl']
-        for k1, v1 in v.get('endpoints', {}).items():
-            v1['suite'] = k
-            v1['endpoint'] = k1
-            v1['path'] = f'{base_url}{v1["path"]}'
-            v1['method'] = v1.get('method', 'GET')
-            _suite[k1] = v1
-        _suites[k] = _suite
-    return tupleware(_suites)
+    return tupleware({k: _endpoint_suite(k, v) for k, v in get_resource_config()['suites'].items()})
+
+
+def _endpoint_suite(suite: str, suite_config: dict) -> dict:
+    """
+    Endpoints of suite keyed by endpoint name, each with suite, endpoint, full path and method
+    :param suite: suite name
+    :param suite_config: suite resource config
+    :return: suite dict
+    """
+    _suite = {'suite': suite}
+    base_url = suite_config['baseurl']
+    for k1, v1 in suite_config.get('endpoints', {}).items():
+        try:
+            # parse and validate path template once when suite is loaded, plans reuse the parsed template
+            compile_template(v1['path'])
+        except ValueError as e:
+            raise ValueError(f"Suite '{suite}' endpoint '{k1}': {e}") from None
+        v1['suite'] = suite
+        v1['endpoint'] = k1
+        v1['path'] = f'{base_url}{v1["path"]}'
+        v1['method'] = v1.get('method', 'GET')
+        _suite[k1] = v1
+    return _suite
+
+
+class EndpointRegistry:
+    """
+    Endpoints accessed as endpoints.<endpoint suite>.<end point>, a suite is loaded from its resource config file on
+    first access, so importing this module or using one service does not read the config of every service
+    """
+
+    def __getattr__(self, suite: str) -> 'TWare':
+        if suite.startswith('__'):
+            raise AttributeError(suite)
+        _config = get_suite_resource_config(suite)
+        if _config is None:
+            raise AttributeError(f"Endpoint suite '{suite}' is not configured in resource config")
+        _suite = tupleware(_endpoint_suite(suite, _config))
+        # cache as instance attribute, next access does not reach __getattr__
+        setattr(self, suite, _suite)
+        return _suite
+
+    def __dir__(self) -> list:
+        return get_suite_names()
+
+    def __repr__(self) -> str:
+        return f"EndpointRegistry(loaded={list(self.__dict__)})"
 
 
 # Access formatted Endpoints data as endpoints.<endpoint suite>.<end point>
-endpoints = endpoint_suites()
+endpoints = EndpointRegistry()
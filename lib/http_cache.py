@@ -0,0 +1,225 @@
+"""
+ETag/Last-Modified aware response cache for GET endpoints
+
+Enable per suite or endpoint with the "cache" client option in resource config:
+    "client": {"cache": true}                   # memory cache
+    "client": {"cache": {"disk": true}}         # memory cache plus on-disk tier under zlogs/http_cache
+    "client": {"cache": {"max_body": 65536}}    # largest body stored in bytes, default MAX_BODY_BYTES
+Responses carrying ETag or Last-Modified are stored. Next GET of the same uri and params is sent as a conditional
+request (If-None-Match/If-Modified-Since) and a 304 answer is served from the cached body. Request headers named by the
+Vary response header are part of the cache key, responses with "Vary: *" or "Cache-Control: no-store" or "private" are
+not stored. Streamed endpoints ("stream" client option) are not cached, keep the option off for endpoints with large or
+frequently changing bodies. Memory tier keeps the most recently used MAX_ENTRIES responses, disk tier is not evicted.
+Hit, miss and store counters (cache_stats()) are printed at the end of a test_launcher run.
+"""
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from urllib.parse import urlencode
+
+from requests.structures import CaseInsensitiveDict
+
+from lib.common_namedtuples import EndPoint
+
+THIS_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+CACHE_DIR = f'{THIS_DIR_PATH}/../zlogs/http_cache'
+MAX_ENTRIES = 256
+MAX_BODY_BYTES = 1024 * 1024
+
+HIT = 'hit'
+MISS = 'miss'
+
+
+class CacheEntry(NamedTuple):
+    status: int
+    headers: dict
+    body: bytes
+    encoding: str = None
+    etag: str = None
+    last_modified: str = None
+
+
+class HttpCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES, cache_dir: str = CACHE_DIR):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0}
+        self._entries = OrderedDict()
+        # names of request headers the responses of a cache_key vary on
+        self._vary = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str, disk: bool = False) -> Optional[CacheEntry]:
+        """
+        Cached entry for key, memory tier first then disk tier
+        :param key: cache key
+        :param disk: look up disk tier
+        :return: CacheEntry or None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        if not disk:
+            return None
+        entry = self._read_disk(key)
+        if entry is not None:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key: str, entry: CacheEntry, disk: bool = False) -> None:
+        """
+        Store entry in memory tier and optionally in disk tier
+        :param key: cache key
+        :param entry: response to cache
+        :param disk: also write to disk tier
+        :return: None
+        """
+        self._remember(key, entry)
+        with self._lock:
+            self.stats['stores'] += 1
+        if disk:
+            self._write_disk(key, entry)
+
+    def vary(self, key: str, disk: bool = False) -> tuple:
+        """
+        Request header names the cached responses of key vary on
+        :param key: cache key without vary headers
+        :param disk: look up disk tier
+        :return: tuple of lowercase header names
+        """
+        with self._lock:
+            names = self._vary.get(key)
+        if names is None and disk:
+            names = self._read_disk(f'{key} vary')
+            if names is not None:
+                with self._lock:
+                    self._vary[key] = names
+        return names or ()
+
+    def set_vary(self, key: str, names: tuple, disk: bool = False) -> None:
+        """
+        Remember request header names the responses of key vary on
+        :param key: cache key without vary headers
+        :param names: tuple of lowercase header names
+        :param disk: also write to disk tier
+        :return: None
+        """
+        with self._lock:
+            if self._vary.get(key) == names:
+                return
+            self._vary[key] = names
+        if disk:
+            self._write_disk(f'{key} vary', names)
+
+    def count(self, outcome: str) -> None:
+        with self._lock:
+            self.stats['hits' if outcome == HIT else 'misses'] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._vary.clear()
+
+    def _remember(self, key: str, entry: CacheEntry) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _read_disk(self, key: str):
+        try:
+            with open(self._disk_path(key), 'rb') as f:
+                return pickle.load(f)
+        except (OSError, pickle.PickleError, EOFError):
+            return None
+
+    def _write_disk(self, key: str, value) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        path = self._disk_path(key)
+        with open(f'{path}.{threading.get_ident()}.tmp', 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(f.name, path)
+
+    def _disk_path(self, key: str) -> str:
+        return f"{self.cache_dir}/{hashlib.sha1(key.encode()).hexdigest()}.pickle"
+
+
+http_cache = HttpCache()
+
+
+def cache_options(endpoint: EndPoint) -> Optional[dict]:
+    """
+    Cache settings of endpoint
+    :param endpoint: endpoint details
+    :return: settings dict, None when cache is not enabled or the endpoint is streamed
+    """
+    _cache = endpoint.options.get('cache')
+    if not _cache or endpoint.options.get('stream'):
+        return None
+    return _cache if type(_cache) == dict else {}
+
+
+def cache_key(endpoint: EndPoint, vary: tuple = ()) -> str:
+    """
+    Cache key of GET endpoint
+    :param endpoint: endpoint details
+    :param vary: request header names the response varies on (see HttpCache.vary)
+    :return: uri with sorted query params, followed by the vary header values
+    """
+    query = urlencode(sorted((endpoint.params or {}).items()), doseq=True)
+    key = f"{endpoint.uri}{'?' if query else ''}{query}"
+    if not vary:
+        return key
+    headers = CaseInsensitiveDict(endpoint.headers or {})
+    return f"{key} {urlencode([(name, headers.get(name, '')) for name in vary])}"
+
+
+def vary_names(headers: dict) -> Optional[tuple]:
+    """
+    Request header names of the Vary response header
+    :param headers: response headers
+    :return: sorted tuple of lowercase header names, None for "Vary: *" (response can not be cached)
+    """
+    names = {name.strip().lower() for name in CaseInsensitiveDict(headers).get('Vary', '').split(',') if name.strip()}
+    return None if '*' in names else tuple(sorted(names))
+
+
+def storable(headers: dict) -> bool:
+    """
+    Whether the Cache-Control response header allows storing the response
+    :param headers: response headers
+    :return: False for "no-store" or "private" responses, the cache is shared by all tests of the run
+    """
+    directives = {directive.split('=', 1)[0].strip().lower()
+                  for directive in CaseInsensitiveDict(headers).get('Cache-Control', '').split(',')}
+    return not directives & {'no-store', 'private'}
+
+
+def conditional_headers(entry: Optional[CacheEntry]) -> dict:
+    """
+    Validator headers for conditional request
+    :param entry: cached entry
+    :return: headers dict
+    """
+    if entry is None:
+        return {}
+    headers = {}
+    if entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
+
+
+def cache_stats() -> dict:
+    """
+    Cache counters
+    :return: dict of hits, misses and stores
+    """
+    return dict(http_cache.stats)
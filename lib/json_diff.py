@@ -0,0 +1,248 @@
+"""
+Structural diff of json data (dicts, lists and scalars) for response vs expected assertions
+
+Both structures are walked once, differences are reported with their path, Ex. content[3].status, and the walk stops
+after max_diffs differences. Paths to ignore and lists to compare order-insensitively are declared with patterns:
+    LastViewedDate                  key of the top-level object
+    content[*].trackingData         trackingData of every item of content list
+    content[0].id                   id of the first item only
+    *.updatedAt                     updatedAt of every value of the top-level object
+    [*].trackingData                trackingData of every item of a top-level list
+Order-insensitive lists are matched by canonical hashes of their items (ignored paths excluded), so the cost stays
+linear in the list size.
+"""
+import re
+from collections import Counter
+from typing import NamedTuple
+
+MAX_DIFFS = 20
+MAX_VALUE_LENGTH = 80
+
+MISSING = 'missing'
+UNEXPECTED = 'unexpected'
+CHANGED = 'changed'
+
+_ANY_KEY = object()
+_ANY_INDEX = object()
+_TOKEN = re.compile(r'\[(\*|\d+)\]|([^.\[\]]+)')
+
+
+class Difference(NamedTuple):
+    path: str
+    kind: str
+    expected: object = None
+    actual: object = None
+
+    def __str__(self) -> str:
+        if self.kind == MISSING:
+            return f"{self.path}: missing, expected {_short(self.expected)}"
+        if self.kind == UNEXPECTED:
+            return f"{self.path}: unexpected {_short(self.actual)}"
+        return f"{self.path}: expected {_short(self.expected)}, actual {_short(self.actual)}"
+
+
+def compile_paths(paths) -> tuple:
+    """
+    Parse path patterns
+    :param paths: iterable of path patterns, Ex. ['content[*].trackingData']
+    :return: tuple of token tuples
+    :raise ValueError: invalid pattern
+    """
+    compiled = []
+    for path in paths or ():
+        tokens = []
+        pos = 0
+        while pos < len(path):
+            if path[pos] == '.' and tokens:
+                pos += 1
+            match = _TOKEN.match(path, pos)
+            if match is None:
+                raise ValueError(f"Invalid json path '{path}' at position {pos}")
+            index, key = match.groups()
+            if key is not None:
+                tokens.append(_ANY_KEY if key == '*' else key)
+            else:
+                tokens.append(_ANY_INDEX if index == '*' else int(index))
+            pos = match.end()
+        compiled.append(tuple(tokens))
+    return tuple(compiled)
+
+
+def json_diff(expected, actual, ignore=(), unordered=(), max_diffs: int = MAX_DIFFS) -> list:
+    """
+    Compare json structures in a single pass
+    :param expected: expected data
+    :param actual: actual data
+    :param ignore: path patterns excluded from comparison
+    :param unordered: path patterns of lists compared order-insensitively, True for all lists
+    :param max_diffs: stop after this many differences
+    :return: list of Difference, empty when equal
+    """
+    diff = _Diff(compile_paths(ignore), True if unordered is True else compile_paths(unordered), max_diffs)
+    try:
+        diff.compare(expected, actual, (), _states(diff.ignore), _states(diff.unordered))
+    except _Stop:
+        pass
+    return diff.differences
+
+
+def format_diff(differences: list, max_diffs: int = MAX_DIFFS) -> str:
+    """
+    Readable report of differences
+    :param differences: list of Difference
+    :param max_diffs: max_diffs used for the comparison
+    :return: report str
+    """
+    more = ', comparison stopped' if len(differences) >= max_diffs else ''
+    lines = [f"{len(differences)} difference{'s' if len(differences) != 1 else ''}{more}:"]
+    lines.extend(f"  {difference}" for difference in differences)
+    return '\n'.join(lines)
+
+
+class _Stop(Exception):
+    pass
+
+
+class _Diff:
+    def __init__(self, ignore: tuple, unordered, max_diffs: int):
+        self.ignore = ignore
+        self.unordered = unordered
+        self.max_diffs = max_diffs
+        self.differences = []
+
+    def report(self, path: tuple, kind: str, expected=None, actual=None) -> None:
+        self.differences.append(Difference(_render(path), kind, expected, actual))
+        if len(self.differences) >= self.max_diffs:
+            raise _Stop
+
+    def compare(self, expected, actual, path: tuple, ignore: tuple, unordered: tuple) -> None:
+        if type(expected) == dict and type(actual) == dict:
+            for key, value in expected.items():
+                _ignore = _advance(self.ignore, ignore, key)
+                if _matched(self.ignore, _ignore):
+                    continue
+                if key not in actual:
+                    self.report((*path, key), MISSING, expected=value)
+                else:
+                    self.compare(value, actual[key], (*path, key), _ignore, _advance(self.unordered, unordered, key))
+            for key, value in actual.items():
+                if key not in expected and not _matched(self.ignore, _advance(self.ignore, ignore, key)):
+                    self.report((*path, key), UNEXPECTED, actual=value)
+        elif type(expected) == list and type(actual) == list:
+            if self.unordered is True or _matched(self.unordered, unordered):
+                self.compare_unordered(expected, actual, path, ignore, unordered)
+            else:
+                for index in range(max(len(expected), len(actual))):
+                    _ignore = _advance(self.ignore, ignore, index)
+                    if _matched(self.ignore, _ignore):
+                        continue
+                    if index >= len(actual):
+                        self.report((*path, index), MISSING, expected=expected[index])
+                    elif index >= len(expected):
+                        self.report((*path, index), UNEXPECTED, actual=actual[index])
+                    else:
+                        self.compare(expected[index], actual[index], (*path, index), _ignore,
+                                     _advance(self.unordered, unordered, index))
+        elif type(expected) != type(actual) and not (_is_number(expected) and _is_number(actual)) \
+                or expected != actual:
+            self.report(path, CHANGED, expected, actual)
+
+    def compare_unordered(self, expected: list, actual: list, path: tuple, ignore: tuple, unordered: tuple) -> None:
+        # items of unordered list are matched by canonical form, per item ignore and unordered states do not depend
+        # on the index except for explicit index patterns, which are meaningless for unordered lists
+        _ignore = _advance(self.ignore, ignore, _ANY_INDEX)
+        _unordered = _advance(self.unordered, unordered, _ANY_INDEX)
+        if _matched(self.ignore, _ignore):
+            return
+        actual_keys = [self.canonical(item, _ignore, _unordered) for item in actual]
+        remaining = Counter(actual_keys)
+        missing = []
+        for index, item in enumerate(expected):
+            key = self.canonical(item, _ignore, _unordered)
+            if remaining[key] > 0:
+                remaining[key] -= 1
+            else:
+                missing.append(index)
+        for index in missing:
+            self.report((*path, index), MISSING, expected=expected[index])
+        # actual items left after matching are unexpected
+        for index, key in enumerate(actual_keys):
+            if remaining[key] > 0:
+                remaining[key] -= 1
+                self.report((*path, index), UNEXPECTED, actual=actual[index])
+
+    def canonical(self, value, ignore: tuple, unordered: tuple):
+        """Hashable form of value without ignored paths, order-insensitive lists are kept as item counts"""
+        if type(value) == dict:
+            items = []
+            for key, item in value.items():
+                _ignore = _advance(self.ignore, ignore, key)
+                if not _matched(self.ignore, _ignore):
+                    items.append((key, self.canonical(item, _ignore, _advance(self.unordered, unordered, key))))
+            return 'd', frozenset(items)
+        if type(value) == list:
+            _ignore = _advance(self.ignore, ignore, _ANY_INDEX)
+            _unordered = _advance(self.unordered, unordered, _ANY_INDEX)
+            if _matched(self.ignore, _ignore):
+                return 'l', ()
+            items = tuple(self.canonical(item, _ignore, _unordered) for item in value)
+            if self.unordered is True or _matched(self.unordered, unordered):
+                return 'u', frozenset(Counter(items).items())
+            return 'l', items
+        # keep true and 1 apart, they are equal and hash the same in python
+        return ('b', value) if type(value) == bool else value
+
+
+def _states(patterns) -> tuple:
+    """Initial matching state: (pattern index, position) of every pattern"""
+    return () if patterns is True else tuple((index, 0) for index in range(len(patterns)))
+
+
+def _advance(patterns, states: tuple, step) -> tuple:
+    """
+    Advance pattern states by one path step, states of patterns which do not match the step are dropped
+    :return: new states, a state at the end of its pattern means the pattern matches the path
+    """
+    if patterns is True or not states:
+        return ()
+    advanced = []
+    for index, position in states:
+        pattern = patterns[index]
+        if position == len(pattern):
+            continue
+        token = pattern[position]
+        if token is _ANY_KEY:
+            matches = type(step) == str
+        elif token is _ANY_INDEX:
+            matches = type(step) == int or step is _ANY_INDEX
+        else:
+            matches = type(token) == type(step) and token == step
+        if matches:
+            advanced.append((index, position + 1))
+    return tuple(advanced)
+
+
+def _matched(patterns, states: tuple) -> bool:
+    """True when a pattern ends at current path"""
+    return patterns is not True and any(position == len(patterns[index]) for index, position in states)
+
+
+def _is_number(value) -> bool:
+    return type(value) in (int, float)
+
+
+def _render(path: tuple) -> str:
+    rendered = ''
+    for step in path:
+        if type(step) == int:
+            rendered += f'[{step}]'
+        elif re.fullmatch(r'[^.\[\]]+', step):
+            rendered += f'.{step}' if rendered else step
+        else:
+            rendered += f'[{step!r}]'
+    return rendered or '$'
+
+
+def _short(value) -> str:
+    text = repr(value)
+    return text if len(text) <= MAX_VALUE_LENGTH else f'{text[:MAX_VALUE_LENGTH - 3]}...'
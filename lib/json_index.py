@@ -0,0 +1,233 @@
+"""
+Selective loading of large json test data files
+
+The file is memory-mapped and scanned once for the byte spans of its top-level keys and of the keys one level below
+(Ex. env sections "dev", "qa"), only the requested sections are parsed. The index is kept per file until the file
+changes and saved under zlogs/.pytaf_cache/json_index, so next runs do not scan the file again.
+    index = json_index('test_data/company_tasks_svc/validation_create_company_tasks.json')
+    index.get('endpoint_inputs')                        # parses endpoint_inputs only
+    index.get('expected_response', 'expected_content')  # parses one expected response only
+Memory maps are closed when the file changes (the index is replaced) and at exit, or use an index as context manager.
+"""
+import atexit
+import codecs
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import re
+import threading
+
+from lib.config_cache import CACHE_DIR
+
+INDEX_DIR = f'{CACHE_DIR}/json_index'
+# keys of top-level objects are indexed too
+INDEX_LEVELS = 2
+
+_WHITESPACE = re.compile(rb'[ \t\n\r]*')
+_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"')
+_SCALAR_END = re.compile(rb'[,}\]\s]|$')
+# next bracket outside of strings, text and strings before it are skipped by the regex engine
+_NEXT_BRACKET = re.compile(rb'[^"{}\[\]]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^"{}\[\]]*)*([{}\[\]])')
+
+_MISSING = object()
+
+
+class JsonIndex:
+    """Byte spans of top-level keys (and keys of top-level objects) of a json file, sections are parsed on access"""
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        with open(file_path, 'rb') as f:
+            _stat = os.fstat(f.fileno())
+            self.stamp = (_stat.st_mtime_ns, _stat.st_size)
+            # empty file can not be mapped
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if _stat.st_size else b''
+        self.spans = _read_index(file_path, self.stamp)
+        if self.spans is None:
+            self.spans = index_spans(self._buffer)
+            _write_index(file_path, self.stamp, self.spans)
+
+    def keys(self, *keys) -> list:
+        """
+        Indexed keys
+        :param keys: top-level key to list keys of its object value, none for top-level keys
+        :return: list of keys
+        """
+        _spans = self._children(*keys)
+        return list(_spans) if _spans else []
+
+    def get(self, *keys, default=None):
+        """
+        Parse section at keys path, Ex. get('dev', 'endpoint_inputs')
+        :param keys: keys below the indexed levels are looked up in the parsed section, no keys parses the whole file
+        :param default: returned when a key does not exist
+        :return: parsed section
+        """
+        if not keys:
+            return json.loads(self._buffer[_content_start(self._buffer):])
+        _indexed = min(len(keys), INDEX_LEVELS)
+        _span = self._children(*keys[:_indexed - 1]).get(keys[_indexed - 1])
+        if _span is None:
+            return default
+        value = json.loads(self._buffer[_span[0]:_span[1]])
+        for key in keys[INDEX_LEVELS:]:
+            value = value.get(key, _MISSING) if type(value) == dict else _MISSING
+            if value is _MISSING:
+                return default
+        return value
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.spans
+
+    def close(self) -> None:
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+
+    def __enter__(self) -> 'JsonIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _children(self, *keys) -> dict:
+        _spans = self.spans
+        for key in keys:
+            _span = _spans.get(key)
+            _spans = _span[2] if _span else None
+            if not _spans:
+                return {}
+        return _spans
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def json_index(file_path: str) -> JsonIndex:
+    """
+    Index of json file, reused until the file changes
+    :param file_path: json file path
+    :return: JsonIndex
+    :raise OSError: file is not readable
+    :raise ValueError: file is not a json object
+    """
+    key = os.path.abspath(file_path)
+    _stat = os.stat(key)
+    index = _indexes.get(key)
+    if index is None or index.stamp != (_stat.st_mtime_ns, _stat.st_size):
+        with _indexes_lock:
+            index = _indexes.get(key)
+            if index is None or index.stamp != (_stat.st_mtime_ns, _stat.st_size):
+                if index is not None:
+                    index.close()
+                index = JsonIndex(key)
+                _indexes[key] = index
+    return index
+
+
+@atexit.register
+def close_indexes() -> None:
+    """
+    Close memory maps of all indexes, json_index() opens them again on next use
+    :return: None
+    """
+    with _indexes_lock:
+        indexes = list(_indexes.values())
+        _indexes.clear()
+    for index in indexes:
+        index.close()
+
+
+def index_spans(buffer, levels: int = INDEX_LEVELS) -> dict:
+    """
+    Scan json object for byte spans of its keys
+    :param buffer: bytes or mmap of json text
+    :param levels: key levels to index
+    :return: dict of key to (start, end, dict of child spans or None)
+    :raise ValueError: not a json object
+    """
+    pos = _WHITESPACE.match(buffer, _content_start(buffer)).end()
+    if buffer[pos:pos + 1] != b'{':
+        raise ValueError('Indexed json must be an object')
+    return _object_spans(buffer, pos, levels)[0]
+
+
+def _content_start(buffer) -> int:
+    """Position after the utf-8 byte order mark, 0 without it"""
+    return len(codecs.BOM_UTF8) if buffer[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8 else 0
+
+
+def _object_spans(buffer, pos: int, levels: int) -> tuple:
+    """Spans of keys of object starting at pos, returns spans and end position of the object"""
+    spans = {}
+    pos = _WHITESPACE.match(buffer, pos + 1).end()
+    if buffer[pos:pos + 1] == b'}':
+        return spans, pos + 1
+    while True:
+        match = _STRING.match(buffer, pos)
+        if match is None:
+            raise ValueError(f'Expecting property name at byte {pos}')
+        key = json.loads(match.group())
+        pos = _WHITESPACE.match(buffer, match.end()).end()
+        if buffer[pos:pos + 1] != b':':
+            raise ValueError(f"Expecting ':' at byte {pos}")
+        start = _WHITESPACE.match(buffer, pos + 1).end()
+        if levels > 1 and buffer[start:start + 1] == b'{':
+            children, end = _object_spans(buffer, start, levels - 1)
+        else:
+            children, end = None, _skip_value(buffer, start)
+        spans[key] = (start, end, children)
+        pos = _WHITESPACE.match(buffer, end).end()
+        delimiter = buffer[pos:pos + 1]
+        if delimiter == b'}':
+            return spans, pos + 1
+        if delimiter != b',':
+            raise ValueError(f"Expecting ',' delimiter at byte {pos}")
+        pos = _WHITESPACE.match(buffer, pos + 1).end()
+
+
+def _skip_value(buffer, pos: int) -> int:
+    """End position of json value starting at pos"""
+    first = buffer[pos:pos + 1]
+    if first == b'"':
+        match = _STRING.match(buffer, pos)
+        if match is None:
+            raise ValueError(f'Unterminated string at byte {pos}')
+        return match.end()
+    if first in (b'{', b'['):
+        depth = 0
+        for match in _NEXT_BRACKET.finditer(buffer, pos):
+            if match.group(1) in b'{[':
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return match.end()
+        raise ValueError(f'Unterminated value at byte {pos}')
+    return _SCALAR_END.search(buffer, pos).start()
+
+
+def _index_path(file_path: str) -> str:
+    return f"{INDEX_DIR}/{hashlib.sha1(file_path.encode()).hexdigest()}.pickle"
+
+
+def _read_index(file_path: str, stamp: tuple):
+    try:
+        with open(_index_path(file_path), 'rb') as f:
+            _stamp, spans = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, ValueError, TypeError):
+        return None
+    return spans if _stamp == stamp else None
+
+
+def _write_index(file_path: str, stamp: tuple, spans: dict) -> None:
+    try:
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        tmp_file = f'{_index_path(file_path)}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump((stamp, spans), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, _index_path(file_path))
+    except OSError as e:
+        print(f"Warning: Json index of {file_path} not saved, {e}")
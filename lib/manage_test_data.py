@@ -1,6 +1,8 @@
+import marshal
 import os
 
-from lib.commandline_args import cargs
+from lib.commandline_args import get_args_dict
+from lib.json_index import json_index
 from lib.utils import load_data
 
 THIS_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
@@ -18,10 +20,29 @@ def get_test_data(test_data_file: str, env: str = None) -> dict:
     return load_data(test_data_file).get(env, {}) if env else load_data(test_data_file)
 
 
+def get_test_data_section(test_data_file: str, *keys, default=None):
+    """
+    Pull one section of test data json file, only the section is parsed (see lib.json_index)
+    :param test_data_file: test data file name or full qualified file path
+    :param keys: keys path of section, Ex. 'expected_response', 'expected_content'
+    :param default: returned when section does not exist
+    :return: test data section
+    """
+    _td_path, stamp = _file_stamp(f'{THIS_DIR_PATH}/{TEST_DATA_DIR}/{test_data_file}')
+    if stamp is None:
+        _td_path, stamp = _file_stamp(test_data_file)
+    return json_index(_td_path).get(*keys, default=default) if stamp else default
+
+
 def test_data(**dec_kwargs):
+    """
+    Pass env merged test data to test as keyword arguments
+    file_name - test data file, sections - optional list of top-level sections to load, Ex. ["endpoint_inputs"],
+    other sections of a large test data file are not parsed
+    """
     def decorator(func):
         def wrapper(*args, **kwargs):
-            kwargs = {**kwargs, **env_test_data(dec_kwargs.get("file_name"))}
+            kwargs = {**kwargs, **env_test_data(dec_kwargs.get("file_name"), dec_kwargs.get("sections"))}
             exec_func = func(*args, **kwargs)
             return exec_func
 
@@ -30,23 +51,71 @@ def test_data(**dec_kwargs):
     return decorator
 
 
-def env_test_data(test_data_file) -> dict:
+# (test data file path, env) -> (file mtime and size, marshalled env merged test data)
+_env_test_data_cache = {}
+
+
+def env_test_data(test_data_file, sections: list = None) -> dict:
     """
     Make ENV specific test data available at top level.
+    Merged test data is cached per file and env until the file changes, each call gets its own copy.
     :param test_data_file: test data file path
+    :param sections: top-level sections to load, all when not provided
     :return: test data dict
     """
-    _cargs = cargs()
-    _env = _cargs.environment
-    _ext_td = _cargs.test_data
+    _args = get_args_dict()
+    _env = _args.get('environment')
+    _ext_td = _args.get('test_data')
     _td_file = _ext_td if _ext_td else test_data_file
-    _test_data = get_test_data(_td_file)
     assert '.json' in _td_file, 'Invalid test_data file name, provide valid json file'
-    _test_data = get_test_data(_td_file)
-    if not _test_data:
+    _td_path, stamp = _file_stamp(f'{THIS_DIR_PATH}/{TEST_DATA_DIR}/{_td_file}')
+    if stamp is None:
         # Full qualified path for external test data file
-        _test_data = load_data(_td_file)
+        _td_path, stamp = _file_stamp(_td_file)
+
+    key = (_td_path, _env, tuple(sections) if sections else None)
+    cached = _env_test_data_cache.get(key)
+    if cached is None or cached[0] != stamp:
+        _test_data = _load_sections(_td_path, sections, _env) if sections and stamp else load_data(_td_path)
+        cached = (stamp, marshal.dumps(merge_env_test_data(_test_data, _env)))
+        _env_test_data_cache[key] = cached
+    # unmarshal is a cheap deep copy, tests are free to modify their test data
+    return marshal.loads(cached[1])
+
+
+def _file_stamp(file_path: str) -> tuple:
+    """File path with its (mtime, size), stamp is None when file does not exist"""
+    try:
+        _stat = os.stat(file_path)
+        return file_path, (_stat.st_mtime_ns, _stat.st_size)
+    except OSError:
+        return file_path, None
 
+
+def _load_sections(td_path: str, sections: list, env: str) -> dict:
+    """
+    Parse requested top-level sections and the same sections of env sections
+    :param td_path: test data file path
+    :param sections: top-level sections
+    :param env: env
+    :return: test data dict
+    """
+    index = json_index(td_path)
+    _test_data = {section: index.get(section) for section in sections if section in index}
+    for _env in (env, env.upper()):
+        if _env in index and _env not in _test_data:
+            _env_sections = index.keys(_env)
+            _test_data[_env] = {section: index.get(_env, section) for section in sections if section in _env_sections}
+    return _test_data
+
+
+def merge_env_test_data(_test_data: dict, _env: str) -> dict:
+    """
+    Merge ENV specific test data into top level
+    :param _test_data: test data dict, updated in place
+    :param _env: env
+    :return: test data dict
+    """
     _env_data = {**_test_data.get(_env, {}), **_test_data.get(_env.upper(), {})}
 
     for env_ele, env_val in _env_data.items():
@@ -0,0 +1,529 @@
+"""
+Parallel test runners for test_launcher
+
+-j/--workers N: process pool, tests are grouped by test class and each class runs as a whole in a worker process, so
+setUp/tearDown, setUpClass/tearDownClass and the module fixtures of the class run as in a sequential run (module
+fixtures run once per worker using the module). In record transport mode tests are grouped by module instead,
+cassettes are written per module by one worker.
+
+-th/--threads N: thread pool of this process for I/O bound tests, loaded config, endpoint suites and keep-alive
+connection pools are shared. Test methods run concurrently, class and module fixtures run once around the methods of
+the class (module): a class is set up when its first test is started and torn down after its last test, so fixtures of
+classes whose tests run at the same time overlap (Ex. two classes creating and deleting tasks of the same company),
+decorate such classes with @run_serially() or run them without -th. Classes decorated with @run_serially() run their
+methods one at a time. Threads share one transport, -th can not be used with -tm record.
+
+Test output (print, lib.logger console handler) is captured per test, runners send back per test events (outcome,
+formatted traceback and captured output) and the events are replayed into one TextTestResult, so the report, verbosity 2
+lines and the summary are the same as with the sequential runner, only tests are reported in completion order.
+
+With durations of previous runs (lib.duration_history) the longest classes (tests) are started first, each next one
+goes to the first free worker, so the work is packed longest-processing-time-first and workers finish together.
+"""
+import atexit
+import io
+import logging
+import multiprocessing
+import sys
+import threading
+import time
+import unittest
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+# private unittest helpers reused so replayed results look as in a sequential run, the same in CPython 3.8 to 3.12,
+# check them (unittest.case, runner and suite) before supporting a newer Python
+from unittest.case import _SubTest, doModuleCleanups
+from unittest.runner import _WritelnDecorator
+from unittest.suite import _ErrorHolder
+from unittest.util import strclass
+
+from lib.deadline import DeadlineTestResult, get_deadline, set_deadline
+from lib.duration_history import DurationsMixin
+from lib.session_pool import close_sessions
+from lib.transport import RECORD, get_transport, make_transport, set_transport
+from lib.web_service_client import close_async_executor
+from lib.web_service_tests import SERIAL_ATTR
+
+START = 'start'
+SUCCESS = 'success'
+FAILURE = 'failure'
+ERROR = 'error'
+SKIP = 'skip'
+EXPECTED_FAILURE = 'expected_failure'
+UNEXPECTED_SUCCESS = 'unexpected_success'
+SUB_FAILURE = 'sub_failure'
+SUB_ERROR = 'sub_error'
+STOP = 'stop'
+
+
+class ParallelSuite:
+    """Callable test suite for TextTestRunner.run, runs test classes of suite on a process pool"""
+
+    def __init__(self, suite: unittest.TestSuite, workers: int, transport_mode: str = None, durations: dict = None):
+        """
+        :param suite: TestSuite
+        :param workers: number of worker processes
+        :param transport_mode: transport mode of workers
+        :param durations: estimated duration of tests by test id, longest classes are started first
+        """
+        self.workers = workers
+        self.transport_mode = transport_mode
+        self.units = longest_first(group_tests(suite, by_module=transport_mode == RECORD), durations,
+                                   lambda test_ids: test_ids)
+
+    def countTestCases(self) -> int:
+        return sum(len(test_ids) for test_ids in self.units)
+
+    def __call__(self, result: unittest.TestResult) -> unittest.TestResult:
+        # spawn: workers do not inherit open connections and threads of the parent (same start method on all OS)
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(self.units)) or 1, mp_context=context,
+                                 initializer=init_worker, initargs=(self.transport_mode, get_deadline())) as executor:
+            futures = {executor.submit(run_tests, test_ids): test_ids for test_ids in self.units}
+            try:
+                for future in as_completed(futures):
+                    try:
+                        events = future.result()
+                    except Exception as e:
+                        # worker crashed, Ex. test called os._exit or ran out of memory
+                        events = _failed_events(futures[future], e)
+                    replay(events, result)
+                    if result.shouldStop:
+                        break
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            finally:
+                for future in futures:
+                    future.cancel()
+        return result
+
+
+class ThreadedSuite:
+    """Callable test suite for TextTestRunner.run, runs test methods of suite on a thread pool"""
+
+    def __init__(self, suite: unittest.TestSuite, threads: int, durations: dict = None):
+        """
+        :param suite: TestSuite
+        :param threads: number of threads
+        :param durations: estimated duration of tests by test id, longest tests are started first
+        """
+        self.threads = threads
+        self.durations = durations
+        self.classes = OrderedDict()
+        for test in iter_tests(suite):
+            self.classes.setdefault(type(test), []).append(test)
+        self._result = None
+        self._modules = {}
+
+    def countTestCases(self) -> int:
+        return sum(len(tests) for tests in self.classes.values())
+
+    def __call__(self, result: unittest.TestResult) -> unittest.TestResult:
+        install_output_router()
+        self._result = result
+        # module: [classes not finished, setUpModule passed]
+        self._modules = {}
+        for cls in self.classes:
+            self._modules.setdefault(cls.__module__, [0, None])[0] += 1
+        units = [unit for cls in self.classes for unit in self._units_of(cls)]
+        units = iter(longest_first(units, self.durations, lambda unit: (test.id() for test in unit[1])))
+        # class: units not finished, classes are set up when their first unit is submitted
+        units_left = {}
+        set_up = {}
+        futures = {}
+
+        def submit_next(executor: ThreadPoolExecutor) -> None:
+            for cls, unit in units:
+                if cls not in set_up:
+                    set_up[cls] = self._set_up_module(cls.__module__) and self._set_up_class(cls)
+                    if set_up[cls]:
+                        units_left[cls] = len(self._units_of(cls))
+                    else:
+                        self._class_done(cls)
+                if set_up[cls]:
+                    futures[executor.submit(run_test_cases, unit)] = cls, unit
+                    return
+
+        with ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='pytaf-test') as executor:
+            try:
+                # only as many units as threads are submitted, so a class is set up when its first test can start
+                for _ in range(self.threads):
+                    submit_next(executor)
+                while futures and not result.shouldStop:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        cls, unit = futures.pop(future)
+                        try:
+                            events = future.result()
+                        except Exception as e:
+                            events = _failed_events([test.id() for test in unit], e)
+                        replay(events, result)
+                        units_left[cls] -= 1
+                        if not units_left[cls]:
+                            self._tear_down_class(cls)
+                        if not result.shouldStop:
+                            submit_next(executor)
+            finally:
+                for future in futures:
+                    future.cancel()
+        # classes stopped by failfast or interrupt, running tests are finished at this point
+        for cls, left in units_left.items():
+            if left:
+                self._tear_down_class(cls)
+        # classes never started still count for the teardown of their module
+        for cls in self.classes:
+            if cls not in set_up:
+                self._class_done(cls)
+        return result
+
+    def _units_of(self, cls) -> list:
+        """Units of work of class, (class, tests) pairs, classes decorated with @run_serially() are one unit"""
+        tests = self.classes[cls]
+        return [(cls, tests)] if getattr(cls, SERIAL_ATTR, False) else [(cls, [test]) for test in tests]
+
+    def _set_up_module(self, module: str) -> bool:
+        state = self._modules[module]
+        if state[1] is None:
+            state[1] = self._call_fixture(getattr(sys.modules.get(module), 'setUpModule', None),
+                                          f'setUpModule ({module})')
+            if not state[1]:
+                self._module_cleanups(module)
+        return state[1]
+
+    def _set_up_class(self, cls) -> bool:
+        if getattr(cls, '__unittest_skip__', False):
+            # tests of skipped class report the skip
+            return True
+        if not self._call_fixture(cls.setUpClass, f'setUpClass ({strclass(cls)})'):
+            self._class_cleanups(cls)
+            return False
+        return True
+
+    def _tear_down_class(self, cls) -> None:
+        if not getattr(cls, '__unittest_skip__', False):
+            self._call_fixture(cls.tearDownClass, f'tearDownClass ({strclass(cls)})')
+            self._class_cleanups(cls)
+        self._class_done(cls)
+
+    def _class_done(self, cls) -> None:
+        state = self._modules[cls.__module__]
+        state[0] -= 1
+        if not state[0] and state[1]:
+            self._call_fixture(getattr(sys.modules.get(cls.__module__), 'tearDownModule', None),
+                               f'tearDownModule ({cls.__module__})')
+            self._module_cleanups(cls.__module__)
+
+    def _class_cleanups(self, cls) -> None:
+        cls.doClassCleanups()
+        for exc_info in cls.tearDown_exceptions:
+            self._fixture_error(f'tearDownClass ({strclass(cls)})', exc_info)
+
+    def _module_cleanups(self, module: str) -> None:
+        self._call_fixture(doModuleCleanups, f'tearDownModule ({module})')
+
+    def _call_fixture(self, fixture, description: str) -> bool:
+        """Run class or module fixture in the coordinating thread, errors are reported as in unittest.TestSuite"""
+        if fixture is None:
+            return True
+        try:
+            fixture()
+        except Exception:
+            self._fixture_error(description, sys.exc_info())
+            return False
+        return True
+
+    def _fixture_error(self, description: str, exc_info: tuple) -> None:
+        if isinstance(exc_info[1], unittest.SkipTest):
+            self._result.addSkip(_ErrorHolder(description), str(exc_info[1]))
+        else:
+            self._result.addError(_ErrorHolder(description), exc_info)
+
+
+def run_test_cases(tests: list) -> list:
+    """
+    Run test methods in worker thread, class and module fixtures are run by the caller
+    :param tests: TestCase instances
+    :return: list of recorded events
+    """
+    result = RecordingTestResult()
+    for test in tests:
+        test(result)
+    return result.events
+
+
+def longest_first(units: list, durations: dict, test_ids) -> list:
+    """
+    Order units by estimated duration, longest first, the order is kept without durations
+    :param units: units of work, Ex. test id lists
+    :param durations: estimated duration by test id, None or empty to keep the order
+    :param test_ids: function returning test ids of unit
+    :return: ordered list
+    """
+    if not durations:
+        return list(units)
+    return sorted(units, key=lambda unit: -sum(durations.get(test_id, 0) for test_id in test_ids(unit)))
+
+
+def group_tests(suite: unittest.TestSuite, by_module: bool = False) -> list:
+    """
+    Test ids of suite grouped by test class (or module), in suite order
+    :param suite: TestSuite
+    :param by_module: group by module instead of class
+    :return: list of test id lists
+    """
+    units = OrderedDict()
+    for test in iter_tests(suite):
+        key = type(test).__module__ if by_module else (type(test).__module__, type(test).__qualname__)
+        units.setdefault(key, []).append(test.id())
+    return list(units.values())
+
+
+def iter_tests(suite):
+    for test in suite:
+        if isinstance(test, unittest.TestSuite):
+            yield from iter_tests(test)
+        else:
+            yield test
+
+
+def init_worker(transport_mode: str, deadline: float) -> None:
+    """
+    Worker process initializer: same transport and run deadline as the parent
+    :param transport_mode: live, record or replay
+    :param deadline: absolute run deadline of parent, None for no deadline
+    :return: None
+    """
+    set_transport(make_transport(transport_mode))
+    set_deadline(at=deadline)
+    # spawned workers exit through sys.exit and run atexit handlers, the parent closes these in test_launcher
+    atexit.register(close_worker)
+
+
+def close_worker() -> None:
+    close_async_executor()
+    get_transport().close()
+    close_sessions()
+
+
+def run_tests(test_ids: list) -> list:
+    """
+    Run tests in worker process
+    :param test_ids: test ids of one class (or module)
+    :return: list of recorded events
+    """
+    suite = unittest.TestSuite(unittest.defaultTestLoader.loadTestsFromName(test_id) for test_id in test_ids)
+    result = RecordingTestResult()
+    suite(result)
+    return result.events
+
+
+class RecordingTestResult(DeadlineTestResult):
+    """
+    Worker side result, records outcome events with formatted tracebacks and the output of each test
+    event: (kind, test id, description, details, captured output), details of stop event is the test duration
+    """
+
+    def __init__(self):
+        super().__init__(_WritelnDecorator(io.StringIO()), True, 0)
+        self.events = []
+        self._started = None
+        install_output_router()
+
+    def startTest(self, test) -> None:
+        super().startTest(test)
+        self.events.append((START, test.id(), self.getDescription(test), '', ''))
+        self._started = time.perf_counter()
+        start_capture()
+
+    def stopTest(self, test) -> None:
+        duration = time.perf_counter() - self._started
+        self.events.append((STOP, test.id(), self.getDescription(test), duration, stop_capture()))
+        super().stopTest(test)
+
+    def addSuccess(self, test) -> None:
+        super().addSuccess(test)
+        self._record(SUCCESS, test)
+
+    def addError(self, test, err) -> None:
+        super().addError(test, err)
+        self._record(ERROR, test, self.errors[-1][1])
+
+    def addFailure(self, test, err) -> None:
+        super().addFailure(test, err)
+        self._record(FAILURE, test, self.failures[-1][1])
+
+    def addSkip(self, test, reason) -> None:
+        super().addSkip(test, reason)
+        self._record(SKIP, test, reason)
+
+    def addExpectedFailure(self, test, err) -> None:
+        super().addExpectedFailure(test, err)
+        self._record(EXPECTED_FAILURE, test, self.expectedFailures[-1][1])
+
+    def addUnexpectedSuccess(self, test) -> None:
+        super().addUnexpectedSuccess(test)
+        self._record(UNEXPECTED_SUCCESS, test)
+
+    def addSubTest(self, test, subtest, err) -> None:
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            failed = issubclass(err[0], test.failureException)
+            details = (self.failures if failed else self.errors)[-1][1]
+            self.events.append((SUB_FAILURE if failed else SUB_ERROR, test.id(), str(subtest), details, ''))
+
+    def _record(self, kind: str, test, details: str = '') -> None:
+        # output printed before the outcome is shown before the status, as in a sequential run
+        self.events.append((kind, test.id(), self.getDescription(test), details, take_output()))
+
+
+_capture = threading.local()
+
+
+class OutputRouter:
+    """
+    sys.stdout/sys.stderr proxy: output of a thread running a test goes to the capture buffer of that test, output of
+    other threads to the original stream
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, text: str) -> int:
+        buffer = getattr(_capture, 'buffer', None)
+        return (self.stream if buffer is None else buffer).write(text)
+
+    def flush(self) -> None:
+        if getattr(_capture, 'buffer', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+def install_output_router() -> None:
+    """
+    Route sys.stdout and sys.stderr through OutputRouter, logging stream handlers created earlier (Ex. lib.logger
+    console handler) are pointed to the router as well
+    :return: None
+    """
+    streams = {}
+    for name in ('stdout', 'stderr'):
+        stream = getattr(sys, name)
+        if not isinstance(stream, OutputRouter):
+            router = OutputRouter(stream)
+            setattr(sys, name, router)
+            streams[id(stream)] = router
+    if not streams:
+        return
+    loggers = [logging.getLogger(), *(logger for logger in logging.Logger.manager.loggerDict.values()
+                                      if isinstance(logger, logging.Logger))]
+    for logger in loggers:
+        for handler in logger.handlers:
+            if type(handler) == logging.StreamHandler and id(handler.stream) in streams:
+                handler.setStream(streams[id(handler.stream)])
+
+
+def start_capture() -> None:
+    """Capture output of current thread"""
+    _capture.buffer = io.StringIO()
+
+
+def take_output() -> str:
+    """Output captured so far in current thread, the buffer is emptied"""
+    buffer = getattr(_capture, 'buffer', None)
+    if buffer is None:
+        # class and module fixture errors are reported without startTest, nothing is captured for them
+        return ''
+    output = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return output
+
+
+def stop_capture() -> str:
+    """Stop capturing output of current thread, return output not taken yet"""
+    output = take_output()
+    _capture.buffer = None
+    return output
+
+
+class RemoteTest:
+    """Stand-in for a test which ran in a worker process"""
+    failureException = AssertionError
+
+    def __init__(self, test_id: str, description: str):
+        self._id = test_id
+        self.description = description
+        # measured in the worker
+        self.duration = None
+
+    def id(self) -> str:
+        return self._id
+
+    def shortDescription(self):
+        return None
+
+    def __str__(self) -> str:
+        return self.description
+
+
+class RemoteSubTest(_SubTest, RemoteTest):
+    """Stand-in for a subtest, TextTestResult indents subtest lines"""
+
+    def __init__(self, test_id: str, description: str):
+        RemoteTest.__init__(self, test_id, description)
+
+    id = RemoteTest.id
+    shortDescription = RemoteTest.shortDescription
+    __str__ = RemoteTest.__str__
+
+
+def _failed_events(test_ids: list, error: Exception) -> list:
+    return [event for test_id in test_ids for event in
+            ((START, test_id, test_id, '', ''),
+             (ERROR, test_id, test_id, f'Test worker failed: {error!r}\n', ''),
+             (STOP, test_id, test_id, None, ''))]
+
+
+class ReplayTestResult(DurationsMixin, unittest.TextTestResult):
+    """TextTestResult which accepts errors with tracebacks already formatted by the worker"""
+
+    def _exc_info_to_string(self, err, test) -> str:
+        return err[1] if isinstance(err[1], str) else super()._exc_info_to_string(err, test)
+
+
+def replay(events: list, result: unittest.TestResult) -> None:
+    """
+    Replay worker events into the parent result
+    :param events: recorded events
+    :param result: parent TestResult
+    :return: None
+    """
+    started = {}
+    for kind, test_id, description, details, output in events:
+        test = started.get(test_id) or RemoteTest(test_id, description)
+        if output:
+            getattr(result, 'stream', sys.stdout).write(output)
+        if kind == START:
+            started[test_id] = test
+            result.startTest(test)
+        elif kind == STOP:
+            started.pop(test_id, None)
+            test.duration = details
+            result.stopTest(test)
+        elif kind == SUCCESS:
+            result.addSuccess(test)
+        elif kind == FAILURE:
+            result.addFailure(test, (AssertionError, details, None))
+        elif kind == ERROR:
+            result.addError(test, (Exception, details, None))
+        elif kind == SKIP:
+            result.addSkip(test, details)
+        elif kind == EXPECTED_FAILURE:
+            result.addExpectedFailure(test, (AssertionError, details, None))
+        elif kind == UNEXPECTED_SUCCESS:
+            result.addUnexpectedSuccess(test)
+        elif kind in (SUB_FAILURE, SUB_ERROR):
+            error = AssertionError if kind == SUB_FAILURE else Exception
+            result.addSubTest(test, RemoteSubTest(test_id, description), (error, details, None))
@@ -0,0 +1,102 @@
+"""
+Pre-parsed endpoint path template, Ex. https://companytasks-svc.dev.com/api/v1/companies/{companyid}?ueid={ueid}
+The template is parsed once into literal text and variable segments so expanding it only joins strings.
+Substituted values are URL-encoded ('/' is kept, so a value can hold a sub-path), the query portion is not part of the
+expanded url but expanded into params.
+"""
+from functools import lru_cache
+from string import Formatter
+from urllib.parse import quote
+
+
+class MissingPathArgsError(KeyError):
+    """Path template variables without value"""
+
+    def __init__(self, template: str, missing: list):
+        super().__init__(f"Missing args {missing} for endpoint path '{template}'")
+        self.template = template
+        self.missing = missing
+
+    def __str__(self) -> str:
+        return self.args[0]
+
+
+class PathTemplate:
+    __slots__ = ('template', 'segments', 'query', 'variables')
+
+    def __init__(self, template: str):
+        """
+        :param template: path template
+        :raise ValueError: malformed template or variable which is not a plain name, Ex. '{id', '{0}', '{id!r}'
+        """
+        self.template = template
+        _path, _, _query = template.partition('?')
+        # (literal text, variable name or None)
+        self.segments = _parse(_path, template)
+        # (param name, value segments)
+        self.query = tuple((name, _parse(value, template)) for name, value in _query_items(_query, template))
+        self.variables = frozenset(field for segments in (self.segments, *(value for _, value in self.query))
+                                   for _, field in segments if field is not None)
+
+    def expand(self, args: dict) -> str:
+        """
+        Substitute URL-encoded args (except '/') into template path, query portion is returned by expand_params
+        :param args: template variable values
+        :return: path str
+        :raise MissingPathArgsError: arg of a template variable is not provided
+        """
+        try:
+            return ''.join(literal if field is None else f"{literal}{quote(str(args[field]), safe='/')}"
+                           for literal, field in self.segments)
+        except KeyError:
+            raise MissingPathArgsError(self.template, self.missing(args)) from None
+
+    def expand_params(self, args: dict) -> dict:
+        """
+        Query portion of template as request params
+        :param args: template variable values
+        :return: params dict, values are encoded by the http client
+        :raise MissingPathArgsError: arg of a template variable is not provided
+        """
+        try:
+            return {name: ''.join(literal if field is None else f'{literal}{args[field]}' for literal, field in value)
+                    for name, value in self.query}
+        except KeyError:
+            raise MissingPathArgsError(self.template, self.missing(args)) from None
+
+    def missing(self, args: dict) -> list:
+        return sorted(variable for variable in self.variables if variable not in args)
+
+    def __repr__(self) -> str:
+        return f'PathTemplate({self.template!r})'
+
+
+@lru_cache(maxsize=1024)
+def compile_template(template: str) -> PathTemplate:
+    """
+    Parsed path template, each distinct template is parsed once
+    :param template: path template
+    :return: PathTemplate
+    """
+    return PathTemplate(template)
+
+
+def _parse(text: str, template: str) -> tuple:
+    try:
+        segments = tuple(Formatter().parse(text))
+    except ValueError as e:
+        raise ValueError(f"Invalid endpoint path '{template}', {e}") from None
+    for _, field, spec, conversion in segments:
+        if field is not None and (not field.isidentifier() or spec or conversion):
+            raise ValueError(f"Invalid endpoint path '{template}', variable '{{{field}}}' must be a plain name")
+    return tuple((literal, field) for literal, field, _, _ in segments)
+
+
+def _query_items(query: str, template: str) -> list:
+    items = []
+    for item in filter(None, query.split('&')):
+        name, _, value = item.partition('=')
+        if not name or '{' in name or '}' in name:
+            raise ValueError(f"Invalid endpoint path '{template}', query parameter name '{name}' must be literal")
+        items.append((name, value))
+    return items
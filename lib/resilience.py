@@ -0,0 +1,159 @@
+"""
+Retry policy and per-host circuit breaker used by web_service_client.send_request
+
+Both are configured with the "client" block of the suite/endpoint resource config, Ex.
+    "client": {
+        "retry": {
+            "total": 3,                                 # retries after the first attempt, default 0 (no retry)
+            "backoff_factor": 0.5,                      # jittered exponential backoff: random(0, factor * 2^retry)
+            "max_backoff": 10,                          # cap for backoff and Retry-After waits in seconds
+            "statuses": [429, 502, 503, 504],           # response statuses to retry, connection errors always retry
+            "methods": ["GET", "HEAD", "OPTIONS", "PUT", "DELETE"]   # only idempotent methods are retried
+        },
+        "circuit_breaker": {
+            "failure_threshold": 5,                     # failures in a row opening the circuit, default 0 (off)
+            "reset_timeout": 30                         # seconds before a trial request is let through
+        }
+    }
+A failure for the circuit breaker is a connection error or a 502/503/504 response. While the circuit is open requests
+to that host fail fast with the client error response instead of waiting on their own connect failure.
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from lib.common_namedtuples import HttpResponse, EndPoint
+from lib.session_pool import session_key
+
+RETRY_STATUSES = (429, 502, 503, 504)
+IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE')
+FAILURE_STATUSES = (502, 503, 504)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class CircuitOpenError(ConnectionError):
+    """Request not sent, service host is known to be down"""
+
+
+class RetryPolicy:
+    def __init__(self, total: int = 0, backoff_factor: float = 0.5, max_backoff: float = 10,
+                 statuses: tuple = RETRY_STATUSES, methods: tuple = IDEMPOTENT_METHODS):
+        self.total = total
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.statuses = tuple(statuses)
+        self.methods = tuple(method.upper() for method in methods)
+
+    @classmethod
+    def from_options(cls, options: dict) -> 'RetryPolicy':
+        return cls(**options.get('retry', {}))
+
+    def next_delay(self, endpoint: EndPoint, response: HttpResponse, retries: int) -> Optional[float]:
+        """
+        Seconds to wait before retrying the request
+        :param endpoint: endpoint details
+        :param response: response of the last attempt
+        :param retries: retries done so far
+        :return: delay in seconds, None when the request should not be retried
+        """
+        if retries >= self.total or endpoint.method.upper() not in self.methods:
+            return None
+        if not response.error and response.status not in self.statuses:
+            return None
+        retry_after = _retry_after(response)
+        if retry_after is not None:
+            return min(retry_after, self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_factor * 2 ** retries))
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 0, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        Check whether a request may be sent, an open circuit lets one trial request through after reset_timeout
+        :return: bool
+        """
+        if not self.failure_threshold:
+            return True
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                return True
+            return self.state == CLOSED
+
+    def record(self, response: HttpResponse) -> None:
+        """
+        Update breaker state with request outcome
+        :param response: endpoint response
+        :return: None
+        """
+        if response.error or response.status in FAILURE_STATUSES:
+            self.record_failure()
+            return
+        with self._lock:
+            self.failures = 0
+            self.state = CLOSED
+
+    def record_failure(self) -> None:
+        """
+        Count a failed request, also used when the request raised, so a failed trial request opens the circuit again
+        :return: None
+        """
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.failure_threshold and self.failures >= self.failure_threshold):
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+def circuit_breaker(endpoint: EndPoint) -> CircuitBreaker:
+    """
+    Circuit breaker for endpoint scheme+host, created with the first endpoint's settings
+    :param endpoint: endpoint details
+    :return: CircuitBreaker
+    """
+    key = session_key(endpoint.uri)
+    breaker = _breakers.get(key)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(key, CircuitBreaker(**endpoint.options.get('circuit_breaker', {})))
+    return breaker
+
+
+def reset_circuit_breakers() -> None:
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def _retry_after(response: HttpResponse) -> Optional[float]:
+    """
+    Retry-After header value in seconds, header can be seconds or http date
+    :param response: endpoint response
+    :return: seconds or None
+    """
+    value = (response.headers or {}).get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
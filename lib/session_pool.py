@@ -0,0 +1,83 @@
+"""
+Keep-alive session registry for web_service_client.
+
+One requests.Session is kept per scheme+host (derived from EndPoint.uri), so repeated calls to the same service reuse
+pooled TCP/TLS connections instead of paying a new handshake on every request.
+Pool settings come from the "client" block of the suite (and endpoint) resource config, Ex.
+    "client": {
+        "pool": {
+            "connections": 4,       # number of host pools cached by the adapter
+            "maxsize": 16,          # max connections kept alive per host pool
+            "block": false,         # block when the pool is exhausted instead of opening extra connections
+            "keep_alive": true      # false sends 'Connection: close' and disables connection reuse
+        }
+    }
+The first endpoint that touches a host decides the pool settings for that host.
+"""
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import DEFAULT_POOLSIZE, DEFAULT_POOLBLOCK
+
+from lib.timing import TimedHTTPAdapter
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def session_key(uri: str) -> tuple:
+    """
+    Registry key for uri
+    :param uri: endpoint uri
+    :return: tuple of scheme and host (with port)
+    """
+    parts = urlsplit(uri)
+    return parts.scheme.lower(), parts.netloc.lower()
+
+
+def get_session(uri: str, options: dict = None) -> requests.Session:
+    """
+    Get pooled session for uri host, create it on first use
+    :param uri: endpoint uri
+    :param options: client options from resource config, only 'pool' element is used here
+    :return: requests Session
+    """
+    key = session_key(uri)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _new_session(key[0], (options or {}).get('pool', {}))
+                _sessions[key] = session
+    return session
+
+
+def _new_session(scheme: str, pool: dict) -> requests.Session:
+    """
+    Create session with pooled adapter mounted for the scheme
+    :param scheme: http or https
+    :param pool: pool settings
+    :return: requests Session
+    """
+    session = requests.Session()
+    adapter = TimedHTTPAdapter(pool_connections=pool.get('connections', DEFAULT_POOLSIZE),
+                               pool_maxsize=pool.get('maxsize', DEFAULT_POOLSIZE),
+                               pool_block=pool.get('block', DEFAULT_POOLBLOCK))
+    session.mount(f'{scheme}://', adapter)
+    if not pool.get('keep_alive', True):
+        session.headers['Connection'] = 'close'
+    return session
+
+
+def close_sessions() -> None:
+    """
+    Close all pooled sessions and their connections
+    :return: None
+    """
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.close()
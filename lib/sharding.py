@@ -0,0 +1,208 @@
+"""
+Deterministic sharding of a test run across CI nodes (-sh/--shard INDEX/COUNT) and merging of shard results
+
+Tests are partitioned by test class, so class fixtures run on one node only. Every node discovers the same tests
+(same -s/-a selection) and computes the same partition, each node runs its slice:
+    pytaf>test_launcher.py -e dev -s sanity_suite -sh 1/3          # on node 1, ... -sh 3/3 on node 3
+Classes are assigned by a stable hash of their name, or with a duration history file (-shh/--shard_history, lib.
+duration_history) packed longest-processing-time-first into shards of equal estimated duration. All nodes must use the
+same history file (Ex. restored from CI cache before the run, not the file the run writes to) to compute the same
+partition, the partition digest recorded in the shard results is checked on merge.
+Each shard writes zlogs/shard_results/shard-INDEX-of-COUNT.json, merge them after the run:
+    pytaf>python -m lib.sharding zlogs/shard_results/*.json -o zlogs/merged_results.json
+"""
+import hashlib
+import heapq
+import json
+import os
+import sys
+import time
+import unittest
+from argparse import ArgumentParser
+from collections import OrderedDict, Counter
+
+from lib.duration_history import ERROR, EXPECTED_FAILURE, FAILURE, SKIP, UNEXPECTED_SUCCESS
+from lib.parallel_runner import iter_tests
+
+THIS_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = f'{THIS_DIR_PATH}/../zlogs/shard_results'
+
+HASHED = 'hash'
+DURATION_WEIGHTED = 'duration'
+
+# statuses counted as failed run
+FAILED_STATUSES = (FAILURE, ERROR, UNEXPECTED_SUCCESS)
+# summary line labels of unittest
+_SUMMARY_LABELS = ((FAILURE, 'failures'), (ERROR, 'errors'), (SKIP, 'skipped'),
+                   (EXPECTED_FAILURE, 'expected failures'), (UNEXPECTED_SUCCESS, 'unexpected successes'))
+
+
+def class_id(test) -> str:
+    return f'{type(test).__module__}.{type(test).__qualname__}'
+
+
+def assign_shards(class_ids: list, count: int, durations: dict = None) -> dict:
+    """
+    Partition test classes into shards
+    :param class_ids: test class ids
+    :param count: number of shards
+    :param durations: estimated duration of classes by class id, None for hash-based partition
+    :return: dict of class id to shard index (from 1)
+    """
+    if not durations:
+        return {_id: int(hashlib.sha1(_id.encode()).hexdigest(), 16) % count + 1 for _id in class_ids}
+    # longest-processing-time-first: next longest class goes to the shard with the least estimated duration,
+    # ties are broken by class id and shard index so every node computes the same partition
+    shards = [(0.0, index) for index in range(1, count + 1)]
+    assignment = {}
+    for _id in sorted(class_ids, key=lambda _id: (-durations.get(_id, 0), _id)):
+        load, index = heapq.heappop(shards)
+        assignment[_id] = index
+        heapq.heappush(shards, (load + durations.get(_id, 0), index))
+    return assignment
+
+
+def partition_digest(assignment: dict, strategy: str) -> str:
+    """Digest of a partition, equal on all nodes which computed the same partition"""
+    return hashlib.sha1(json.dumps([strategy, sorted(assignment.items())]).encode()).hexdigest()[:12]
+
+
+def shard_suite(suite: unittest.TestSuite, index: int, count: int, durations: dict = None) -> tuple:
+    """
+    Tests of one shard
+    :param suite: discovered tests, same on every node
+    :param index: shard index from 1
+    :param count: number of shards
+    :param durations: estimated duration of tests by test id, None or empty for hash-based partition
+    :return: tuple of shard TestSuite (tests in suite order) and shard info dict
+    """
+    classes = OrderedDict()
+    for test in iter_tests(suite):
+        classes.setdefault(class_id(test), []).append(test)
+    class_durations = {_id: sum(durations.get(test.id(), 0) for test in tests) for _id, tests in classes.items()} \
+        if durations else None
+    strategy = DURATION_WEIGHTED if durations else HASHED
+    assignment = assign_shards(list(classes), count, class_durations)
+    shard = unittest.TestSuite(test for _id, tests in classes.items() if assignment[_id] == index for test in tests)
+    info = {'index': index, 'count': count, 'strategy': strategy, 'digest': partition_digest(assignment, strategy),
+            'total_tests': sum(len(tests) for tests in classes.values()), 'tests': shard.countTestCases()}
+    if class_durations:
+        info['estimated_duration'] = round(sum(class_durations[_id] for _id in classes if assignment[_id] == index), 3)
+    return shard, info
+
+
+def results_path(index: int, count: int, results_dir: str = RESULTS_DIR) -> str:
+    return os.path.normpath(f'{results_dir}/shard-{index}-of-{count}.json')
+
+
+def write_results(result: unittest.TestResult, info: dict, env: str, path: str = None) -> str:
+    """
+    Write shard results file
+    :param result: TestResult with test_durations (lib.duration_history.DurationsMixin)
+    :param info: shard info from shard_suite
+    :param env: environment
+    :param path: results file path, default under zlogs/shard_results
+    :return: results file path
+    """
+    path = path or results_path(info['index'], info['count'])
+    # a test may have several errors and failures, Ex. of subtests or of a failing test and its tearDown cleanup
+    details = OrderedDict()
+    for test, text in (*result.errors, *result.failures):
+        # subtests are reported under their test
+        details.setdefault(getattr(test, 'test_case', test).id(), []).append(text)
+    tests = [{'id': test_id, 'status': status, 'duration': round(duration, 3),
+              'details': _join_details(details.pop(test_id, None))}
+             for test_id, (status, duration) in result.test_durations.items()]
+    # class and module fixture errors have no test entry
+    tests.extend({'id': test_id, 'status': ERROR, 'duration': 0, 'details': _join_details(texts)}
+                 for test_id, texts in details.items())
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'shard': info, 'environment': env, 'finished_at': time.time(), 'tests': tests}, f, indent=2)
+    return path
+
+
+def _join_details(texts: list):
+    return '\n'.join(texts) if texts else None
+
+
+def merge_results(paths: list) -> dict:
+    """
+    Merge shard results files, shards are checked for the same partition, missing shards and overlapping tests
+    :param paths: results file paths, files which are not shard results (Ex. a merged results file) are skipped
+    :return: merged results dict with summary and problems
+    """
+    shards = []
+    for path in paths:
+        with open(path) as f:
+            results = json.load(f)
+        if not isinstance(results, dict) or 'shard' not in results:
+            print(f"Warning: {path} is not a shard results file, skipped")
+            continue
+        shards.append(results)
+    problems = []
+    counts = {shard['shard']['count'] for shard in shards}
+    digests = {shard['shard']['digest'] for shard in shards}
+    if len(counts) > 1 or len(digests) > 1:
+        problems.append(f"Shards are from different partitions, counts {sorted(counts)}, digests {sorted(digests)}")
+    indexes = Counter(shard['shard']['index'] for shard in shards)
+    for count in counts:
+        missing = sorted(set(range(1, count + 1)) - set(indexes))
+        if missing:
+            problems.append(f"Missing shards {missing} of {count}")
+    duplicated = sorted(index for index, seen in indexes.items() if seen > 1)
+    if duplicated:
+        problems.append(f"Shards {duplicated} are merged more than once")
+    tests = OrderedDict()
+    for shard in sorted(shards, key=lambda shard: shard['shard']['index']):
+        for test in shard['tests']:
+            if test['id'] in tests:
+                problems.append(f"Test {test['id']} ran in more than one shard")
+            tests[test['id']] = {**test, 'shard': shard['shard']['index']}
+    total_tests = {shard['shard']['total_tests'] for shard in shards}
+    ran = sum(shard['shard']['tests'] for shard in shards)
+    if not problems and len(total_tests) == 1 and ran != min(total_tests):
+        problems.append(f"Shards ran {ran} tests, partitioned test set has {min(total_tests)}")
+    statuses = Counter(test['status'] for test in tests.values())
+    return {
+        'environment': sorted({shard['environment'] for shard in shards}),
+        'shards': [shard['shard'] for shard in sorted(shards, key=lambda shard: shard['shard']['index'])],
+        'summary': dict(statuses),
+        'problems': problems,
+        'tests': list(tests.values()),
+    }
+
+
+def format_merged(merged: dict) -> str:
+    """Report of merged results in unittest summary style"""
+    lines = []
+    for test in merged['tests']:
+        if test['status'] in FAILED_STATUSES:
+            lines.extend(['=' * 70, f"{test['status'].upper()}: {test['id']} (shard {test['shard']})", '-' * 70,
+                          (test['details'] or '').rstrip(), ''])
+    summary = merged['summary']
+    failed = any(summary.get(status) for status in FAILED_STATUSES)
+    counts = ', '.join(f'{label}={summary[status]}' for status, label in _SUMMARY_LABELS if summary.get(status))
+    lines.append('-' * 70)
+    lines.append(f"Ran {sum(summary.values())} tests in {len(merged['shards'])} shards")
+    lines.append(f"{'FAILED' if failed else 'OK'}{f' ({counts})' if counts else ''}")
+    lines.extend(f"Warning: {problem}" for problem in merged['problems'])
+    return '\n'.join(lines)
+
+
+def main(argv: list = None) -> int:
+    parser = ArgumentParser(prog='python -m lib.sharding', description='Merge shard results files')
+    parser.add_argument('results', nargs='+', help='shard results files')
+    parser.add_argument('-o', '--output', help='merged results json file')
+    args = parser.parse_args(argv)
+    merged = merge_results(args.results)
+    print(format_merged(merged))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(merged, f, indent=2)
+    failed = any(merged['summary'].get(status) for status in FAILED_STATUSES)
+    return 1 if failed or merged['problems'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
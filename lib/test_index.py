@@ -0,0 +1,245 @@
+"""
+Import-free index of test modules for test discovery (-ts, -s suite selection)
+
+Test modules under test/ are parsed with ast, not imported, into their unittest.TestCase classes with test methods,
+decorators and the @test_data file names the methods reference. Entries are cached per file in
+zlogs/.pytaf_cache/test_index.pickle and re-parsed only when the file mtime or size changes, so listing tests does not
+import any test module (nor lib.get_endpoint and config they pull in) and running tests imports only selected modules.
+Test methods inherited from a base class of another module are not visible to the parser, classes with such bases are
+marked incomplete and their test names are read from the imported class.
+"""
+import ast
+import glob
+import importlib
+import os
+import pickle
+import threading
+import unittest
+from typing import NamedTuple
+
+from lib.config_cache import CACHE_DIR
+
+THIS_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+BASE_PATH = os.path.normpath(f'{THIS_DIR_PATH}/..')
+TEST_DIR = os.path.join(BASE_PATH, 'test')
+INDEX_FILE = f'{CACHE_DIR}/test_index.pickle'
+INDEX_VERSION = 1
+TEST_METHOD_PREFIX = unittest.defaultTestLoader.testMethodPrefix
+
+
+class TestMethodInfo(NamedTuple):
+    name: str
+    line: int
+    decorators: tuple
+    # file_name of @test_data decorators
+    test_data_files: tuple
+
+
+class TestClassInfo(NamedTuple):
+    module: str
+    name: str
+    line: int
+    bases: tuple
+    decorators: tuple
+    # test methods in unittest load order (sorted by name)
+    methods: tuple
+    # False when a base class is defined in another module and may add test methods
+    complete: bool
+
+    @property
+    def id(self) -> str:
+        return f'{self.module}.{self.name}'
+
+    def test_ids(self) -> list:
+        """
+        Test ids of class, classes with bases from other modules are imported to list inherited tests
+        :return: list of module.Class.method
+        """
+        if self.complete:
+            return [f'{self.id}.{method.name}' for method in self.methods]
+        return [f'{self.id}.{name}' for name in unittest.defaultTestLoader.getTestCaseNames(self.load())]
+
+    def load(self) -> type:
+        """Import module and return the test class"""
+        return getattr(importlib.import_module(self.module), self.name)
+
+
+def module_name(file_path: str, base_path: str = BASE_PATH) -> str:
+    """Dotted module name of python file under base_path, Ex. test.company_tasks_svc.test_health_check"""
+    return os.path.splitext(os.path.relpath(file_path, base_path))[0].replace(os.sep, '.').replace('/', '.')
+
+
+def scan_module(source: str, module: str, file_path: str = '<unknown>') -> list:
+    """
+    Test classes of module source
+    :param source: python source
+    :param module: module name
+    :param file_path: file path for syntax errors
+    :return: list of TestClassInfo, classes deriving directly from unittest.TestCase as unittest discovery of launcher
+    :raise SyntaxError: invalid source
+    """
+    tree = ast.parse(source, file_path)
+    classes = {node.name: node for node in tree.body if isinstance(node, ast.ClassDef)}
+    test_classes = []
+    for node in classes.values():
+        if not any(_is_test_case(base) for base in node.bases):
+            continue
+        methods, complete = _class_methods(node, classes, set())
+        test_classes.append(TestClassInfo(
+            module=module, name=node.name, line=node.lineno, bases=tuple(ast.unparse(base) for base in node.bases),
+            decorators=tuple(ast.unparse(decorator) for decorator in node.decorator_list),
+            methods=tuple(sorted(methods.values())), complete=complete))
+    return test_classes
+
+
+def _is_test_case(base: ast.expr) -> bool:
+    return (isinstance(base, ast.Name) and base.id == 'TestCase') or \
+        (isinstance(base, ast.Attribute) and base.attr == 'TestCase')
+
+
+def _class_methods(node: ast.ClassDef, classes: dict, seen: set) -> tuple:
+    """Test methods of class and of its bases defined in the same module, and whether all bases were resolved"""
+    methods = {}
+    complete = True
+    seen.add(node.name)
+    # bases first, methods of the class override them, as with attribute lookup
+    for base in reversed(node.bases):
+        if _is_test_case(base):
+            continue
+        if isinstance(base, ast.Name) and base.id in classes and base.id not in seen:
+            base_methods, base_complete = _class_methods(classes[base.id], classes, seen)
+            methods.update(base_methods)
+            complete = complete and base_complete
+        else:
+            complete = False
+    for item in node.body:
+        if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            names = [item.name]
+            decorators = item.decorator_list
+        elif isinstance(item, ast.Assign):
+            # test_a = test_b = _check, constants (test_x = None) are not test methods
+            names = [target.id for target in item.targets if isinstance(target, ast.Name)]
+            decorators = []
+            if isinstance(item.value, ast.Constant):
+                for name in names:
+                    methods.pop(name, None)
+                continue
+        else:
+            continue
+        for name in names:
+            if name.startswith(TEST_METHOD_PREFIX):
+                methods[name] = TestMethodInfo(
+                    name=name, line=item.lineno, decorators=tuple(ast.unparse(decorator) for decorator in decorators),
+                    test_data_files=tuple(_test_data_files(decorators)))
+            else:
+                methods.pop(name, None)
+    return methods, complete
+
+
+def _test_data_files(decorators: list):
+    for decorator in decorators:
+        if not isinstance(decorator, ast.Call):
+            continue
+        func = decorator.func
+        name = func.id if isinstance(func, ast.Name) else getattr(func, 'attr', None)
+        if name != 'test_data':
+            continue
+        for keyword in decorator.keywords:
+            if keyword.arg == 'file_name' and isinstance(keyword.value, ast.Constant):
+                yield keyword.value.value
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def test_index(test_dir: str = TEST_DIR) -> list:
+    """
+    Test classes of all test modules, in module path and class definition order
+    :param test_dir: tests directory
+    :return: list of TestClassInfo
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = _read_index()
+        test_dir = os.path.abspath(test_dir)
+        files = sorted(glob.iglob(f'{test_dir}/**/*.py', recursive=True))
+        test_classes = []
+        changed = False
+        for file_path in files:
+            _stat = os.stat(file_path)
+            stamp = (_stat.st_mtime_ns, _stat.st_size)
+            entry = _index.get(file_path)
+            if entry is None or entry[0] != stamp:
+                # module names are relative to the parent of test_dir, Ex. test.company_tasks_svc.test_health_check
+                _classes = _scan_file(file_path, os.path.dirname(test_dir))
+                if _classes is None:
+                    continue
+                entry = (stamp, _classes)
+                _index[file_path] = entry
+                changed = True
+            test_classes.extend(entry[1])
+        _files = set(files)
+        removed = [file_path for file_path in _index
+                   if file_path.startswith(f'{test_dir}{os.sep}') and file_path not in _files]
+        for file_path in removed:
+            del _index[file_path]
+            changed = True
+        if changed:
+            _write_index(_index)
+    return test_classes
+
+
+def _scan_file(file_path: str, base_path: str):
+    """Test classes of file, None when the file can not be parsed (not cached, the warning repeats until fixed)"""
+    with open(file_path, 'rb') as f:
+        source = f.read()
+    try:
+        return scan_module(source, module_name(file_path, base_path), file_path)
+    except (SyntaxError, ValueError) as e:
+        print(f"Warning: Test module {file_path} is not indexed, {e}")
+        return None
+
+
+def search_tests(search_text: str, test_dir: str = TEST_DIR) -> list:
+    """
+    Test ids containing search text
+    :param search_text: text to search case-insensitively, '*' for all tests
+    :param test_dir: tests directory
+    :return: list of module.Class.method
+    """
+    search_text = search_text.lower()
+    return [test_id for test_class in test_index(test_dir) for test_id in test_class.test_ids()
+            if search_text == '*' or search_text in test_id.lower()]
+
+
+def tests_using_test_data(file_name: str, test_dir: str = TEST_DIR) -> list:
+    """
+    Test ids of tests decorated with @test_data(file_name=...) of the file
+    :param file_name: test data file name as used in the decorator, Ex. company_tasks_svc/add_company_tasks.json
+    :param test_dir: tests directory
+    :return: list of module.Class.method
+    """
+    return [f'{test_class.id}.{method.name}' for test_class in test_index(test_dir) for method in test_class.methods
+            if file_name in method.test_data_files]
+
+
+def _read_index() -> dict:
+    try:
+        with open(INDEX_FILE, 'rb') as f:
+            version, index = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, ValueError, TypeError, AttributeError):
+        return {}
+    return index if version == INDEX_VERSION else {}
+
+
+def _write_index(index: dict) -> None:
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        tmp_file = f'{INDEX_FILE}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_file, 'wb') as f:
+            pickle.dump((INDEX_VERSION, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, INDEX_FILE)
+    except OSError as e:
+        print(f"Warning: Test index not saved to {INDEX_FILE}, {e}")
@@ -20,11 +20,14 @@ Python Suite configuration structure: this config file contains information requ
 """
 import glob
 import os
+from collections.abc import Mapping
 from functools import lru_cache
 from types import MappingProxyType
 
 from lib.commandline_args import get_args_dict
-from lib.utils import load_data, get_resource_config
+from lib.logger import get_logger
+from lib.path_template import compile_template
+from lib.utils import load_data, get_suite_resource_config, get_suite_names
 
 DATA_DIR = '../test_data/default'
 SUITE_DIR = '../suite'
@@ -39,7 +42,8 @@ def load_suite_config(**command_args) -> MappingProxyType:
     """
     args_dict = command_args if command_args else get_args_dict()
     environment = args_dict.get('environment')
-    overall_cfg_dict = {**args_dict, **get_resource_config(), 'environment': environment}
+    # python suites from resource_config.json, each suite is loaded with its default data on first access
+    overall_cfg_dict = {**args_dict, 'suites': SuiteConfigs(environment), 'environment': environment}
 
     # Gather all tests for test suits (entered from commandline/TAF input)
     # Tests configuration is in <suite_name>.json Ex. sanity_suite.json
@@ -53,18 +57,6 @@ def load_suite_config(**command_args) -> MappingProxyType:
 
     overall_cfg_dict["run_tests"] = run_tests
 
-    # Pull all .json files recursively from test_data/default
-    suite_default_test_data_files = [file for file in
-                                     glob.iglob(f'{CURRENT_DIR_PATH}/{DATA_DIR}/**/*.json', recursive=True)]
-
-    # Get python suites from resource_config.json and pull its default data from test_data/default
-    for suite, data in overall_cfg_dict['suites'].items():
-        suite_env_cfg_file = f"{suite}_{environment}.json"
-        suite_default_test_data_file = [suite_file for suite_file in suite_default_test_data_files
-                                        if suite_env_cfg_file in suite_file]
-        suite_env_cfg_dict = load_data(suite_default_test_data_file[0]) if suite_default_test_data_file else {}
-        overall_cfg_dict['suites'][suite] = {**data, **suite_env_cfg_dict}
-
     # MappingProxyType - Read-only proxy of a mapping. Used to make dictionary immutable.
     return MappingProxyType(overall_cfg_dict)
 
@@ -77,3 +69,65 @@ def _parse_selected_suites(args_dict) -> list:
     """
     suites = args_dict.get('suite')
     return str(suites).split(',') if suites else []
+
+
+class SuiteConfigs(Mapping):
+    """
+    Read-only python suites config, a suite is read from its resource file and merged with its default data from
+    test_data/default (<suite>_<environment>.json) on first access, other suites are not loaded
+    """
+
+    def __init__(self, environment: str):
+        self.environment = environment
+        self._suites = {}
+
+    def __getitem__(self, suite: str) -> dict:
+        _suite = self._suites.get(suite)
+        if _suite is None:
+            data = get_suite_resource_config(suite)
+            if data is None:
+                raise KeyError(suite)
+            _suite = {**data, **_suite_default_data(suite, self.environment)}
+            _check_default_args(suite, _suite)
+            self._suites[suite] = _suite
+        return _suite
+
+    def __iter__(self):
+        return iter(get_suite_names())
+
+    def __len__(self) -> int:
+        return len(get_suite_names())
+
+
+def _suite_default_data(suite: str, environment: str) -> dict:
+    """
+    Suite default data for environment, pulled recursively from test_data/default
+    :param suite: suite name
+    :param environment: environment
+    :return: default data dict
+    """
+    suite_default_test_data_file = glob.glob(f'{CURRENT_DIR_PATH}/{DATA_DIR}/**/*{suite}_{environment}.json',
+                                             recursive=True)
+    return load_data(suite_default_test_data_file[0]) if suite_default_test_data_file else {}
+
+
+def _check_default_args(suite: str, suite_config: dict) -> None:
+    """
+    Log a warning for suite level default args which are not a variable of their endpoint path
+    :param suite: suite name
+    :param suite_config: suite config merged with its default data
+    :return: None
+    """
+    for endpoint_key, endpoint in suite_config.get('endpoints', {}).items():
+        _args = suite_config.get(endpoint_key, {}).get('args', {})
+        if not _args:
+            continue
+        try:
+            variables = compile_template(endpoint.get('path', '')).variables
+        except ValueError:
+            # invalid path is reported when the endpoint suite is loaded
+            continue
+        _unknown = sorted(set(_args) - variables)
+        if _unknown:
+            get_logger().warning(f"Default args {_unknown} of endpoint '{suite}.{endpoint_key}' are not used in its "
+                                 f"path '{endpoint.get('path')}'")
@@ -0,0 +1,161 @@
+"""
+Per-request timing breakdown attached to HttpResponse.timing
+
+    dns       - host name resolution
+    connect   - TCP connect
+    tls       - TLS handshake (https only)
+    ttfb      - request sent until response headers received (server time)
+    download  - response body download
+    total     - whole call
+dns, connect and tls are 0 when a pooled keep-alive connection is reused.
+Connection phases are measured by the urllib3 connection classes installed by TimedHTTPAdapter (see lib.session_pool).
+"""
+import socket
+import threading
+from contextlib import contextmanager
+from time import perf_counter
+
+from requests import Response
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from lib.common_namedtuples import Timing
+
+_local = threading.local()
+
+
+def current_timing() -> dict:
+    """
+    Timing collected for the request running on current thread
+    :return: dict of phases, None when timing is not collected
+    """
+    return getattr(_local, 'timing', None)
+
+
+@contextmanager
+def collect_timing():
+    """
+    Collect timing for requests made inside the block
+    :return: dict of collected phases
+    """
+    previous = current_timing()
+    _local.timing = timing = {}
+    start = perf_counter()
+    try:
+        yield timing
+    finally:
+        timing['total'] = perf_counter() - start
+        _local.timing = previous
+
+
+def record_response(response: Response, body_read: bool = True) -> None:
+    """
+    Add server time and byte counts of response to current timing
+    :param response: requests Response
+    :param body_read: False when the body is not downloaded yet (streamed)
+    :return: None
+    """
+    timing = current_timing()
+    if timing is None:
+        return
+    timing['elapsed'] = response.elapsed.total_seconds()
+    body = response.request.body if response.request is not None else None
+    body = body.encode() if type(body) == str else body
+    timing['request_bytes'] = len(body) if isinstance(body, bytes) else 0
+    if body_read:
+        timing['response_bytes'] = _wire_bytes(response)
+
+
+def record_streamed_bytes(size: int) -> None:
+    timing = current_timing()
+    if timing is not None:
+        timing['response_bytes'] = size
+
+
+def make_timing(timing: dict) -> Timing:
+    """
+    Build Timing record from collected phases
+    :param timing: collected phases
+    :return: Timing
+    """
+    dns = timing.get('dns', 0.0)
+    connect = timing.get('connect', 0.0)
+    tls = timing.get('tls', 0.0)
+    total = timing.get('total', 0.0)
+    elapsed = timing.get('elapsed', total)
+    return Timing(dns=dns, connect=connect, tls=tls,
+                  ttfb=max(elapsed - dns - connect - tls, 0.0),
+                  download=max(total - elapsed, 0.0),
+                  total=total,
+                  request_bytes=timing.get('request_bytes', 0),
+                  response_bytes=timing.get('response_bytes', 0),
+                  reused='connect' not in timing)
+
+
+def _wire_bytes(response: Response) -> int:
+    """Bytes read from the socket (compressed size), falls back to body size"""
+    try:
+        return response.raw.tell()
+    except (AttributeError, OSError, ValueError):
+        return len(response.content)
+
+
+class _TimedConnectionMixin:
+    def _new_conn(self):
+        timing = current_timing()
+        if timing is None:
+            return super()._new_conn()
+        host = self._dns_host
+        start = perf_counter()
+        try:
+            addresses = socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+        except OSError:
+            # let urllib3 raise its usual name resolution error
+            return super()._new_conn()
+        resolved = perf_counter()
+        timing['dns'] = resolved - start
+        # connect to the resolved address, host name is still used for TLS SNI and certificate checks
+        self._dns_host = addresses[0][4][0]
+        try:
+            sock = super()._new_conn()
+        except Exception:
+            if len(addresses) == 1:
+                raise
+            # other addresses of the host (Ex. IPv4 after IPv6) are tried by urllib3 itself
+            self._dns_host = host
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = host
+        timing['connect'] = perf_counter() - resolved
+        return sock
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        timing = current_timing()
+        start = perf_counter()
+        super().connect()
+        if timing is not None:
+            timing['tls'] = max(perf_counter() - start - timing.get('dns', 0.0) - timing.get('connect', 0.0), 0.0)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter which measures dns, connect and tls phases of new connections"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': TimedHTTPConnectionPool,
+                                                   'https': TimedHTTPSConnectionPool}
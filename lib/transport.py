@@ -0,0 +1,229 @@
+"""
+Pluggable transport used by web_service_client.send_request
+
+    live   - send requests to the services (default)
+    record - send requests to the services and save each request/response pair into a cassette file
+    replay - serve responses from cassette files, no network calls
+
+One cassette is kept per test module (Ex. test_data/cassettes/test.company_tasks_svc.test_health_check.json.gz), the
+module is the outermost test module of the calling stack. Interactions are keyed by method, uri, query params and
+normalized request body. When the same request is made several times (Ex. count before and after delete), responses are
+replayed in the recorded order and the last one is repeated afterwards.
+"""
+import base64
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Callable
+from urllib.parse import urlencode
+
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from lib.common_namedtuples import HttpResponse, EndPoint, transaction_id, NO_VALUE
+
+THIS_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
+CASSETTE_DIR = f'{THIS_DIR_PATH}/../test_data/cassettes'
+DEFAULT_CASSETTE = 'default'
+
+LIVE = 'live'
+RECORD = 'record'
+REPLAY = 'replay'
+
+_local = threading.local()
+
+
+class CassetteMissError(LookupError):
+    """Request is not recorded in cassette"""
+
+
+class LiveTransport:
+    """Send request to the service"""
+    mode = LIVE
+
+    def send(self, endpoint: EndPoint, send: Callable[[EndPoint], HttpResponse]) -> HttpResponse:
+        return send(endpoint)
+
+    def close(self) -> None:
+        pass
+
+
+class RecordTransport(LiveTransport):
+    """Send request to the service and record request/response pair in cassette"""
+    mode = RECORD
+
+    def __init__(self, cassette_dir: str = CASSETTE_DIR):
+        self.cassette_dir = cassette_dir
+        self._cassettes = {}
+        self._lock = threading.Lock()
+
+    def send(self, endpoint: EndPoint, send: Callable[[EndPoint], HttpResponse]) -> HttpResponse:
+        response = send(endpoint)
+        # Connection failures have no real response to replay
+        if not response.error:
+            with self._lock:
+                self._cassettes.setdefault(cassette_name(), {}).setdefault(request_key(endpoint), []).append(
+                    _dump_response(response))
+        return response
+
+    def close(self) -> None:
+        """
+        Write recorded cassettes, interactions recorded earlier for other requests of the same module are kept
+        :return: None
+        """
+        os.makedirs(self.cassette_dir, exist_ok=True)
+        with self._lock:
+            for name, interactions in self._cassettes.items():
+                path = cassette_path(name, self.cassette_dir)
+                cassette = {**load_cassette(path), **interactions}
+                with gzip.open(path, 'wt', encoding='utf-8') as f:
+                    json.dump(cassette, f, separators=(',', ':'))
+            self._cassettes.clear()
+
+
+class ReplayTransport(LiveTransport):
+    """Serve recorded responses from cassette without network calls"""
+    mode = REPLAY
+
+    def __init__(self, cassette_dir: str = CASSETTE_DIR):
+        self.cassette_dir = cassette_dir
+        self._cassettes = {}
+        self._played = {}
+        self._lock = threading.Lock()
+
+    def send(self, endpoint: EndPoint, send: Callable[[EndPoint], HttpResponse]) -> HttpResponse:
+        name = cassette_name()
+        key = request_key(endpoint)
+        with self._lock:
+            if name not in self._cassettes:
+                self._cassettes[name] = load_cassette(cassette_path(name, self.cassette_dir))
+            recorded = self._cassettes[name].get(key)
+            if not recorded:
+                raise CassetteMissError(f"'{key}' is not recorded in cassette '{name}'")
+            played = self._played.get((name, key), 0)
+            self._played[(name, key)] = played + 1
+        return _load_response(endpoint, recorded[min(played, len(recorded) - 1)])
+
+    def close(self) -> None:
+        with self._lock:
+            self._cassettes.clear()
+            self._played.clear()
+
+
+_transport = LiveTransport()
+
+
+def get_transport() -> LiveTransport:
+    return _transport
+
+
+def set_transport(transport: LiveTransport) -> None:
+    """
+    Replace the transport used by send_request, previous transport is closed
+    :param transport: transport object
+    :return: None
+    """
+    global _transport
+    _transport.close()
+    _transport = transport
+
+
+def make_transport(mode: str) -> LiveTransport:
+    """
+    Create transport for mode
+    :param mode: live, record or replay
+    :return: transport object
+    """
+    transports = {LIVE: LiveTransport, RECORD: RecordTransport, REPLAY: ReplayTransport}
+    assert mode in transports, f"Invalid transport mode '{mode}', use one of {list(transports)}"
+    return transports[mode]()
+
+
+def cassette_name() -> str:
+    """
+    Cassette name for current request: name bound with use_cassette(), otherwise outermost test module in the call
+    stack, which is the module of the running test also when the request is sent by a shared helper module under test/
+    (Ex. test.company_tasks_svc.endpoint_call_helpers)
+    :return: cassette name
+    """
+    name = getattr(_local, 'cassette', None)
+    if name:
+        return name
+    name = DEFAULT_CASSETTE
+    frame = sys._getframe(1)
+    while frame:
+        module = frame.f_globals.get('__name__', '')
+        if module.startswith('test.'):
+            name = module
+        frame = frame.f_back
+    return name
+
+
+@contextmanager
+def use_cassette(name: str):
+    """
+    Bind cassette name to current thread, used by worker threads which have no test module in their call stack
+    :param name: cassette name
+    """
+    previous = getattr(_local, 'cassette', None)
+    _local.cassette = name
+    try:
+        yield
+    finally:
+        _local.cassette = previous
+
+
+def cassette_path(name: str, cassette_dir: str = CASSETTE_DIR) -> str:
+    return os.path.normpath(f'{cassette_dir}/{name}.json.gz')
+
+
+def load_cassette(path: str) -> dict:
+    """
+    Load cassette file
+    :param path: cassette file path
+    :return: interactions dict, empty when file not exist
+    """
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def request_key(endpoint: EndPoint) -> str:
+    """
+    Cassette key for request: METHOD uri?sorted-params #hash of normalized body
+    :param endpoint: endpoint details
+    :return: key str
+    """
+    query = urlencode(sorted((endpoint.params or {}).items()), doseq=True)
+    body = json.dumps([endpoint.json, endpoint.data], sort_keys=True, default=str)
+    body_hash = hashlib.sha1(body.encode()).hexdigest()[:16]
+    return f"{endpoint.method.upper()} {endpoint.uri}{'?' if query else ''}{query} #{body_hash}"
+
+
+def _dump_response(response: HttpResponse) -> dict:
+    content = response.content
+    try:
+        body, encoding = content.decode('utf-8'), 'utf-8'
+    except UnicodeDecodeError:
+        body, encoding = base64.b64encode(content).decode('ascii'), 'base64'
+    return {'status': response.status, 'headers': dict(response.headers), 'body': body, 'encoding': encoding}
+
+
+def _load_response(endpoint: EndPoint, recorded: dict) -> HttpResponse:
+    body = recorded['body']
+    body = base64.b64decode(body) if recorded['encoding'] == 'base64' else body.encode('utf-8')
+    headers = CaseInsensitiveDict(recorded['headers'])
+    return HttpResponse.from_body(body,
+                                  encoding=get_encoding_from_headers(headers),
+                                  keep_content=endpoint.options.get('keep_content', True),
+                                  env=endpoint.env,
+                                  url=endpoint.uri,
+                                  status=recorded['status'],
+                                  headers=headers,
+                                  transaction_id=headers.get(transaction_id, NO_VALUE))
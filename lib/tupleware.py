@@ -1,23 +1,35 @@
 """ See https://gist.github.com/hangtwenty/5960435#gistcomment-2796890 """
 from collections import OrderedDict, namedtuple
+from functools import lru_cache
 
 
 def tupleware(obj):
     if isinstance(obj, dict):
-        fields = sorted(obj.keys())
-        namedtuple_type = namedtuple(
-            typename='TWare',
-            field_names=fields,
-            rename=True,
-        )
+        fields = tuple(sorted(obj.keys()))
+        namedtuple_type = _tware_type(fields)
         field_value_pairs = OrderedDict(
             (str(field), tupleware(obj[field])) for field in fields)
-        try:
-            return namedtuple_type(**field_value_pairs)
-        except TypeError:
+        if namedtuple_type is None:
             # Cannot create namedtuple instance so fallback to dict (invalid attribute names)
             return dict(**field_value_pairs)
+        return namedtuple_type(**field_value_pairs)
     elif isinstance(obj, (list, set, tuple, frozenset)):
         return [tupleware(item) for item in obj]
     else:
         return obj
+
+
+@lru_cache(maxsize=1024)
+def _tware_type(fields: tuple):
+    """
+    TWare namedtuple class for sorted field names, created once per distinct set of fields
+    :param fields: sorted field names
+    :return: namedtuple class, None when a field is not a valid attribute name
+    """
+    namedtuple_type = namedtuple(
+        typename='TWare',
+        field_names=fields,
+        rename=True,
+    )
+    # renamed fields (Ex. keywords, names with '-') can not be passed as keyword arguments
+    return namedtuple_type if namedtuple_type._fields == tuple(map(str, fields)) else None
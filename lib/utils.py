@@ -1,8 +1,13 @@
 import getpass
 import json
 import os
+import threading
+import time
+from abc import ABC, abstractmethod
 from base64 import b64encode
-from typing import Generator
+from typing import Callable, Generator, Optional
+
+from lib.config_cache import is_source_file, load_json
 
 THIS_DIR_PATH = os.path.dirname(os.path.abspath(__file__))
 CONFIG_DIR = '../config'
@@ -53,14 +58,18 @@ def slice_generator(in_gen: Generator, slice_for: int) -> list:
     return sliced_list
 
 
-def load_data(file_path: str, print_error=False) -> dict:
+def load_data(file_path: str, print_error=False, cached=None) -> dict:
     """
     Load test data from json config files to python dictionary
     :param file_path: file path to read
     :param print_error: boolean, if True print error
+    :param cached: serve unchanged file from compiled config snapshot (see lib.config_cache), default True for files
+    under config, suite and test_data and False for other files
     :return: config dict
     """
     try:
+        if cached or (cached is None and is_source_file(file_path)):
+            return load_json(file_path)
         with open(file_path, 'rb') as f:
             return json.loads(f.read())
     except (OSError, FileNotFoundError):
@@ -74,12 +83,121 @@ def load_data(file_path: str, print_error=False) -> dict:
         return {}
 
 
+class AuthProvider(ABC):
+    """
+    Source of authentication headers appended to every endpoint request, install with set_auth_provider().
+    headers() is called once per request, so it must be cheap: cache the headers and refresh them only when needed.
+    """
+
+    @abstractmethod
+    def headers(self) -> dict:
+        """Authentication headers, do not modify returned dict"""
+
+    def close(self) -> None:
+        pass
+
+
+class FileAuthProvider(AuthProvider):
+    """Headers from auth json file (default config/auth.json), parsed once and re-read only when the file changes"""
+
+    def __init__(self, file_path: str = f'{THIS_DIR_PATH}/{CONFIG_DIR}/{AUTH_CONFIG}'):
+        self.file_path = file_path
+        self._stamp = None
+        self._headers = {}
+        self._lock = threading.Lock()
+
+    def headers(self) -> dict:
+        try:
+            _stat = os.stat(self.file_path)
+            stamp = (_stat.st_mtime_ns, _stat.st_size)
+        except OSError:
+            stamp = None
+        if stamp is None or stamp != self._stamp:
+            with self._lock:
+                if stamp is None or stamp != self._stamp:
+                    # missing file is reported (and exits) by load_data, credentials are kept out of the snapshot
+                    self._headers = load_data(self.file_path, True, cached=False)
+                    self._stamp = stamp
+        return self._headers
+
+
+class TokenAuthProvider(AuthProvider):
+    """
+    Expiring token (Ex. OAuth bearer token) refreshed in a background thread before it expires, so requests never wait
+    for a token refresh unless the token is already expired.
+    fetch_token returns tuple of (headers dict, expires in seconds), Ex. ({'Authorization': 'Bearer xyz'}, 3600)
+    """
+
+    def __init__(self, fetch_token: Callable[[], tuple], refresh_margin: float = 60, retry_interval: float = 5):
+        self.fetch_token = fetch_token
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._headers = {}
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._refresher = None
+
+    def headers(self) -> dict:
+        if time.time() >= self._expires_at:
+            with self._lock:
+                if time.time() >= self._expires_at:
+                    self._refresh()
+        if self._refresher is None:
+            with self._lock:
+                if self._refresher is None:
+                    self._refresher = threading.Thread(target=self._refresh_loop, name='auth-token-refresh',
+                                                       daemon=True)
+                    self._refresher.start()
+        return self._headers
+
+    def close(self) -> None:
+        self._closed.set()
+
+    def _refresh(self) -> None:
+        _headers, expires_in = self.fetch_token()
+        self._headers = dict(_headers)
+        self._expires_at = time.time() + float(expires_in)
+
+    def _refresh_loop(self) -> None:
+        wait = max(self._expires_at - time.time() - self.refresh_margin, 0)
+        while not self._closed.wait(wait):
+            try:
+                with self._lock:
+                    self._refresh()
+                wait = max(self._expires_at - time.time() - self.refresh_margin, self.retry_interval)
+            except Exception as e:
+                # current token stays in use, headers() fetches synchronously once it expires
+                # imported here, lib.logger depends on this module
+                from lib.logger import get_logger
+                get_logger().warning(f"Token refresh failed, retry in {self.retry_interval} seconds, {e}")
+                wait = self.retry_interval
+
+
+_auth_provider = FileAuthProvider()
+
+
+def set_auth_provider(provider: Optional[AuthProvider]) -> None:
+    """
+    Replace source of authentication headers, None restores config/auth.json
+    :param provider: AuthProvider
+    :return: None
+    """
+    global _auth_provider
+    previous, _auth_provider = _auth_provider, provider if provider else FileAuthProvider()
+    previous.close()
+
+
+def get_auth_provider() -> AuthProvider:
+    return _auth_provider
+
+
 def get_auth() -> dict:
     """
-    Get basic authentication key
-    :return: authentication key
+    Get authentication headers from current auth provider (config/auth.json by default), do not modify returned dict
+    :return: authentication headers
     """
-    return load_data(f'{THIS_DIR_PATH}/{CONFIG_DIR}/{AUTH_CONFIG}', True)
+    return _auth_provider.headers()
 
 
 def get_basic_auth_key() -> str:
@@ -99,12 +217,58 @@ def get_resource_config() -> dict:
     :return: resource config
     """
     _suites = {}
-    for suite in load_data(f"{RESOURCE_CONFIGS_DIR}/{RESOURCE_CONFIG}").get('suites'):
-        _suites.update(load_data(f'{RESOURCE_CONFIGS_DIR}/{suite}'))
+    for suite_file in _resource_files():
+        _suites.update(_load_resource_file(suite_file))
 
     return {'suites': _suites}
 
 
+# suite name -> resource file, filled as resource files are loaded
+_suite_files = {}
+
+
+def get_suite_resource_config(suite: str) -> Optional[dict]:
+    """
+    Resource config of one suite, only the resource file containing the suite is loaded.
+    "suites" in resource_config.json is either a list of resource files, scanned in order until the suite is found, or
+    a dict of suite name to resource file, Ex. {"company_tasks_svc": "company_task/company_task_resource_config.json"}
+    :param suite: suite name
+    :return: suite config dict, None when suite is not configured
+    """
+    _files = [_suite_files[suite]] if suite in _suite_files else _resource_files(suite)
+    for suite_file in _files:
+        _suites = _load_resource_file(suite_file)
+        if suite in _suites:
+            return _suites[suite]
+    return None
+
+
+def get_suite_names() -> list:
+    """
+    Names of all configured suites, loads resource files unless resource_config.json maps suite names to files
+    :return: list of suite names
+    """
+    _suites = load_data(f"{RESOURCE_CONFIGS_DIR}/{RESOURCE_CONFIG}").get('suites', [])
+    if type(_suites) == dict:
+        return list(_suites)
+    return [suite for suite_file in _suites for suite in _load_resource_file(suite_file)]
+
+
+def _resource_files(suite: str = None) -> list:
+    """Resource files from resource_config.json, only the file mapped to suite when given and mapping is used"""
+    _suites = load_data(f"{RESOURCE_CONFIGS_DIR}/{RESOURCE_CONFIG}").get('suites', [])
+    if type(_suites) == dict:
+        return ([_suites[suite]] if suite in _suites else []) if suite else list(dict.fromkeys(_suites.values()))
+    return _suites
+
+
+def _load_resource_file(suite_file: str) -> dict:
+    _suites = load_data(f'{RESOURCE_CONFIGS_DIR}/{suite_file}')
+    for suite in _suites:
+        _suite_files.setdefault(suite, suite_file)
+    return _suites
+
+
 def get_logger_config() -> dict:
     """
     Pull logger configs and return as dictionary
@@ -124,7 +288,8 @@ def format_response(response, message: str = None) -> str:
            f"Status Code: {response.status}\n" \
            f"URL: {response.url}\n" \
            f"sec-id: {response.headers.get('sec-id', '')}\n" \
-           f"x-txid: {response.transaction-id}\n" \
+           f"x-txid: {response.transaction_id}\n" \
+           f"Timing: {response.timing}\n" \
            f"Data: {response.data}"
 
 
@@ -1,19 +1,42 @@
 """Web Service Client library"""
+import asyncio
+import atexit
+import hashlib
 import inspect
-import json
+import os
 import sys
-from json import JSONDecodeError
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+from typing import Iterable, Iterator
 
-import requests
 import urllib3
 # Disables warning message in python output
 from requests import Response
+from requests.structures import CaseInsensitiveDict
 
-from lib.common_namedtuples import HttpResponse, EndPoint, transaction-id, NO_VALUE
+from lib.common_namedtuples import HttpResponse, EndPoint, StreamedBody, transaction_id, NO_VALUE
+from lib.deadline import clip_timeout, expired, remaining, DeadlineExceededError
+from lib.http_cache import http_cache, cache_options, cache_key, conditional_headers, vary_names, storable, \
+    CacheEntry, HIT, MISS, MAX_BODY_BYTES
+from lib.session_pool import get_session, session_key
+from lib.timing import collect_timing, record_response, record_streamed_bytes, make_timing
+from lib.resilience import RetryPolicy, CircuitOpenError, circuit_breaker
+from lib.transport import get_transport, cassette_name, use_cassette, CassetteMissError
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 SERVER_ERROR_STATUS = '555'
+ASYNC_MAX_WORKERS = 32
+STREAM_CHUNK_SIZE = 1024 * 1024
+DEFAULT_TIMEOUT = {'connect': 10, 'read': 120}
+
+_async_executor = None
+_async_executor_lock = threading.Lock()
+_stream_temp_files = []
 
 
 def delete(endpoint: EndPoint) -> HttpResponse:
@@ -25,24 +48,28 @@ def delete(endpoint: EndPoint) -> HttpResponse:
     if endpoint.json:
         # Note(requests documentation), the json parameter is ignored if either data or files is passed.
         try:
-            response = requests.delete(
+            response = get_session(endpoint.uri, endpoint.options).delete(
                 endpoint.uri,
                 headers=endpoint.headers,
                 params=endpoint.params,
                 json=endpoint.json,
-                verify=False
+                verify=False,
+                stream=is_streamed(endpoint),
+                timeout=request_timeout(endpoint)
             )
         except Exception as e:
             return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
     else:
         try:
-            response = requests.delete(
+            response = get_session(endpoint.uri, endpoint.options).delete(
                 endpoint.uri,
                 data=endpoint.data,
                 headers=endpoint.headers,
                 params=endpoint.params,
                 files=endpoint.files,
-                verify=False
+                verify=False,
+                stream=is_streamed(endpoint),
+                timeout=request_timeout(endpoint)
             )
         except Exception as e:
             return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
@@ -54,16 +81,26 @@ def get(endpoint: EndPoint) -> HttpResponse:
     :param endpoint: EndPoint object
     :return: HttpResponse object
     """
+    # Conditional request when response is cached (see lib.http_cache)
+    _cache = cache_options(endpoint)
+    _cached = None
+    if _cache is not None:
+        _disk = _cache.get('disk', False)
+        _cached = http_cache.get(cache_key(endpoint, http_cache.vary(cache_key(endpoint), _disk)), disk=_disk)
     try:
-        response = requests.get(
+        response = get_session(endpoint.uri, endpoint.options).get(
             endpoint.uri,
-            headers=endpoint.headers,
+            headers={**endpoint.headers, **conditional_headers(_cached)},
             params=endpoint.params,
-            verify=False
+            verify=False,
+            stream=is_streamed(endpoint),
+            timeout=request_timeout(endpoint)
         )
     except Exception as e:
         return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
 
+    if _cache is not None:
+        return send_cached_response(endpoint, response, _cached)
     return send_response(endpoint, response)
 
 
@@ -75,25 +112,29 @@ def post(endpoint: EndPoint) -> HttpResponse:
     if endpoint.json is not None:
         # Note(requests documentation), the json parameter is ignored if either data or files is passed.
         try:
-            response = requests.post(
+            response = get_session(endpoint.uri, endpoint.options).post(
                 endpoint.uri,
                 headers=endpoint.headers,
                 params=endpoint.params,
                 json=endpoint.json,
-                verify=False
+                verify=False,
+                stream=is_streamed(endpoint),
+                timeout=request_timeout(endpoint)
             )
         except Exception as e:
             return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
 
     else:
         try:
-            response = requests.post(
+            response = get_session(endpoint.uri, endpoint.options).post(
                 endpoint.uri,
                 data=endpoint.data,
                 headers=endpoint.headers,
                 params=endpoint.params,
                 files=endpoint.files,
-                verify=False
+                verify=False,
+                stream=is_streamed(endpoint),
+                timeout=request_timeout(endpoint)
             )
         except Exception as e:
             return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
@@ -109,24 +150,28 @@ def patch(endpoint: EndPoint) -> HttpResponse:
     if endpoint.json:
         # Note(requests documentation), the json parameter is ignored if either data or files is passed.
         try:
-            response = requests.patch(
+            response = get_session(endpoint.uri, endpoint.options).patch(
                 endpoint.uri,
                 headers=endpoint.headers,
                 params=endpoint.params,
                 json=endpoint.json,
-                verify=False
+                verify=False,
+                stream=is_streamed(endpoint),
+                timeout=request_timeout(endpoint)
             )
         except Exception as e:
             return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
     else:
         try:
-            response = requests.patch(
+            response = get_session(endpoint.uri, endpoint.options).patch(
                 endpoint.uri,
                 data=endpoint.data,
                 headers=endpoint.headers,
                 params=endpoint.params,
                 files=endpoint.files,
-                verify=False
+                verify=False,
+                stream=is_streamed(endpoint),
+                timeout=request_timeout(endpoint)
             )
         except Exception as e:
             return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
@@ -141,24 +186,28 @@ def put(endpoint: EndPoint) -> HttpResponse:
     if endpoint.json is not None:
         # Note(requests documentation), the json parameter is ignored if either data or files is passed.
         try:
-            response = requests.put(
+            response = get_session(endpoint.uri, endpoint.options).put(
                 endpoint.uri,
                 headers=endpoint.headers,
                 params=endpoint.params,
                 json=endpoint.json,
-                verify=False
+                verify=False,
+                stream=is_streamed(endpoint),
+                timeout=request_timeout(endpoint)
             )
         except Exception as e:
             return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
     else:
         try:
-            response = requests.put(
+            response = get_session(endpoint.uri, endpoint.options).put(
                 endpoint.uri,
                 data=endpoint.data,
                 headers=endpoint.headers,
                 params=endpoint.params,
                 files=endpoint.files,
-                verify=False
+                verify=False,
+                stream=is_streamed(endpoint),
+                timeout=request_timeout(endpoint)
             )
         except Exception as e:
             return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
@@ -167,32 +216,305 @@ def put(endpoint: EndPoint) -> HttpResponse:
 
 def send_response(endpoint: EndPoint, response: Response) -> HttpResponse:
     """
-    Format response
+    Format response, data is decoded from the raw body on first access.
+    Set "keep_content": false in endpoint client options to drop the raw body once data is decoded.
     :param endpoint: endpoint details
     :param response: response from endpoint call
     :return: HttpResponse
     """
+    record_response(response, body_read=not is_streamed(endpoint))
+    if is_streamed(endpoint):
+        try:
+            body = stream_body(endpoint, response)
+        except Exception as e:
+            return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS,
+                                headers=response.headers, error=e)
+        return HttpResponse.from_file(body,
+                                      encoding=response.encoding,
+                                      env=endpoint.env,
+                                      url=endpoint.uri,
+                                      status=response.status_code,
+                                      headers=response.headers,
+                                      transaction_id=response.headers.get(transaction_id, NO_VALUE)
+                                      )
+    return HttpResponse.from_body(response.content,
+                                  encoding=response.encoding,
+                                  keep_content=endpoint.options.get('keep_content', True),
+                                  env=endpoint.env,
+                                  url=endpoint.uri,
+                                  status=response.status_code,
+                                  headers=response.headers,
+                                  transaction_id=response.headers.get(transaction_id, NO_VALUE)
+                                  )
+
+
+def send_cached_response(endpoint: EndPoint, response: Response, cached: CacheEntry = None) -> HttpResponse:
+    """
+    Format response of cache enabled GET, 304 is served from cached body and new validators are cached
+    :param endpoint: endpoint details
+    :param response: response from endpoint call
+    :param cached: cached entry used for the conditional request
+    :return: HttpResponse with cache hit/miss
+    """
+    if response.status_code == 304 and cached is not None:
+        http_cache.count(HIT)
+        record_response(response)
+        headers = CaseInsensitiveDict({**cached.headers, **response.headers})
+        return HttpResponse.from_body(cached.body,
+                                      encoding=cached.encoding,
+                                      env=endpoint.env,
+                                      url=endpoint.uri,
+                                      status=cached.status,
+                                      headers=headers,
+                                      transaction_id=headers.get(transaction_id, NO_VALUE),
+                                      cache=HIT
+                                      )
+    http_cache.count(MISS)
+    _cache = cache_options(endpoint)
+    etag, last_modified = response.headers.get('ETag'), response.headers.get('Last-Modified')
+    vary = vary_names(response.headers)
+    if response.status_code == 200 and (etag or last_modified) and vary is not None and storable(response.headers) \
+            and len(response.content) <= _cache.get('max_body', MAX_BODY_BYTES):
+        _disk = _cache.get('disk', False)
+        http_cache.set_vary(cache_key(endpoint), vary, disk=_disk)
+        http_cache.put(cache_key(endpoint, vary),
+                       CacheEntry(status=response.status_code, headers=dict(response.headers), body=response.content,
+                                  encoding=response.encoding, etag=etag, last_modified=last_modified),
+                       disk=_disk)
+    return send_response(endpoint, response)._replace(cache=MISS)
+
+
+def request_timeout(endpoint: EndPoint) -> tuple:
+    """
+    Connect and read timeouts from "timeout" client option ({"connect": sec, "read": sec} or sec for both), a timeout
+    missing in the option is the DEFAULT_TIMEOUT one, clipped to the remaining run deadline budget
+    :param endpoint: endpoint details
+    :return: tuple of connect and read timeout
+    """
+    _timeout = endpoint.options.get('timeout', {})
+    if type(_timeout) != dict:
+        _timeout = {'connect': _timeout, 'read': _timeout}
+    _timeout = {**DEFAULT_TIMEOUT, **_timeout}
+    return clip_timeout(_timeout['connect']), clip_timeout(_timeout['read'])
+
+
+def is_streamed(endpoint: EndPoint) -> bool:
+    """
+    True when response body should be streamed to a file, set "stream" in endpoint client options
+    :param endpoint: endpoint details
+    :return: bool
+    """
+    return bool(endpoint.options.get('stream'))
+
+
+def stream_body(endpoint: EndPoint, response: Response) -> StreamedBody:
+    """
+    Write response body to a file chunk by chunk, counting and hashing bytes on the way.
+    "stream" client option is true (temporary file, removed at exit) or a dict with optional elements
+    path (named file, kept), chunk_size (bytes) and algorithm (hashlib name, default sha256)
+    :param endpoint: endpoint details
+    :param response: response opened with stream=True
+    :return: StreamedBody
+    :raise RequestException: connection broken while reading the body, the partial file is removed
+    """
+    _stream = endpoint.options.get('stream')
+    _settings = _stream if type(_stream) == dict else {}
+    _algorithm = _settings.get('algorithm', 'sha256')
+    _digest = hashlib.new(_algorithm)
+    _size = 0
+    if _settings.get('path'):
+        _file = open(_settings.get('path'), 'wb')
+    else:
+        _file = tempfile.NamedTemporaryFile(prefix='pytaf-', suffix='.body', delete=False)
+        _stream_temp_files.append(_file.name)
     try:
-        data = json.loads(response.text)
-    except JSONDecodeError:
-        data = response.text
-    return HttpResponse(env=endpoint.env,
-                        url=endpoint.uri,
-                        status=response.status_code,
-                        headers=response.headers,
-                        data=data,
-                        content=response.content,
-                        transaction-id=response.headers.get(transaction-id, NO_VALUE)
-                        )
+        with _file:
+            for chunk in response.iter_content(chunk_size=_settings.get('chunk_size', STREAM_CHUNK_SIZE)):
+                _digest.update(chunk)
+                _size += len(chunk)
+                _file.write(chunk)
+    except Exception:
+        _remove_file(_file.name)
+        raise
+    finally:
+        response.close()
+    record_streamed_bytes(_size)
+    return StreamedBody(path=_file.name, size=_size, digest=_digest.hexdigest(), algorithm=_algorithm)
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@atexit.register
+def _remove_stream_temp_files() -> None:
+    for path in _stream_temp_files:
+        _remove_file(path)
 
 
 def send_request(endpoint: EndPoint) -> HttpResponse:
+    """
+    Send request through the active transport (live, record or replay, see lib.transport)
+    :param endpoint: endpoint details
+    :return: HttpResponse
+    """
+    try:
+        return get_transport().send(endpoint, call_with_retry)
+    except CassetteMissError as e:
+        return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, error=e)
+
+
+def call_with_retry(endpoint: EndPoint) -> HttpResponse:
+    """
+    Call endpoint with retry policy and host circuit breaker from endpoint client options (see lib.resilience)
+    :param endpoint: endpoint details
+    :return: HttpResponse with retries count and circuit breaker state
+    """
+    policy = RetryPolicy.from_options(endpoint.options)
+    breaker = circuit_breaker(endpoint)
+    retries = 0
+    while True:
+        if expired():
+            return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, retries=retries,
+                                circuit=breaker.state,
+                                error=DeadlineExceededError(f'Request to {endpoint.uri} not sent, '
+                                                            'run deadline exceeded'))
+        if not breaker.allow():
+            return HttpResponse(env=endpoint.env, url=endpoint.uri, status=SERVER_ERROR_STATUS, retries=retries,
+                                circuit=breaker.state,
+                                error=CircuitOpenError(f'Circuit open for {endpoint.uri}, service is not responding'))
+        try:
+            response = call_method(endpoint)
+        except BaseException:
+            breaker.record_failure()
+            raise
+        breaker.record(response)
+        delay = policy.next_delay(endpoint, response, retries)
+        _remaining = remaining()
+        if delay is None or (_remaining is not None and delay >= _remaining):
+            return response._replace(retries=retries, circuit=breaker.state)
+        retries += 1
+        time.sleep(delay)
+
+
+def call_method(endpoint: EndPoint) -> HttpResponse:
     """
     Factory method to call relevant method
     :param endpoint: endpoint details
-    :param method: http method
+    :return: HttpResponse with timing breakdown (see lib.timing)
+    """
+    with collect_timing() as timing:
+        response = _module_functions()[endpoint.method](endpoint)
+    return response._replace(timing=make_timing(timing))
+
+
+@lru_cache()
+def _module_functions() -> dict:
+    return {name: obj for name, obj in inspect.getmembers(sys.modules[__name__]) if inspect.isfunction(obj)}
+
+
+def _send_request_in(cassette: str, endpoint: EndPoint) -> HttpResponse:
+    """
+    send_request for worker threads, bound to the cassette of the thread which queued the request
+    :param cassette: cassette name
+    :param endpoint: endpoint details
     :return: HttpResponse
     """
-    _module_functions = {name: obj for name, obj in inspect.getmembers(sys.modules[__name__])
-                         if inspect.isfunction(obj)}
-    return _module_functions[endpoint.method](endpoint)
+    with use_cassette(cassette):
+        return send_request(endpoint)
+
+
+async def send_request_async(endpoint: EndPoint) -> HttpResponse:
+    """
+    Awaitable send_request, the blocking call runs on a shared worker thread and reuses the pooled sessions
+    :param endpoint: endpoint details
+    :return: HttpResponse
+    """
+    executor = _get_async_executor()
+    return await asyncio.get_running_loop().run_in_executor(executor, _send_request_in, cassette_name(), endpoint)
+
+
+def _get_async_executor() -> ThreadPoolExecutor:
+    """Shared worker threads of send_request_async, created on first use"""
+    global _async_executor
+    with _async_executor_lock:
+        if _async_executor is None:
+            _async_executor = ThreadPoolExecutor(max_workers=ASYNC_MAX_WORKERS, thread_name_prefix='pytaf-async')
+        return _async_executor
+
+
+def close_async_executor() -> None:
+    """
+    Shut down worker threads of send_request_async, waiting for running requests, next call starts new threads
+    :return: None
+    """
+    global _async_executor
+    with _async_executor_lock:
+        executor, _async_executor = _async_executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+
+def send_requests(endpoints: Iterable[EndPoint], max_in_flight: int = 8, per_host: int = None,
+                  ordered: bool = True) -> Iterator[HttpResponse]:
+    """
+    Send many requests on a worker pool, endpoints are consumed lazily so large generators are fine.
+    With per_host, requests to a host with no free slot are held back (up to max_in_flight of them) and submitted when a
+    request to the same host completes, so worker threads keep serving the other hosts.
+    :param endpoints: iterable of EndPoint objects
+    :param max_in_flight: max number of requests running at the same time
+    :param per_host: max number of requests running at the same time against one scheme+host, default no extra cap
+    :param ordered: if True yield responses in input order, otherwise as they complete
+    :return: generator of HttpResponse
+    """
+    cassette = cassette_name()
+    endpoints = iter(endpoints)
+    # [endpoint, future] of requests not yielded yet in input order, future is None until the request is submitted
+    slots = deque()
+    # slots held back until their host has a free slot, by host
+    waiting = {}
+    waiting_count = 0
+    # running future: (slot, host)
+    running = {}
+    host_running = Counter()
+    exhausted = False
+
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='pytaf-batch') as executor:
+
+        def _submit(slot: list, host: tuple) -> None:
+            slot[1] = executor.submit(_send_request_in, cassette, slot[0])
+            running[slot[1]] = (slot, host)
+            host_running[host] += 1
+
+        while True:
+            while not exhausted and len(running) < max_in_flight and waiting_count < max_in_flight and \
+                    (not ordered or len(slots) < 2 * max_in_flight):
+                endpoint = next(endpoints, None)
+                if endpoint is None:
+                    exhausted = True
+                    break
+                slot = [endpoint, None]
+                if ordered:
+                    slots.append(slot)
+                host = session_key(endpoint.uri) if per_host else None
+                if per_host and host_running[host] >= per_host:
+                    waiting.setdefault(host, deque()).append(slot)
+                    waiting_count += 1
+                else:
+                    _submit(slot, host)
+            if not running:
+                return
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                _, host = running.pop(future)
+                host_running[host] -= 1
+                if waiting.get(host):
+                    _submit(waiting[host].popleft(), host)
+                    waiting_count -= 1
+                if not ordered:
+                    yield future.result()
+            while slots and slots[0][1] is not None and slots[0][1].done():
+                yield slots.popleft()[1].result()
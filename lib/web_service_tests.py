@@ -1,3 +1,9 @@
+from lib.json_diff import MAX_DIFFS, json_diff, format_diff
+
+# class attribute set by run_serially, read by the threaded test runner
+SERIAL_ATTR = '_pytaf_run_serially'
+
+
 def add_web_service_tests():
     def assertWebServiceErrorResponse(self, response, code=None, event_type=None, description=None,
                                       resolution=None):
@@ -26,9 +32,36 @@ def add_web_service_tests():
         self.assertIsNotNone(data['timestamp'])
         return data
 
+    def assertJsonEqual(self, expected, actual, msg=None, ignore=(), unordered=(), max_diffs=MAX_DIFFS):
+        """
+        Compare json structures, failure message lists differences by path (see lib.json_diff)
+        :param expected: expected data
+        :param actual: actual data, Ex. response.data
+        :param msg: message added to failure report
+        :param ignore: path patterns excluded from comparison, Ex. ['content[*].trackingData', 'LastViewedDate']
+        :param unordered: path patterns of lists compared order-insensitively, True for all lists
+        :param max_diffs: max differences reported
+        """
+        differences = json_diff(expected, actual, ignore, unordered, max_diffs)
+        if differences:
+            self.fail(self._formatMessage(msg, format_diff(differences, max_diffs)))
+
     def _decorator(cls):
         cls.assertWebServiceErrorResponse = assertWebServiceErrorResponse
         cls.assertWebServiceResponse = assertWebServiceResponse
+        cls.assertJsonEqual = assertJsonEqual
+        return cls
+
+    return _decorator
+
+
+def run_serially():
+    """
+    Opt test class out of concurrent method execution with the thread runner (-th), its test methods run one at a time
+    in suite order, Ex. tests which create, update and delete the same resource
+    """
+    def _decorator(cls):
+        setattr(cls, SERIAL_ATTR, True)
         return cls
 
     return _decorator
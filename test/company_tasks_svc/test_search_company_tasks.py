@@ -1,11 +1,13 @@
 import unittest
 
+from lib import add_web_service_tests
 from lib.manage_test_data import test_data
 from lib.utils import format_response
 from test.company_tasks_svc.endpoint_call_helpers import delete_all_company_tasks, create_company_tasks, \
     search_company_tasks
 
 
+@add_web_service_tests()
 class TestCompanyTasksSvcSearch(unittest.TestCase):
 
     @test_data(file_name="company_tasks_svc/search_company_tasks.json")
@@ -54,33 +56,31 @@ class TestCompanyTasksSvcSearch(unittest.TestCase):
 
         # Confirm Search by companyid returns upto 10 matches by default
         expected_task_list = test_tasks_list
+        # trackingData is not a search criteria, drop it from tasks used to build expected search results
         for each_task in expected_task_list:
             each_task.pop('trackingData')
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[0:10],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[0:10], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Confirm Search (by companyid) can return a second page of tasks
         search_page2 = {"pageRequest": {"page": 1}}
         # Call getCompanyTasks endpoint
         search_response = search_company_tasks({**required_search_args, **search_page2}, **td_endpoint_inputs)
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[10:20],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[10:20], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Confirm Search by companyid can return all tasks
         search_all = {"pageRequest": {"size": len(test_tasks_list)}}
         # Call getCompanyTasks endpoint
         search_response = search_company_tasks({**required_search_args, **search_all}, **td_endpoint_inputs)
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list,
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list, actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Search by ID
         ids = [test_task['id'] for test_task in test_tasks_list]
@@ -90,10 +90,9 @@ class TestCompanyTasksSvcSearch(unittest.TestCase):
         # Confirm Search by id returns expected tasks
         expected_task_list = self._search_list_of_tasks({**required_search_args, **search_id}, *test_tasks_list)
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[0:10],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[0:10], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Search by category
         # Get list of unique Categories
@@ -105,10 +104,9 @@ class TestCompanyTasksSvcSearch(unittest.TestCase):
 
         # Confirm Search by category returns expected tasks
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[0:10],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[0:10], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Search by type
         # Get list of unique types
@@ -120,10 +118,9 @@ class TestCompanyTasksSvcSearch(unittest.TestCase):
 
         # Confirm Search by type returns expected tasks
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[0:10],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[0:10], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Search by status
         # Get list of unique statuses
@@ -135,10 +132,9 @@ class TestCompanyTasksSvcSearch(unittest.TestCase):
 
         # Confirm Search by status returns expected tasks
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[0:10],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[0:10], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Search by advSecGuid
         # Get list of unique advSecGuids
@@ -155,10 +151,9 @@ class TestCompanyTasksSvcSearch(unittest.TestCase):
 
         # Confirm Search by advSecGuid returns expected tasks
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[0:10],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[0:10], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Search by ueid
         # Get list of unique advSecGuids
@@ -174,10 +169,9 @@ class TestCompanyTasksSvcSearch(unittest.TestCase):
         search_response = search_company_tasks({**required_search_args, **search_ueid}, **td_endpoint_inputs)
         # Confirm Search by ueid returns expected tasks
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[0:10],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[0:10], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Search by multiple elements
         search_type = {'types': ['bank_info', 'business_info']}
@@ -190,10 +184,9 @@ class TestCompanyTasksSvcSearch(unittest.TestCase):
 
         # Confirm Search by ueid returns expected tasks
         actual_task_list = search_response.data['content']
-        for each_task in actual_task_list:
-            each_task.pop('trackingData')
-        self.assertListEqual(actual_task_list, expected_task_list[0:10],
-                             format_response(search_response, ' Test Failed! Unexpected Response Data.'))
+        self.assertJsonEqual(expected_task_list[0:10], actual_task_list,
+                             format_response(search_response, ' Test Failed! Unexpected Response Data.'),
+                             ignore=['[*].trackingData'])
 
         # Clean up
         delete_all_company_tasks(companyid, **td_endpoint_inputs)
@@ -1,11 +1,12 @@
 import unittest
 
-from lib import logger
+from lib import logger, add_web_service_tests
 from lib.get_endpoint import endpoints, call_endpoint
 from lib.manage_test_data import test_data, get_expected_response
 from lib.utils import format_response
 
 
+@add_web_service_tests()
 class TestSfdcDataFeed(unittest.TestCase):
     @test_data(file_name="sfdc_svc/sfdc_datafeed/get_sfdc_datafeed.json")
     def test_get_sfdc_datafeed_success(self, **file_test_data):
@@ -24,10 +25,8 @@ class TestSfdcDataFeed(unittest.TestCase):
         # Verify endpoint response
         self.assertEqual(expected_status, response.status,
                          format_response(response, 'Test Failed! Unexpected Response Status.'))
-        actual_result = response.data
-        # Remove uncertain fields from response
-        del actual_result['LastViewedDate']
-        del actual_result['LastReferencedDate']
         expected_result = get_expected_response(expected_res='expected_content', **file_test_data)
-        self.assertDictEqual(expected_result, actual_result,
-                             format_response(response, "Test Failed! Unexpected Response."))
+        # Ignore uncertain fields of response
+        self.assertJsonEqual(expected_result, response.data,
+                             format_response(response, "Test Failed! Unexpected Response."),
+                             ignore=['LastViewedDate', 'LastReferencedDate'])
@@ -1,14 +1,26 @@
-import glob
-import importlib
+import faulthandler
+import os
 import sys
+import threading
 import unittest
-from os.path import dirname, normpath
 from unittest import TextTestRunner
 
+from lib.deadline import set_deadline
+from lib.duration_history import HistoryTestResult, estimate_durations, load_durations, record_durations
+from lib.http_cache import cache_stats
+from lib.parallel_runner import ParallelSuite, ReplayTestResult, ThreadedSuite, iter_tests
+from lib.session_pool import close_sessions
+from lib.sharding import shard_suite, write_results
+from lib.test_index import search_tests, test_index
 from lib.test_suite_config import load_suite_config, get_args_dict
+from lib.transport import REPLAY, set_transport, make_transport, get_transport
 from lib.utils import trace
+from lib.web_service_client import close_async_executor
 
-BASE_PATH = dirname(__file__)
+# Time given to the running test to finish after the run deadline before the launcher is stopped
+DEADLINE_GRACE_SECONDS = 60
+# Time given to the stop watchdog (saving recorded cassettes) before faulthandler exits the launcher
+HARD_EXIT_GRACE_SECONDS = 30
 
 
 def find_test_classes(suite_config) -> unittest.TestSuite:
@@ -29,19 +41,21 @@ def find_test_classes(suite_config) -> unittest.TestSuite:
             raise AttributeError("Add mandatory element 'module' or remove empty '{}' configuration block")
         run_classes[module_tuple.get('module')] = module_tuple.get('classes', '')
 
-    # find and import test modules
-    find_and_import_modules(run_modules)
-
     # Add all run_tests configured in the suite configuration file Ex. sanity_suite.json
+    # test classes are found in the test index, only modules of selected classes are imported
     suite = unittest.TestSuite()
-    for _class in unittest.TestCase.__subclasses__():
-        if _class.__module__.startswith('test.'):
-            class_tuples = run_classes.get(_class.__module__, [])
-            # When classes element is empty or not present add all tests in the module
-            if not class_tuples:
-                suite.addTests(unittest.defaultTestLoader.loadTestsFromTestCase(_class))
-            # Add listed tests for configured classes
-            add_configured_test_methods(_class, class_tuples, suite)
+    for test_class in test_index():
+        if run_modules and test_class.module not in run_modules:
+            continue
+        class_tuples = run_classes.get(test_class.module, [])
+        if class_tuples and test_class.name not in [class_tuple.get('test_class') for class_tuple in class_tuples]:
+            continue
+        _class = test_class.load()
+        # When classes element is empty or not present add all tests in the module
+        if not class_tuples:
+            suite.addTests(unittest.defaultTestLoader.loadTestsFromTestCase(_class))
+        # Add listed tests for configured classes
+        add_configured_test_methods(_class, class_tuples, suite)
 
     return suite
 
@@ -66,37 +80,17 @@ def add_configured_test_methods(_class, class_tuples, suite) -> None:
                     f"{_class.__module__}.{_class.__name__}.{test_method}"))
 
 
-def find_and_import_modules(run_modules) -> None:
-    """
-    Find expected test modules to run and import using importlib
-    :param run_modules:
-    :return:
-    """
-    tests_directory_path = normpath(f'{BASE_PATH}/test')
-    for filename in glob.iglob(f'{tests_directory_path}/**/*.py', recursive=True):
-        filename = normpath(filename).replace('.py', '').replace('\\', '.').replace("/", '.')
-        module_name = filename[filename.find('.test.') + 1:]
-        if not run_modules or module_name in run_modules:
-            importlib.import_module(module_name)
-
-
 @trace(text='Searching tests')
 def tests_list(search_text) -> list:
     """
     return searched list for input text, if search_text is * then return all tests from python "test" suite
+    test modules are not imported, tests are listed from the test index
     :param search_text:
     :return: tests list
     """
-    tests = []
-    find_and_import_modules([])
-    for _class in unittest.TestCase.__subclasses__():
-        if _class.__module__.startswith('test.'):
-            for test_method in unittest.defaultTestLoader.loadTestsFromTestCase(_class):
-                test_method = test_method.__str__()[:test_method.__str__().find('(')]
-                test_method = f"{_class.__module__}.{_class.__name__}.{test_method.strip()}"
-                if '*' == search_text or search_text.lower() in test_method.lower():
-                    print(test_method)
-                    tests.append(test_method)
+    tests = search_tests(search_text)
+    for test_method in tests:
+        print(test_method)
     return tests
 
 
@@ -113,20 +107,30 @@ def add_tests_to_suite(add_tests: list) -> unittest.TestSuite:
 
 
 @trace(text="Running Tests")
-def test_runner(suite):
+def test_runner(suite, workers: int = 1, transport_mode: str = None, threads: int = 1,
+                environment: str = None) -> unittest.TestResult:
     """
     Test Runner
     :param suite:
-    :return:
+    :param workers: number of worker processes, test classes are distributed across workers when more than 1
+    :param transport_mode: transport mode of worker processes
+    :param threads: number of threads, test methods run concurrently in this process when more than 1
+    :param environment: environment of duration history, parallel runs start the longest tests first
+    :return: TestResult, test_durations of the result are the durations of this run
     """
     # verbosity=2 unittest will print the result of each test run.
-    TextTestRunner(stream=sys.stdout, verbosity=2).run(suite)
+    if workers > 1 or threads > 1:
+        durations = estimate_durations([test.id() for test in iter_tests(suite)], environment)
+        parallel_suite = ParallelSuite(suite, workers, transport_mode, durations) if workers > 1 \
+            else ThreadedSuite(suite, threads, durations)
+        return TextTestRunner(stream=sys.stdout, verbosity=2, resultclass=ReplayTestResult).run(parallel_suite)
+    return TextTestRunner(stream=sys.stdout, verbosity=2, resultclass=HistoryTestResult).run(suite)
 
 
-def run_test_suite() -> None:
+def run_test_suite() -> unittest.TestResult:
     """
     Run whole test suite
-    :return: None
+    :return: TestResult of the run
     """
     # note that command line arguments are parsed within test_suite_config module
     args_dict = get_args_dict()
@@ -145,8 +149,70 @@ def run_test_suite() -> None:
         # run tests configured in config file/s Ex. sanity_suite.json
         suite = find_test_classes(suite_config)
 
+    shard = args_dict.get('shard')
+    if shard:
+        # run one slice, the partition is duration-weighted with the given history, which all nodes must share
+        environment, history = args_dict.get('environment'), args_dict.get('shard_history')
+        known = load_durations(environment, history) if history else None
+        durations = estimate_durations([test.id() for test in iter_tests(suite)], environment, known=known) \
+            if known else None
+        if history and not durations:
+            print(f"Warning: No {environment} durations in shard history {history}, using hash partition")
+        suite, shard_info = shard_suite(suite, *shard, durations=durations)
+        print(f"Shard {shard[0]}/{shard[1]} ({shard_info['strategy']} partition {shard_info['digest']}): "
+              f"{shard_info['tests']} of {shard_info['total_tests']} tests")
+
     print('\n')
-    test_runner(suite)
+    set_transport(make_transport(args_dict.get('transport_mode')))
+    deadline = args_dict.get('deadline')
+    if deadline:
+        set_deadline(deadline)
+        # Last resort when a test hangs outside of http calls
+        watchdog = stop_after(deadline + DEADLINE_GRACE_SECONDS)
+    try:
+        result = test_runner(suite, args_dict.get('workers') or 1, args_dict.get('transport_mode'),
+                             args_dict.get('threads') or 1, args_dict.get('environment'))
+        if args_dict.get('transport_mode') != REPLAY:
+            # replayed responses take no network time, their durations would skew the estimates of live runs
+            record_durations(result.test_durations, args_dict.get('environment'))
+        if shard:
+            print(f"Shard results: {write_results(result, shard_info, args_dict.get('environment'))}")
+        stats = cache_stats()
+        if any(stats.values()):
+            # counters of this process, workers of -j runs keep their own
+            print(f"HTTP cache: {stats['hits']} hits, {stats['misses']} misses, {stats['stores']} stores")
+    finally:
+        # Save recorded cassettes and release keep-alive connections pooled per service host
+        close_async_executor()
+        get_transport().close()
+        close_sessions()
+        if deadline:
+            watchdog.cancel()
+            faulthandler.cancel_dump_traceback_later()
+    return result
+
+
+def stop_after(seconds: float) -> threading.Timer:
+    """
+    Start watchdog which dumps all thread stacks, saves cassettes recorded by this process (-tm record) and exits the
+    launcher after seconds. When the watchdog thread can not run (Ex. a hang holding the GIL), faulthandler dumps the
+    stacks and exits HARD_EXIT_GRACE_SECONDS later, cassettes recorded in this run are then lost.
+    :param seconds: seconds from now
+    :return: watchdog timer, cancel it when the run ends
+    """
+    def _stop() -> None:
+        print(f"Warning: Tests are still running {DEADLINE_GRACE_SECONDS} seconds after the run deadline, "
+              "launcher is stopped")
+        sys.stdout.flush()
+        faulthandler.dump_traceback(all_threads=True)
+        get_transport().close()
+        os._exit(1)
+
+    watchdog = threading.Timer(seconds, _stop)
+    watchdog.daemon = True
+    watchdog.start()
+    faulthandler.dump_traceback_later(seconds + HARD_EXIT_GRACE_SECONDS, exit=True)
+    return watchdog
 
 
 """
@@ -155,4 +221,5 @@ client=pytaf>python -m test_launcher -e <environment> -s <suite>
 -e optional/default value is dev, -s optional/default value is all suits
 """
 if __name__ == '__main__':
-    run_test_suite()
+    # non-zero exit status fails CI jobs when a test fails or errors
+    sys.exit(0 if run_test_suite().wasSuccessful() else 1)
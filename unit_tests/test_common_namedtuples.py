@@ -0,0 +1,50 @@
+"""Unit tests of lib.common_namedtuples"""
+import unittest
+
+from lib.common_namedtuples import HttpResponse, decode_body
+
+
+class DecodeBodyTest(unittest.TestCase):
+
+    def test_json_without_charset(self):
+        self.assertEqual({'name': 'café'}, decode_body('{"name": "café"}'.encode('utf-8')))
+        self.assertEqual({'name': 'café'}, decode_body('{"name": "café"}'.encode('utf-16')))
+
+    def test_json_in_declared_charset(self):
+        self.assertEqual({'name': 'café'}, decode_body('{"name": "café"}'.encode('cp1252'), 'windows-1252'))
+        self.assertEqual({'name': 'café'}, decode_body('{"name": "café"}'.encode('utf-8'), 'UTF-8'))
+
+    def test_text_in_declared_charset(self):
+        self.assertEqual('café', decode_body('café'.encode('latin-1'), 'ISO-8859-1'))
+
+    def test_text_without_charset_is_guessed(self):
+        self.assertEqual('café', decode_body('café'.encode('utf-8')))
+
+    def test_unknown_charset(self):
+        self.assertEqual('plain', decode_body(b'plain', 'no-such-charset'))
+
+
+class HttpResponseTest(unittest.TestCase):
+
+    def test_lazy_data(self):
+        response = HttpResponse.from_body(b'{"id": 1}', env='unit', url='http://host/tasks', status=200)
+        self.assertEqual({'id': 1}, response.data)
+        self.assertEqual(b'{"id": 1}', response.content)
+
+    def test_getitem(self):
+        response = HttpResponse.from_body(b'{"id": 1}', env='unit', url='http://host/tasks', status=200)
+        self.assertEqual(200, response[2])
+        self.assertEqual(('unit', 'http://host/tasks'), response[:2])
+        self.assertNotIn('_data', response.__dict__)
+        self.assertEqual({'id': 1}, response[4])
+        self.assertEqual(response.cache, response[-1])
+
+    def test_replace_keeps_lazy_body(self):
+        response = HttpResponse.from_body(b'[1, 2]', env='unit', url='http://host/tasks', status=200)
+        response = response._replace(retries=2)
+        self.assertEqual(2, response.retries)
+        self.assertEqual([1, 2], response.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,36 @@
+"""Unit tests of lib.config_cache snapshot scope"""
+import json
+import os
+import tempfile
+import unittest
+
+from lib import config_cache
+from lib.config_cache import is_source_file
+from lib.utils import RESOURCE_CONFIGS_DIR, RESOURCE_CONFIG, load_data
+
+
+class ConfigSnapshotTest(unittest.TestCase):
+
+    def test_source_files(self):
+        self.assertTrue(is_source_file(f'{RESOURCE_CONFIGS_DIR}/{RESOURCE_CONFIG}'))
+        self.assertTrue(is_source_file(f'{config_cache.THIS_DIR_PATH}/../test_data/default/x.json'))
+        self.assertFalse(is_source_file(f'{config_cache.THIS_DIR_PATH}/../test_data_external/x.json'))
+        self.assertFalse(is_source_file(os.path.join(tempfile.gettempdir(), 'x.json')))
+
+    def test_config_file_is_snapshotted(self):
+        load_data(f'{RESOURCE_CONFIGS_DIR}/{RESOURCE_CONFIG}')
+        self.assertIn(os.path.abspath(f'{RESOURCE_CONFIGS_DIR}/{RESOURCE_CONFIG}'), config_cache._snapshot())
+
+    def test_external_file_is_not_snapshotted_by_default(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'external_test_data.json')
+            with open(file_path, 'w') as f:
+                json.dump({'dev': {'companyid': 1}}, f)
+            self.assertEqual({'dev': {'companyid': 1}}, load_data(file_path))
+            self.assertNotIn(os.path.abspath(file_path), config_cache._snapshot())
+            load_data(file_path, cached=True)
+            self.assertIn(os.path.abspath(file_path), config_cache._snapshot())
+
+
+if __name__ == '__main__':
+    unittest.main()
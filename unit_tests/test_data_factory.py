@@ -0,0 +1,64 @@
+"""Unit tests of lib.data_factory and of the generate company tasks utility batching"""
+import unittest
+from unittest import mock
+
+from lib.data_factory import DataFactory
+from utilities import generate_company_tasks
+
+SPEC = {
+    'seed': 7,
+    'count': 5,
+    'template': {
+        'companyid': {'$arg': 'companyid'},
+        'status': {'$choice': ['CREATED', 'COMPLETED'], '$weights': [3, 1]},
+        'externalId': {'$format': 'EXT{seq:03d}'},
+        'details': {'note': {'$optional': 0.5, '$value': 'generated'}}
+    }
+}
+
+
+class DataFactoryTest(unittest.TestCase):
+
+    def test_same_seed_same_records(self):
+        records = list(DataFactory.from_spec(SPEC, args={'companyid': 'c1'}).records())
+        self.assertEqual(records, list(DataFactory.from_spec(SPEC, args={'companyid': 'c1'}).records()))
+        self.assertEqual(['EXT000', 'EXT001', 'EXT002', 'EXT003', 'EXT004'], [r['externalId'] for r in records])
+        self.assertEqual({'c1'}, {r['companyid'] for r in records})
+
+    def test_overrides(self):
+        factory = DataFactory.from_spec({**SPEC, 'batch_size': 2}, args={'companyid': 'c1'}, count=None, batch_size=3)
+        self.assertEqual(5, factory.count)
+        self.assertEqual([3, 2], [len(batch) for batch in factory.batches()])
+
+    def test_missing_arg(self):
+        with self.assertRaises(KeyError):
+            list(DataFactory.from_spec(SPEC).records())
+
+    def test_invalid_directive(self):
+        with self.assertRaises(ValueError):
+            DataFactory({'status': {'$choice': ['A', 'B'], '$weights': [1]}})
+
+
+class GenerateCompanyTasksTest(unittest.TestCase):
+
+    def _batch_sizes(self, command_args: dict) -> list:
+        batches = []
+
+        def _call_endpoints(calls, max_in_flight=None):
+            for _, endpoint_inputs in calls:
+                batches.append(len(endpoint_inputs['json']))
+                yield mock.Mock(status=200, data={'content': endpoint_inputs['json']})
+
+        with mock.patch.object(generate_company_tasks, 'call_endpoints', _call_endpoints), \
+                mock.patch('builtins.print'):
+            generate_company_tasks.generate_tasks({'companyid': 'c1', 'ueid': 'u1', 'count': 250, **command_args})
+        return batches
+
+    def test_batch_size_from_endpoint_limit(self):
+        self.assertEqual([100, 100, 50], self._batch_sizes({}))
+
+    def test_batch_size_capped_at_endpoint_limit(self):
+        self.assertEqual([100, 100, 50], self._batch_sizes({'batch_size': 500}))
+
+    def test_smaller_batch_size(self):
+        self.assertEqual([80, 80, 80, 10], self._batch_sizes({'batch_size': 80}))
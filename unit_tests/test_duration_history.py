@@ -0,0 +1,83 @@
+"""Unit tests of lib.duration_history"""
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import duration_history
+from lib.duration_history import (DEFAULT_DURATION, ERROR, FAILURE, SKIP, SUCCESS, HistoryTestResult,
+                                  estimate_durations, load_durations, record_durations)
+
+
+class DurationHistoryTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.history_file = os.path.join(directory.name, 'history', 'durations.sqlite3')
+
+    def test_no_history(self):
+        self.assertEqual({}, load_durations('dev', self.history_file))
+        self.assertEqual({'a': DEFAULT_DURATION}, estimate_durations(['a'], 'dev', self.history_file))
+
+    def test_estimate_is_mean_of_last_runs(self):
+        for finished_at, duration in enumerate((10.0, 1.0, 2.0, 3.0, 4.0, 5.0)):
+            with mock.patch('time.time', return_value=finished_at):
+                record_durations({'a': (SUCCESS, duration)}, 'dev', self.history_file)
+        # the 5 latest runs
+        self.assertEqual({'a': 3.0}, load_durations('dev', self.history_file))
+
+    def test_errors_and_skips_are_not_estimated(self):
+        record_durations({'a': (SUCCESS, 4.0), 'b': (SKIP, 0.0)}, 'dev', self.history_file)
+        record_durations({'a': (ERROR, 0.1), 'b': (SKIP, 0.2)}, 'dev', self.history_file)
+        # runs without a representative duration are used only when a test has no other runs
+        self.assertEqual({'a': 4.0, 'b': 0.1}, load_durations('dev', self.history_file))
+
+    def test_per_environment(self):
+        record_durations({'a': (SUCCESS, 1.0)}, 'dev', self.history_file)
+        record_durations({'a': (SUCCESS, 3.0)}, 'qa', self.history_file)
+        self.assertEqual({'a': 3.0}, load_durations('qa', self.history_file))
+
+    def test_unknown_tests_get_median(self):
+        record_durations({'a': (SUCCESS, 1.0), 'b': (SUCCESS, 2.0), 'c': (SUCCESS, 9.0)}, 'dev', self.history_file)
+        self.assertEqual({'a': 1.0, 'x': 2.0}, estimate_durations(['a', 'x'], 'dev', self.history_file))
+
+    def test_old_runs_are_removed(self):
+        with mock.patch.object(duration_history, 'KEEP_RUNS', 2):
+            for finished_at in range(4):
+                with mock.patch('time.time', return_value=finished_at):
+                    record_durations({'a': (SUCCESS, float(finished_at))}, 'dev', self.history_file)
+        self.assertEqual({'a': 2.5}, load_durations('dev', self.history_file))
+
+
+class Classes:
+    """Test classes run to collect durations, nested so unittest discovery does not run them"""
+
+    class Outcomes(unittest.TestCase):
+
+        def test_failure(self):
+            self.fail('failed')
+
+        def test_skip(self):
+            self.skipTest('skipped')
+
+        def test_subtest(self):
+            with self.subTest(1):
+                raise RuntimeError('error')
+            with self.subTest(2):
+                self.fail('failed')
+
+        def test_success(self):
+            pass
+
+
+class DurationsMixinTest(unittest.TestCase):
+
+    def test_statuses(self):
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(Classes.Outcomes)
+        result = unittest.TextTestRunner(stream=io.StringIO(), resultclass=HistoryTestResult).run(suite)
+        statuses = {test_id.rsplit('.', 1)[1]: status for test_id, (status, _) in result.test_durations.items()}
+        # first failure of a test with subtests decides its status
+        self.assertEqual({'test_failure': FAILURE, 'test_skip': SKIP, 'test_subtest': ERROR, 'test_success': SUCCESS},
+                         statuses)
@@ -0,0 +1,108 @@
+"""Unit tests of lazy loading of endpoint suites (lib.get_endpoint.EndpointRegistry, SuiteConfigs, resource files)"""
+import copy
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import get_endpoint, test_suite_config, utils
+from lib.get_endpoint import EndpointRegistry
+from lib.test_suite_config import SuiteConfigs
+
+SUITE = {
+    'baseurl': 'https://tasks.{environment}.com',
+    'endpoints': {
+        'health': {'path': '/manage/health'},
+        'createTasks': {'method': 'POST', 'path': '/api/companies/{companyid}'},
+    },
+}
+
+
+class EndpointRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        patch = mock.patch.object(get_endpoint, 'get_suite_resource_config',
+                                  side_effect=lambda suite: copy.deepcopy(SUITE) if suite == 'tasks_svc' else None)
+        self.get_suite_resource_config = patch.start()
+        self.addCleanup(patch.stop)
+        self.registry = EndpointRegistry()
+
+    def test_suite_is_loaded_on_first_access(self):
+        self.get_suite_resource_config.assert_not_called()
+        health = self.registry.tasks_svc.health
+        self.assertEqual(('tasks_svc', 'health', 'GET', 'https://tasks.{environment}.com/manage/health'),
+                         (health.suite, health.endpoint, health.method, health.path))
+        self.assertEqual('POST', self.registry.tasks_svc.createTasks.method)
+        self.get_suite_resource_config.assert_called_once_with('tasks_svc')
+
+    def test_unknown_suite(self):
+        with self.assertRaises(AttributeError):
+            self.registry.orders_svc
+        # special names (Ex. copy, pickle and mock probing) never load a suite
+        self.assertFalse(hasattr(self.registry, '__wrapped__'))
+        self.get_suite_resource_config.assert_called_once_with('orders_svc')
+
+
+class SuiteConfigsTest(unittest.TestCase):
+
+    def setUp(self):
+        patches = (mock.patch.object(test_suite_config, 'get_suite_resource_config',
+                                     side_effect=lambda suite: dict(SUITE) if suite == 'tasks_svc' else None),
+                   mock.patch.object(test_suite_config, '_suite_default_data',
+                                     return_value={'createTasks': {'args': {'companyid': 'c1'}}}),
+                   mock.patch.object(test_suite_config, 'get_suite_names', return_value=['tasks_svc', 'kyc_svc']))
+        self.get_suite_resource_config, self.suite_default_data, _ = (patch.start() for patch in patches)
+        for patch in patches:
+            self.addCleanup(patch.stop)
+        self.suites = SuiteConfigs('dev')
+
+    def test_suite_is_loaded_once_on_access(self):
+        self.assertEqual(['tasks_svc', 'kyc_svc'], list(self.suites))
+        self.get_suite_resource_config.assert_not_called()
+        suite = self.suites['tasks_svc']
+        self.assertIs(suite, self.suites['tasks_svc'])
+        self.assertEqual({'args': {'companyid': 'c1'}}, suite['createTasks'])
+        self.get_suite_resource_config.assert_called_once_with('tasks_svc')
+        self.suite_default_data.assert_called_once_with('tasks_svc', 'dev')
+
+    def test_unknown_suite(self):
+        with self.assertRaises(KeyError):
+            self.suites['orders_svc']
+        self.assertIsNone(self.suites.get('orders_svc'))
+
+
+class ResourceFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.config_dir = directory.name
+        for file_name, suites in (('tasks.json', {'tasks_svc': SUITE}), ('kyc.json', {'kyc_svc': SUITE})):
+            self._write(file_name, suites)
+        patches = (mock.patch.object(utils, 'RESOURCE_CONFIGS_DIR', self.config_dir),
+                   mock.patch.object(utils, '_suite_files', {}),
+                   mock.patch.object(utils, 'load_data', wraps=utils.load_data))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _write(self, file_name: str, data) -> None:
+        with open(os.path.join(self.config_dir, file_name), 'w') as f:
+            json.dump(data, f)
+
+    def _loaded_files(self) -> list:
+        return [os.path.basename(call.args[0]) for call in utils.load_data.call_args_list]
+
+    def test_mapped_suite_loads_only_its_file(self):
+        self._write(utils.RESOURCE_CONFIG, {'suites': {'tasks_svc': 'tasks.json', 'kyc_svc': 'kyc.json'}})
+        self.assertEqual(SUITE, utils.get_suite_resource_config('kyc_svc'))
+        self.assertEqual([utils.RESOURCE_CONFIG, 'kyc.json'], self._loaded_files())
+        self.assertEqual(['tasks_svc', 'kyc_svc'], utils.get_suite_names())
+        self.assertNotIn('tasks.json', self._loaded_files())
+
+    def test_listed_files_are_scanned_until_suite_is_found(self):
+        self._write(utils.RESOURCE_CONFIG, {'suites': ['tasks.json', 'kyc.json']})
+        self.assertEqual(SUITE, utils.get_suite_resource_config('tasks_svc'))
+        self.assertEqual([utils.RESOURCE_CONFIG, 'tasks.json'], self._loaded_files())
+        self.assertIsNone(utils.get_suite_resource_config('orders_svc'))
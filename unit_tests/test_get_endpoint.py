@@ -0,0 +1,78 @@
+"""Unit tests of lib.get_endpoint endpoint plans"""
+import unittest
+from unittest import mock
+
+from lib import get_endpoint
+from lib.get_endpoint import build_endpoint, get_endpoint_plan
+from lib.tupleware import tupleware
+
+SUITE = {
+    'baseurl': 'https://tasks.{environment}.com',
+    'dev_baseurl': 'http://tasks-dev.com',
+    'client': {'timeout': {'connect': 5, 'read': 60}},
+    'endpoints': {
+        'getTasks': {
+            'method': 'GET',
+            'path': '/api/companies/{companyid}/tasks?ueid={ueid}',
+            'client': {'timeout': {'read': 10}},
+        },
+    },
+    # suite level default data
+    'getTasks': {'args': {'companyid': 'default_company', 'ueid': 'default_ueid'}, 'params': {'page': 1},
+                 'headers': {'Accept': 'application/json'}},
+}
+GET_TASKS = tupleware({'suite': 'tasks_svc', 'endpoint': 'getTasks'})
+
+
+def _suite_config(environment: str) -> dict:
+    return {'environment': environment, 'suites': {'tasks_svc': SUITE}}
+
+
+class EndpointPlanTest(unittest.TestCase):
+
+    def setUp(self):
+        self.load_suite_config = mock.Mock(side_effect=lambda **command_args: _suite_config('dev'))
+        patches = (mock.patch.object(get_endpoint, 'load_suite_config', self.load_suite_config),
+                   mock.patch.object(get_endpoint, 'get_auth', return_value={'Authorization': 'Basic dGVzdA=='}),
+                   mock.patch.object(get_endpoint, '_endpoint_plans', {}))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_plan_is_cached_per_suite_endpoint_and_environment(self):
+        plan = get_endpoint_plan(GET_TASKS)
+        self.assertIs(plan, get_endpoint_plan(GET_TASKS))
+        self.assertEqual([('tasks_svc', 'getTasks', 'dev')], list(get_endpoint._endpoint_plans))
+        self.load_suite_config.side_effect = lambda **command_args: _suite_config('qa')
+        qa_plan = get_endpoint_plan(GET_TASKS)
+        self.assertIsNot(plan, qa_plan)
+        self.assertEqual('https://tasks.qa.com/api/companies/{companyid}/tasks?ueid={ueid}', qa_plan.path.template)
+
+    def test_plan_resolves_suite_data(self):
+        plan = get_endpoint_plan(GET_TASKS)
+        self.assertEqual('GET', plan.method)
+        self.assertEqual('http://tasks-dev.com/api/companies/{companyid}/tasks?ueid={ueid}', plan.path.template)
+        self.assertEqual({'timeout': {'connect': 5, 'read': 10}}, plan.options)
+
+    def test_default_args(self):
+        endpoint = build_endpoint(GET_TASKS)
+        self.assertEqual('http://tasks-dev.com/api/companies/default_company/tasks', endpoint.uri)
+        self.assertEqual({'ueid': 'default_ueid', 'page': 1}, endpoint.params)
+        self.assertEqual('get', endpoint.method)
+        self.assertEqual({'Accept': 'application/json', 'Authorization': 'Basic dGVzdA=='}, endpoint.headers)
+
+    def test_test_data_and_input_args_override_defaults(self):
+        endpoint = build_endpoint(GET_TASKS, input_args={'companyid': 'c 1'}, args={'ueid': 'u1'},
+                                  params={'page': 2}, headers={'Accept': 'text/csv'}, json=[{'status': 'CREATED'}],
+                                  dev={'params': {'size': 10}})
+        self.assertEqual('http://tasks-dev.com/api/companies/c%201/tasks', endpoint.uri)
+        self.assertEqual({'ueid': 'u1', 'page': 2, 'size': 10}, endpoint.params)
+        self.assertEqual('text/csv', endpoint.headers['Accept'])
+        self.assertEqual([{'status': 'CREATED'}], endpoint.json)
+
+    def test_calls_do_not_change_plan(self):
+        build_endpoint(GET_TASKS, input_args={'companyid': 'c1'}, headers={'X-Test': '1'})
+        endpoint = build_endpoint(GET_TASKS, method='delete')
+        self.assertEqual('http://tasks-dev.com/api/companies/default_company/tasks', endpoint.uri)
+        self.assertNotIn('X-Test', endpoint.headers)
+        self.assertEqual('delete', endpoint.method)
@@ -0,0 +1,78 @@
+"""Unit tests of lib.json_diff"""
+import unittest
+
+from lib.json_diff import CHANGED, MISSING, UNEXPECTED, Difference, compile_paths, format_diff, json_diff
+
+EXPECTED = {
+    'count': 2,
+    'content': [
+        {'id': 1, 'status': 'CREATED', 'trackingData': {'updatedAt': 'x'}, 'tags': ['a', 'b']},
+        {'id': 2, 'status': 'CREATED', 'trackingData': {'updatedAt': 'y'}, 'tags': ['c']},
+    ],
+}
+
+
+def _actual(**changes) -> dict:
+    actual = {'count': 2, 'content': [dict(item) for item in EXPECTED['content']]}
+    for index, item in changes.items():
+        actual['content'][int(index[1:])].update(item)
+    return actual
+
+
+class JsonDiffTest(unittest.TestCase):
+
+    def test_equal(self):
+        self.assertEqual([], json_diff(EXPECTED, _actual()))
+
+    def test_changed_missing_unexpected(self):
+        actual = _actual(i1={'status': 'DONE'})
+        del actual['count']
+        actual['page'] = 1
+        self.assertEqual([Difference('count', MISSING, expected=2),
+                          Difference('content[1].status', CHANGED, 'CREATED', 'DONE'),
+                          Difference('page', UNEXPECTED, actual=1)], json_diff(EXPECTED, actual))
+
+    def test_numbers_and_booleans(self):
+        self.assertEqual([], json_diff({'count': 2}, {'count': 2.0}))
+        self.assertEqual([Difference('flag', CHANGED, 1, True)], json_diff({'flag': 1}, {'flag': True}))
+
+    def test_ignore(self):
+        actual = _actual(i0={'trackingData': {'updatedAt': 'z'}}, i1={'trackingData': None})
+        self.assertEqual(2, len(json_diff(EXPECTED, actual)))
+        self.assertEqual([], json_diff(EXPECTED, actual, ignore=['content[*].trackingData']))
+        differences = json_diff(EXPECTED, actual, ignore=['content[0].trackingData'])
+        self.assertEqual(['content[1].trackingData'], [difference.path for difference in differences])
+
+    def test_unordered(self):
+        actual = _actual()
+        actual['content'] = list(reversed(actual['content']))
+        self.assertTrue(json_diff(EXPECTED, actual))
+        self.assertEqual([], json_diff(EXPECTED, actual, unordered=['content']))
+        self.assertEqual([], json_diff(EXPECTED, actual, unordered=True))
+
+    def test_unordered_with_ignored_paths(self):
+        actual = _actual(i0={'trackingData': {}})
+        actual['content'] = list(reversed(actual['content']))
+        self.assertEqual([], json_diff(EXPECTED, actual, ignore=['content[*].trackingData'], unordered=['content']))
+
+    def test_unordered_reports_missing_and_unexpected(self):
+        differences = json_diff({'ids': [1, 2, 2]}, {'ids': [2, 3, 1]}, unordered=['ids'])
+        self.assertEqual([Difference('ids[2]', MISSING, expected=2), Difference('ids[1]', UNEXPECTED, actual=3)],
+                         differences)
+
+    def test_max_diffs(self):
+        differences = json_diff(list(range(10)), list(range(10, 20)), max_diffs=3)
+        self.assertEqual(3, len(differences))
+        self.assertIn('comparison stopped', format_diff(differences, max_diffs=3))
+
+    def test_top_level_patterns(self):
+        self.assertEqual([], json_diff({'a': {'updatedAt': 1}}, {'a': {'updatedAt': 2}}, ignore=['*.updatedAt']))
+        self.assertEqual([], json_diff([{'t': 1}], [{'t': 2}], ignore=['[*].t']))
+
+    def test_invalid_pattern(self):
+        with self.assertRaises(ValueError):
+            compile_paths(['content[x]'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""Unit tests of lib.json_index"""
+import codecs
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import json_index
+from lib.json_index import JsonIndex, index_spans
+
+DATA = {
+    'endpoint_inputs': {'args': {'companyid': 'COMP1'}, 'headers': {'Content-Type': 'application/json'}},
+    'expected_response': {'expected_content': [{'note': 'brackets } ] in "text"'}], 'expected_count': {'count': 1}},
+    'dev': {'endpoint_inputs': {'args': {'companyid': 'DEV1'}}},
+    'empty': {},
+    'scalar': -1.5e3,
+    'flag': True,
+}
+
+
+class JsonIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        self.temp_dir = temp_dir.name
+        patcher = mock.patch.object(json_index, 'INDEX_DIR', os.path.join(self.temp_dir, 'index'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(json_index.close_indexes)
+
+    def write(self, content: bytes, name: str = 'data.json') -> str:
+        file_path = os.path.join(self.temp_dir, name)
+        with open(file_path, 'wb') as f:
+            f.write(content)
+        return file_path
+
+    def test_sections(self):
+        with JsonIndex(self.write(json.dumps(DATA, indent=2).encode())) as index:
+            self.assertEqual(list(DATA), index.keys())
+            self.assertEqual(['endpoint_inputs'], index.keys('dev'))
+            for key, value in DATA.items():
+                self.assertEqual(value, index.get(key))
+            self.assertEqual({'count': 1}, index.get('expected_response', 'expected_count'))
+            self.assertEqual('DEV1', index.get('dev', 'endpoint_inputs', 'args', 'companyid'))
+            self.assertEqual('missing', index.get('dev', 'qa', default='missing'))
+            self.assertIsNone(index.get('scalar', 'below'))
+
+    def test_whole_file_without_keys(self):
+        with JsonIndex(self.write(json.dumps(DATA).encode())) as index:
+            self.assertEqual(DATA, index.get())
+
+    def test_byte_order_mark(self):
+        with JsonIndex(self.write(codecs.BOM_UTF8 + json.dumps(DATA).encode())) as index:
+            self.assertEqual(DATA['dev'], index.get('dev'))
+            self.assertEqual(DATA, index.get())
+
+    def test_not_an_object(self):
+        for content in (b'[1, 2]', b'', b'{"a" 1}', b'{"a": [1, 2}'):
+            with self.subTest(content=content), self.assertRaises(ValueError):
+                index_spans(content)
+
+    def test_index_is_saved_and_reused(self):
+        file_path = self.write(json.dumps(DATA).encode())
+        JsonIndex(file_path).close()
+        with mock.patch.object(json_index, 'index_spans', side_effect=AssertionError('file scanned again')):
+            with JsonIndex(file_path) as index:
+                self.assertEqual(DATA['dev'], index.get('dev'))
+
+    def test_changed_file_replaces_index(self):
+        file_path = self.write(json.dumps({'a': 1}).encode())
+        first = json_index.json_index(file_path)
+        self.assertIs(first, json_index.json_index(file_path))
+        self.write(json.dumps({'a': 1, 'b': 2}).encode())
+        second = json_index.json_index(file_path)
+        self.assertIsNot(first, second)
+        self.assertEqual(2, second.get('b'))
+        self.assertTrue(first._buffer.closed)
+
+    def test_close_indexes(self):
+        index = json_index.json_index(self.write(json.dumps(DATA).encode()))
+        json_index.close_indexes()
+        self.assertTrue(index._buffer.closed)
+
+
+if __name__ == '__main__':
+    unittest.main()
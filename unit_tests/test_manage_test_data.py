@@ -0,0 +1,63 @@
+"""Unit tests of lib.manage_test_data env merged test data cache"""
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import manage_test_data
+from lib.manage_test_data import env_test_data
+
+TEST_DATA = {
+    'headers': {'Content-Type': 'application/json'},
+    'json': [{'status': 'CREATED'}],
+    'dev': {'headers': {'X-Env': 'dev'}},
+}
+
+
+class EnvTestDataTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'tasks.json')
+        self._write(TEST_DATA)
+        patches = (mock.patch.object(manage_test_data, 'get_args_dict', return_value={'environment': 'dev'}),
+                   mock.patch.object(manage_test_data, '_env_test_data_cache', {}),
+                   mock.patch.object(manage_test_data, 'load_data', wraps=manage_test_data.load_data))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _write(self, test_data: dict) -> None:
+        with open(self.path, 'w') as f:
+            json.dump(test_data, f)
+
+    def test_env_data_is_merged(self):
+        self.assertEqual({'Content-Type': 'application/json', 'X-Env': 'dev'}, env_test_data(self.path)['headers'])
+
+    def test_cache_hit(self):
+        first = env_test_data(self.path)
+        second = env_test_data(self.path)
+        self.assertEqual(first, second)
+        self.assertEqual(1, manage_test_data.load_data.call_count)
+
+    def test_changed_file_is_reloaded(self):
+        env_test_data(self.path)
+        self._write({**TEST_DATA, 'json': [{'status': 'COMPLETED'}, {'status': 'CREATED'}]})
+        self.assertEqual([{'status': 'COMPLETED'}, {'status': 'CREATED'}], env_test_data(self.path)['json'])
+        self.assertEqual(2, manage_test_data.load_data.call_count)
+
+    def test_copies_are_independent(self):
+        first = env_test_data(self.path)
+        first['json'][0]['status'] = 'MODIFIED'
+        first['headers']['X-Env'] = 'qa'
+        second = env_test_data(self.path)
+        self.assertEqual([{'status': 'CREATED'}], second['json'])
+        self.assertEqual('dev', second['headers']['X-Env'])
+        self.assertEqual(1, manage_test_data.load_data.call_count)
+
+    def test_sections_are_cached_separately(self):
+        self.assertEqual({'headers': {'Content-Type': 'application/json', 'X-Env': 'dev'}},
+                         {key: value for key, value in env_test_data(self.path, ['headers']).items() if key != 'dev'})
+        self.assertIn('json', env_test_data(self.path))
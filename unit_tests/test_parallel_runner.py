@@ -0,0 +1,117 @@
+"""Unit tests of lib.parallel_runner process and thread pool runners"""
+import io
+import unittest
+
+from lib.parallel_runner import ParallelSuite, ReplayTestResult, ThreadedSuite, iter_tests
+from lib.transport import LIVE
+
+events = []
+
+
+class Classes:
+    """Test classes run by the tested suites, nested so unittest discovery does not run them"""
+
+    class First(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            events.append('set up first')
+
+        @classmethod
+        def tearDownClass(cls):
+            events.append('tear down first')
+
+        def test_a(self):
+            events.append('first.test_a')
+
+        def test_b(self):
+            events.append('first.test_b')
+
+    class Second(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            events.append('set up second')
+
+        @classmethod
+        def tearDownClass(cls):
+            events.append('tear down second')
+
+        def test_a(self):
+            events.append('second.test_a')
+
+    class BrokenFixture(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            raise RuntimeError('no fixture')
+
+        def test_a(self):
+            events.append('broken.test_a')
+
+    class Outcomes(unittest.TestCase):
+
+        def test_failure(self):
+            self.assertEqual(1, 2)
+
+        def test_error(self):
+            raise RuntimeError('worker error')
+
+        def test_output(self):
+            print('output of worker')
+
+        @unittest.skip('not ready')
+        def test_skip(self):
+            pass
+
+
+def _run(threads: int, *classes) -> unittest.TestResult:
+    del events[:]
+    suite = unittest.TestSuite(unittest.defaultTestLoader.loadTestsFromTestCase(cls) for cls in classes)
+    return unittest.TextTestRunner(stream=io.StringIO()).run(ThreadedSuite(suite, threads))
+
+
+class ParallelSuiteTest(unittest.TestCase):
+
+    def test_worker_results_are_replayed(self):
+        del events[:]
+        stream = io.StringIO()
+        suite = unittest.TestSuite(unittest.defaultTestLoader.loadTestsFromTestCase(cls)
+                                   for cls in (Classes.First, Classes.Outcomes))
+        result = unittest.TextTestRunner(stream=stream, verbosity=2, resultclass=ReplayTestResult).run(
+            ParallelSuite(suite, workers=2, transport_mode=LIVE))
+        self.assertEqual(6, result.testsRun)
+        self.assertEqual(1, len(result.failures))
+        self.assertTrue(result.failures[0][0].id().endswith('Outcomes.test_failure'))
+        self.assertIn('AssertionError: 1 != 2', result.failures[0][1])
+        self.assertEqual(1, len(result.errors))
+        self.assertTrue(result.errors[0][0].id().endswith('Outcomes.test_error'))
+        self.assertIn('RuntimeError: worker error', result.errors[0][1])
+        self.assertEqual(1, len(result.skipped))
+        self.assertIn('output of worker', stream.getvalue())
+        self.assertEqual({test.id() for test in iter_tests(suite)}, set(result.test_durations))
+        # tests ran in the workers
+        self.assertEqual([], events)
+
+
+class ThreadedSuiteTest(unittest.TestCase):
+
+    def test_class_set_up_when_first_test_starts(self):
+        result = _run(1, Classes.First, Classes.Second)
+        self.assertTrue(result.wasSuccessful())
+        self.assertEqual(['set up first', 'first.test_a', 'first.test_b', 'tear down first',
+                          'set up second', 'second.test_a', 'tear down second'], events)
+
+    def test_fixtures_of_running_classes(self):
+        result = _run(4, Classes.First, Classes.Second)
+        self.assertEqual(3, result.testsRun)
+        self.assertLess(events.index('set up first'), events.index('first.test_a'))
+        self.assertLess(events.index('second.test_a'), events.index('tear down second'))
+        self.assertEqual(1, events.count('set up first'))
+
+    def test_class_fixture_error(self):
+        result = _run(2, Classes.BrokenFixture, Classes.Second)
+        self.assertEqual(1, len(result.errors))
+        self.assertIn('setUpClass', str(result.errors[0][0]))
+        self.assertNotIn('broken.test_a', events)
+        self.assertIn('second.test_a', events)
@@ -0,0 +1,58 @@
+"""Unit tests of lib.path_template"""
+import unittest
+from unittest import mock
+
+from lib.path_template import MissingPathArgsError, PathTemplate, compile_template
+from lib.test_suite_config import _check_default_args
+
+TEMPLATE = 'https://host/api/v1/companies/{companyid}/files/{file}?ueid={ueid}&type=task'
+
+
+class PathTemplateTest(unittest.TestCase):
+
+    def test_variables(self):
+        self.assertEqual({'companyid', 'file', 'ueid'}, PathTemplate(TEMPLATE).variables)
+
+    def test_expand(self):
+        template = PathTemplate(TEMPLATE)
+        args = {'companyid': 42, 'file': 'a b', 'ueid': 'x&y'}
+        self.assertEqual('https://host/api/v1/companies/42/files/a%20b', template.expand(args))
+        self.assertEqual({'ueid': 'x&y', 'type': 'task'}, template.expand_params(args))
+
+    def test_slash_is_kept(self):
+        template = PathTemplate('https://host/files/{file}')
+        self.assertEqual('https://host/files/reports/2020/q1.json', template.expand({'file': 'reports/2020/q1.json'}))
+        self.assertEqual('https://host/files/a%3Fb%23c', template.expand({'file': 'a?b#c'}))
+
+    def test_missing_args(self):
+        with self.assertRaises(MissingPathArgsError) as context:
+            PathTemplate(TEMPLATE).expand({'companyid': 1})
+        self.assertEqual(['file', 'ueid'], context.exception.missing)
+        self.assertIsInstance(context.exception, KeyError)
+
+    def test_invalid_template(self):
+        for template in ('/companies/{companyid', '/companies/{0}', '/companies/{id!r}', '/tasks?{name}=1'):
+            with self.subTest(template=template), self.assertRaises(ValueError):
+                PathTemplate(template)
+
+    def test_compiled_once(self):
+        self.assertIs(compile_template(TEMPLATE), compile_template(TEMPLATE))
+
+
+class DefaultArgsCheckTest(unittest.TestCase):
+
+    def test_unused_default_args_are_logged(self):
+        suite_config = {'endpoints': {'getTasks': {'path': '/companies/{companyid}'},
+                                      'health': {'path': '/health'}},
+                        'getTasks': {'args': {'companyid': 1, 'ueid': 2}},
+                        'health': {'args': {}}}
+        logger = mock.Mock()
+        with mock.patch('lib.test_suite_config.get_logger', return_value=logger):
+            _check_default_args('company_tasks_svc', suite_config)
+        logger.warning.assert_called_once()
+        self.assertIn("['ueid']", logger.warning.call_args[0][0])
+        self.assertIn('company_tasks_svc.getTasks', logger.warning.call_args[0][0])
+
+
+if __name__ == '__main__':
+    unittest.main()
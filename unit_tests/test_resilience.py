@@ -0,0 +1,79 @@
+"""Unit tests of lib.resilience"""
+import unittest
+from unittest import mock
+
+from lib.common_namedtuples import EndPoint, HttpResponse
+from lib.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, RetryPolicy, circuit_breaker, \
+    reset_circuit_breakers
+from lib.web_service_client import call_with_retry
+
+ENDPOINT = EndPoint(uri='http://host/tasks', method='get', env='unit')
+OK = HttpResponse(env='unit', url=ENDPOINT.uri, status=200)
+UNAVAILABLE = HttpResponse(env='unit', url=ENDPOINT.uri, status=503)
+CONNECTION_ERROR = HttpResponse(env='unit', url=ENDPOINT.uri, status='555', error=ConnectionError('refused'))
+
+
+class RetryPolicyTest(unittest.TestCase):
+
+    def test_no_retry_by_default(self):
+        self.assertIsNone(RetryPolicy.from_options({}).next_delay(ENDPOINT, UNAVAILABLE, 0))
+
+    def test_retry_statuses_and_errors(self):
+        policy = RetryPolicy(total=2, backoff_factor=1)
+        self.assertIsNone(policy.next_delay(ENDPOINT, OK, 0))
+        self.assertLessEqual(policy.next_delay(ENDPOINT, UNAVAILABLE, 0), 1)
+        self.assertLessEqual(policy.next_delay(ENDPOINT, CONNECTION_ERROR, 1), 2)
+        self.assertIsNone(policy.next_delay(ENDPOINT, UNAVAILABLE, 2))
+
+    def test_non_idempotent_method(self):
+        policy = RetryPolicy(total=2)
+        self.assertIsNone(policy.next_delay(ENDPOINT._replace(method='post'), UNAVAILABLE, 0))
+
+    def test_retry_after(self):
+        policy = RetryPolicy(total=1, max_backoff=10)
+        self.assertEqual(3, policy.next_delay(ENDPOINT, UNAVAILABLE._replace(headers={'Retry-After': '3'}), 0))
+        self.assertEqual(10, policy.next_delay(ENDPOINT, UNAVAILABLE._replace(headers={'Retry-After': '60'}), 0))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def tearDown(self):
+        reset_circuit_breakers()
+
+    def test_disabled_without_option(self):
+        breaker = circuit_breaker(ENDPOINT)
+        for _ in range(10):
+            breaker.record(CONNECTION_ERROR)
+        self.assertTrue(breaker.allow())
+
+    def test_open_half_open_closed(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0)
+        breaker.record(UNAVAILABLE)
+        self.assertEqual(CLOSED, breaker.state)
+        breaker.record(CONNECTION_ERROR)
+        self.assertEqual(OPEN, breaker.state)
+        self.assertTrue(breaker.allow())
+        self.assertEqual(HALF_OPEN, breaker.state)
+        # one trial request at a time
+        self.assertFalse(breaker.allow())
+        breaker.record(OK)
+        self.assertEqual(CLOSED, breaker.state)
+
+    def test_open_circuit_fails_fast(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        breaker.record(UNAVAILABLE)
+        self.assertFalse(breaker.allow())
+
+    def test_raising_trial_request_opens_circuit(self):
+        endpoint = ENDPOINT._replace(options={'circuit_breaker': {'failure_threshold': 1, 'reset_timeout': 0}})
+        circuit_breaker(endpoint).record(UNAVAILABLE)
+        with mock.patch('lib.web_service_client.call_method', side_effect=RuntimeError('broken')):
+            with self.assertRaises(RuntimeError):
+                call_with_retry(endpoint)
+        self.assertEqual(OPEN, circuit_breaker(endpoint).state)
+        with mock.patch('lib.web_service_client.call_method', return_value=OK):
+            self.assertEqual(CLOSED, call_with_retry(endpoint).circuit)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,144 @@
+"""Unit tests of lib.sharding"""
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lib.duration_history import ERROR, FAILURE, HistoryTestResult, SUCCESS
+from lib.sharding import (DURATION_WEIGHTED, HASHED, assign_shards, format_merged, merge_results, shard_suite,
+                          write_results)
+
+CLASS_IDS = [f'test.module_{i}.TestClass' for i in range(20)]
+
+
+class Classes:
+    """Test classes of the sharded suites, nested so unittest discovery does not run them"""
+
+    class Failing(unittest.TestCase):
+
+        def tearDown(self):
+            raise RuntimeError('tear down failed')
+
+        def test_failure(self):
+            self.fail('failed')
+
+        def test_subtests(self):
+            for i in range(2):
+                with self.subTest(i=i):
+                    self.fail(f'subtest {i} failed')
+
+    class BrokenFixture(unittest.TestCase):
+
+        @classmethod
+        def setUpClass(cls):
+            raise RuntimeError('no fixture')
+
+        def test_a(self):
+            pass
+
+    class Passing(unittest.TestCase):
+
+        def test_a(self):
+            pass
+
+        def test_b(self):
+            pass
+
+
+class AssignShardsTest(unittest.TestCase):
+
+    def test_hash_partition_is_stable(self):
+        assignment = assign_shards(CLASS_IDS, 3)
+        self.assertEqual(assignment, assign_shards(list(reversed(CLASS_IDS)), 3))
+        self.assertEqual(set(CLASS_IDS), set(assignment))
+        self.assertTrue(set(assignment.values()) <= {1, 2, 3})
+
+    def test_longest_first(self):
+        durations = {'a': 10, 'b': 6, 'c': 5, 'd': 4, 'e': 1}
+        assignment = assign_shards(list(durations), 2, durations)
+        loads = {index: sum(durations[_id] for _id, _index in assignment.items() if _index == index)
+                 for index in (1, 2)}
+        self.assertEqual({1: 14, 2: 12}, loads)
+        self.assertEqual(assignment, assign_shards(list(reversed(list(durations))), 2, durations))
+
+    def test_more_shards_than_classes(self):
+        self.assertEqual({'a': 1, 'b': 2}, assign_shards(['a', 'b'], 4, {'a': 2, 'b': 1}))
+
+
+class ShardResultsTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def _suite(self) -> unittest.TestSuite:
+        return unittest.TestSuite(unittest.defaultTestLoader.loadTestsFromTestCase(cls)
+                                  for cls in (Classes.Failing, Classes.Passing))
+
+    def _run_shards(self, count: int, durations: dict = None) -> list:
+        paths = []
+        for index in range(1, count + 1):
+            shard, info = shard_suite(self._suite(), index, count, durations)
+            result = unittest.TextTestRunner(stream=io.StringIO(), resultclass=HistoryTestResult).run(shard)
+            path = os.path.join(self.directory, f'shard-{index}-of-{count}.json')
+            paths.append(write_results(result, info, 'dev', path))
+        return paths
+
+    def test_shard_strategy(self):
+        self.assertEqual(HASHED, shard_suite(self._suite(), 1, 2)[1]['strategy'])
+        shard, info = shard_suite(self._suite(), 1, 2, {'any': 1.0})
+        self.assertEqual(DURATION_WEIGHTED, info['strategy'])
+        self.assertEqual(4, info['total_tests'])
+
+    def test_all_details_of_a_test_are_written(self):
+        path = self._run_shards(1)[0]
+        with open(path) as f:
+            tests = {test['id'].rsplit('.', 1)[1]: test for test in json.load(f)['tests']}
+        self.assertEqual(['test_a', 'test_b', 'test_failure', 'test_subtests'], sorted(tests))
+        self.assertEqual(FAILURE, tests['test_failure']['status'])
+        self.assertIn('failed', tests['test_failure']['details'])
+        self.assertIn('tear down failed', tests['test_failure']['details'])
+        self.assertIn('subtest 0 failed', tests['test_subtests']['details'])
+        self.assertIn('subtest 1 failed', tests['test_subtests']['details'])
+        self.assertEqual(SUCCESS, tests['test_a']['status'])
+        self.assertIsNone(tests['test_a']['details'])
+
+    def test_merge(self):
+        merged = merge_results(self._run_shards(2))
+        self.assertEqual([], merged['problems'])
+        self.assertEqual({FAILURE: 2, SUCCESS: 2}, merged['summary'])
+        self.assertEqual(['dev'], merged['environment'])
+        self.assertIn('FAILED (failures=2)', format_merged(merged))
+
+    def test_merge_problems(self):
+        paths = self._run_shards(3)
+        merged = merge_results(paths[:1] + paths[:2])
+        self.assertEqual(["Missing shards [3] of 3", "Shards [1] are merged more than once"],
+                         [problem for problem in merged['problems'] if 'ran in more than one shard' not in problem])
+
+    def test_merged_results_file_is_skipped(self):
+        paths = self._run_shards(2)
+        merged_path = os.path.join(self.directory, 'merged.json')
+        with open(merged_path, 'w') as f:
+            json.dump(merge_results(paths), f)
+        with mock.patch('builtins.print') as _print:
+            merged = merge_results([merged_path, *paths])
+        self.assertEqual([], merged['problems'])
+        self.assertEqual([1, 2], [shard['index'] for shard in merged['shards']])
+        self.assertIn('is not a shard results file', _print.call_args[0][0])
+
+    def test_merge_different_partitions(self):
+        merged = merge_results([self._run_shards(2)[0], self._run_shards(3)[1]])
+        self.assertTrue(merged['problems'][0].startswith('Shards are from different partitions'))
+
+    def test_fixture_errors(self):
+        shard, info = shard_suite(unittest.defaultTestLoader.loadTestsFromTestCase(Classes.BrokenFixture), 1, 1)
+        result = unittest.TextTestRunner(stream=io.StringIO(), resultclass=HistoryTestResult).run(shard)
+        with open(write_results(result, info, 'dev', os.path.join(self.directory, 'shard.json'))) as f:
+            tests = json.load(f)['tests']
+        self.assertEqual([ERROR], [test['status'] for test in tests])
+        self.assertIn('setUpClass', tests[0]['id'])
+        self.assertIn('no fixture', tests[0]['details'])
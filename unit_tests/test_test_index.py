@@ -0,0 +1,137 @@
+"""Unit tests of lib.test_index"""
+import os
+import tempfile
+import textwrap
+import unittest
+from unittest import mock
+
+from lib import test_index
+from lib.test_index import module_name, scan_module
+
+SOURCE = textwrap.dedent('''
+    import unittest
+    from unittest import TestCase
+
+    from lib.manage_test_data import test_data
+    from lib.web_service_tests import run_serially
+
+
+    class Helper:
+        def test_not_collected(self):
+            pass
+
+
+    class Base(unittest.TestCase):
+        def test_base(self):
+            pass
+
+        def test_overridden(self):
+            pass
+
+
+    @run_serially()
+    class TestTasks(Base, unittest.TestCase):
+        @test_data(file_name="company_tasks_svc/add_company_tasks.json")
+        def test_overridden(self, **kwargs):
+            pass
+
+        async def test_async(self):
+            pass
+
+        test_alias = test_async
+        test_base = None
+
+        def helper(self):
+            pass
+
+
+    class TestPlain(TestCase):
+        def test_b(self):
+            pass
+
+        def test_a(self):
+            pass
+''')
+# class with a base of another module, test names are read from the imported class
+INHERITED_SOURCE = textwrap.dedent('''
+    class TestInherited(unittest.TestCase, other_module.Mixin):
+        def test_own(self):
+            pass
+''')
+
+
+class ScanModuleTest(unittest.TestCase):
+
+    def setUp(self):
+        self.classes = {info.name: info for info in scan_module(SOURCE + INHERITED_SOURCE, 'test.svc.test_tasks')}
+
+    def test_test_case_classes(self):
+        # only classes deriving directly from TestCase, as discovered by the launcher
+        self.assertEqual(['Base', 'TestTasks', 'TestPlain', 'TestInherited'], list(self.classes))
+        self.assertEqual('test.svc.test_tasks.TestTasks', self.classes['TestTasks'].id)
+        self.assertEqual(('run_serially()',), self.classes['TestTasks'].decorators)
+
+    def test_methods_in_load_order(self):
+        self.assertEqual(['test_a', 'test_b'], [method.name for method in self.classes['TestPlain'].methods])
+        self.assertEqual(['test.svc.test_tasks.TestPlain.test_a', 'test.svc.test_tasks.TestPlain.test_b'],
+                         self.classes['TestPlain'].test_ids())
+
+    def test_methods_of_bases_in_module(self):
+        methods = {method.name: method for method in self.classes['TestTasks'].methods}
+        # test_base is set to None in the class, helper is not a test
+        self.assertEqual(['test_alias', 'test_async', 'test_overridden'], sorted(methods))
+        self.assertEqual(('company_tasks_svc/add_company_tasks.json',), methods['test_overridden'].test_data_files)
+        self.assertEqual(('test_data(file_name=\'company_tasks_svc/add_company_tasks.json\')',),
+                         methods['test_overridden'].decorators)
+        self.assertTrue(self.classes['TestTasks'].complete)
+
+    def test_bases_of_other_modules(self):
+        self.assertFalse(self.classes['TestInherited'].complete)
+        self.assertEqual(('unittest.TestCase', 'other_module.Mixin'), self.classes['TestInherited'].bases)
+
+    def test_syntax_error(self):
+        with self.assertRaises(SyntaxError):
+            scan_module('class TestBroken(unittest.TestCase:\n', 'test.broken')
+
+    def test_module_name(self):
+        file_path = os.path.join('/base', 'test', 'svc', 'test_tasks.py')
+        self.assertEqual('test.svc.test_tasks', module_name(file_path, '/base'))
+
+
+class TestIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.test_dir = os.path.join(directory.name, 'test')
+        os.makedirs(os.path.join(self.test_dir, 'svc'))
+        self._write('svc/test_tasks.py', SOURCE)
+        patches = (mock.patch.object(test_index, 'INDEX_FILE', os.path.join(directory.name, 'index.pickle')),
+                   mock.patch.object(test_index, 'CACHE_DIR', directory.name),
+                   mock.patch.object(test_index, '_index', None))
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _write(self, path: str, source: str) -> None:
+        with open(os.path.join(self.test_dir, path), 'w') as f:
+            f.write(source)
+
+    def test_search_and_test_data_lookup(self):
+        self.assertEqual(['test.svc.test_tasks.TestPlain.test_a', 'test.svc.test_tasks.TestPlain.test_b'],
+                         test_index.search_tests('testplain', self.test_dir))
+        self.assertEqual(['test.svc.test_tasks.TestTasks.test_overridden'],
+                         test_index.tests_using_test_data('company_tasks_svc/add_company_tasks.json', self.test_dir))
+
+    def test_changed_and_removed_files(self):
+        self.assertEqual(3, len(test_index.test_index(self.test_dir)))
+        self._write('svc/test_more.py', 'import unittest\n\n\nclass TestMore(unittest.TestCase):\n    pass\n')
+        self.assertEqual(4, len(test_index.test_index(self.test_dir)))
+        os.remove(os.path.join(self.test_dir, 'svc', 'test_tasks.py'))
+        self.assertEqual(['TestMore'], [info.name for info in test_index.test_index(self.test_dir)])
+
+    def test_unparsable_file_is_skipped(self):
+        self._write('svc/test_broken.py', 'class TestBroken(unittest.TestCase:\n')
+        with mock.patch('builtins.print') as _print:
+            self.assertEqual(3, len(test_index.test_index(self.test_dir)))
+        self.assertIn('is not indexed', _print.call_args[0][0])
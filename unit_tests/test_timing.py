@@ -0,0 +1,78 @@
+"""Unit tests of lib.timing request timing breakdown"""
+import json
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+from lib.common_namedtuples import Timing
+from lib.timing import collect_timing, current_timing, make_timing, record_response
+from lib.web_service_client import send_request
+from unit_tests import test_web_service_client as server
+
+
+class MakeTimingTest(unittest.TestCase):
+
+    def test_new_connection(self):
+        timing = make_timing({'dns': 0.01, 'connect': 0.02, 'tls': 0.03, 'elapsed': 0.5, 'total': 0.7,
+                              'request_bytes': 12, 'response_bytes': 340})
+        self.assertEqual(Timing(dns=0.01, connect=0.02, tls=0.03, ttfb=0.44, download=0.2, total=0.7,
+                                request_bytes=12, response_bytes=340, reused=False),
+                         timing._replace(ttfb=round(timing.ttfb, 6), download=round(timing.download, 6)))
+
+    def test_reused_connection(self):
+        timing = make_timing({'elapsed': 0.2, 'total': 0.25})
+        self.assertEqual((0.0, 0.0, 0.0, True), (timing.dns, timing.connect, timing.tls, timing.reused))
+        self.assertAlmostEqual(0.2, timing.ttfb)
+        self.assertAlmostEqual(0.05, timing.download)
+
+    def test_phases_are_not_negative(self):
+        # server time of requests is measured separately from the connection phases and may be shorter
+        timing = make_timing({'dns': 0.3, 'connect': 0.3, 'elapsed': 0.5, 'total': 0.4})
+        self.assertEqual((0.0, 0.0), (timing.ttfb, timing.download))
+
+    def test_str(self):
+        self.assertEqual('dns=1.0ms connect=2.0ms tls=0.0ms ttfb=3.0ms download=4.0ms total=10.0ms sent=5B '
+                         'received=6B new connection',
+                         str(Timing(dns=0.001, connect=0.002, ttfb=0.003, download=0.004, total=0.01,
+                                    request_bytes=5, response_bytes=6, reused=False)))
+
+
+class CollectTimingTest(unittest.TestCase):
+
+    def test_nested_blocks(self):
+        self.assertIsNone(current_timing())
+        with collect_timing() as outer:
+            with collect_timing() as inner:
+                self.assertIs(inner, current_timing())
+            self.assertIs(outer, current_timing())
+        self.assertIsNone(current_timing())
+        self.assertIn('total', outer)
+
+    def test_record_response(self):
+        response = mock.Mock(elapsed=timedelta(milliseconds=250))
+        response.request.body = '{"a": "é"}'
+        response.raw.tell.return_value = 42
+        with collect_timing() as timing:
+            record_response(response)
+        self.assertEqual((0.25, 11, 42), (timing['elapsed'], timing['request_bytes'], timing['response_bytes']))
+        # outside a block nothing is recorded
+        record_response(response)
+
+
+class _KeepAliveHandler(server._Handler):
+    protocol_version = 'HTTP/1.1'
+
+
+class ResponseTimingTest(server.LocalServerTestCase):
+    handler = _KeepAliveHandler
+
+    def test_timing_of_calls(self):
+        first = send_request(self.endpoint('/tasks/1'))
+        second = send_request(self.endpoint('/tasks/2'))
+        self.assertFalse(first.timing.reused)
+        self.assertTrue(second.timing.reused)
+        self.assertEqual(0.0, second.timing.connect)
+        self.assertEqual(len(json.dumps({'path': '/tasks/2'})), second.timing.response_bytes)
+        for timing in (first.timing, second.timing):
+            self.assertGreater(timing.total, 0)
+            self.assertGreaterEqual(timing.total, timing.ttfb)
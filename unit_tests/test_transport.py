@@ -0,0 +1,63 @@
+"""Unit tests of lib.transport"""
+import tempfile
+import unittest
+
+from lib.common_namedtuples import EndPoint, HttpResponse
+from lib.transport import DEFAULT_CASSETTE, RecordTransport, ReplayTransport, cassette_name, use_cassette
+
+HELPER_SOURCE = '''
+def send(transport, endpoint, send_function):
+    return transport.send(endpoint, send_function)
+
+
+def current_cassette():
+    return cassette_name()
+'''
+
+TEST_MODULE = 'test.company_tasks_svc.test_add_company_tasks'
+TEST_SOURCE = '''
+def test_call(*args):
+    return helpers[args[0]](*args[1:])
+'''
+
+
+def _module(name: str, source: str, **names) -> dict:
+    """Namespace of source run as module name, Ex. a test module or a helper module under test/"""
+    namespace = {'__name__': name, **names}
+    exec(compile(source, f'<{name}>', 'exec'), namespace)
+    return namespace
+
+
+class CassetteNameTest(unittest.TestCase):
+
+    def setUp(self):
+        helper = _module('test.company_tasks_svc.endpoint_call_helpers', HELPER_SOURCE, cassette_name=cassette_name)
+        self.test_module = _module(TEST_MODULE, TEST_SOURCE,
+                                   helpers={'send': helper['send'], 'current_cassette': helper['current_cassette']})
+
+    def test_no_test_module(self):
+        self.assertEqual(DEFAULT_CASSETTE, cassette_name())
+
+    def test_helper_module_call(self):
+        self.assertEqual(TEST_MODULE, self.test_module['test_call']('current_cassette'))
+
+    def test_bound_cassette(self):
+        with use_cassette('test.bound'):
+            self.assertEqual('test.bound', self.test_module['test_call']('current_cassette'))
+        self.assertEqual(DEFAULT_CASSETTE, cassette_name())
+
+    def test_record_and_replay_through_helper_module(self):
+        endpoint = EndPoint(uri='http://host/tasks', method='get', env='unit')
+        response = HttpResponse.from_body(b'{"id": 1}', env='unit', url=endpoint.uri, status=200, headers={})
+        with tempfile.TemporaryDirectory() as cassette_dir:
+            recorder = RecordTransport(cassette_dir)
+            self.test_module['test_call']('send', recorder, endpoint, lambda _endpoint: response)
+            self.assertEqual([TEST_MODULE], list(recorder._cassettes))
+            recorder.close()
+            player = ReplayTransport(cassette_dir)
+            replayed = self.test_module['test_call']('send', player, endpoint, None)
+        self.assertEqual({'id': 1}, replayed.data)
+
+
+if __name__ == '__main__':
+    unittest.main()
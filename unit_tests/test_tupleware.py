@@ -0,0 +1,34 @@
+"""Unit tests of lib.tupleware"""
+import unittest
+
+from lib.tupleware import tupleware
+
+
+class TuplewareTest(unittest.TestCase):
+
+    def test_attribute_access(self):
+        config = tupleware({'suite': 'tasks_svc', 'client': {'timeout': {'read': 60}}, 'hosts': [{'name': 'a'}]})
+        self.assertEqual('tasks_svc', config.suite)
+        self.assertEqual(60, config.client.timeout.read)
+        self.assertEqual('a', config.hosts[0].name)
+        self.assertEqual(('client', 'hosts', 'suite'), config._fields)
+
+    def test_classes_are_reused_per_field_set(self):
+        first = tupleware({'endpoint': 'health', 'suite': 'tasks_svc'})
+        # same fields in another order
+        second = tupleware({'suite': 'kyc_svc', 'endpoint': 'getKyc'})
+        self.assertIs(type(first), type(second))
+        self.assertIsNot(type(first), type(tupleware({'endpoint': 'health'})))
+        self.assertEqual('TWare', type(first).__name__)
+
+    def test_invalid_attribute_names_fall_back_to_dict(self):
+        config = tupleware({'content-type': 'json', 'class': 'x', 'nested': {'ok': 1}})
+        self.assertIsInstance(config, dict)
+        self.assertEqual({'content-type': 'json', 'class': 'x', 'nested': (1,)}, config)
+        self.assertEqual(1, config['nested'].ok)
+        self.assertEqual({'1': 'a'}, tupleware({1: 'a'}))
+
+    def test_values(self):
+        self.assertEqual([1, [2]], tupleware((1, (2,))))
+        self.assertEqual('text', tupleware('text'))
+        self.assertEqual((), tupleware({}))
@@ -0,0 +1,52 @@
+"""Unit tests of lib.utils authentication providers"""
+import threading
+import time
+import unittest
+from unittest import mock
+
+from lib.utils import AuthProvider, TokenAuthProvider
+
+
+class AuthProviderTest(unittest.TestCase):
+
+    def test_headers_is_abstract(self):
+        with self.assertRaises(TypeError):
+            AuthProvider()
+
+    def test_token_refresh(self):
+        tokens = iter(range(100))
+        provider = TokenAuthProvider(lambda: ({'Authorization': f'Bearer {next(tokens)}'}, 0.2), refresh_margin=0.1,
+                                     retry_interval=0.05)
+        self.addCleanup(provider.close)
+        self.assertEqual({'Authorization': 'Bearer 0'}, provider.headers())
+        time.sleep(0.3)
+        self.assertNotEqual({'Authorization': 'Bearer 0'}, provider.headers())
+
+    def test_refresh_failure_is_logged(self):
+        calls = []
+        failed = threading.Event()
+
+        def _fetch_token():
+            calls.append(1)
+            if len(calls) > 1:
+                failed.set()
+                raise ConnectionError('token service is down')
+            return {'Authorization': 'Bearer 0'}, 0.2
+
+        logger = mock.Mock()
+        with mock.patch('lib.logger.get_logger', return_value=logger):
+            provider = TokenAuthProvider(_fetch_token, refresh_margin=0.1, retry_interval=10)
+            self.addCleanup(provider.close)
+            provider.headers()
+            self.assertTrue(failed.wait(5))
+            for _ in range(50):
+                if logger.warning.called:
+                    break
+                time.sleep(0.01)
+        self.assertIn('token service is down', logger.warning.call_args[0][0])
+        # current token stays in use
+        self.assertEqual({'Authorization': 'Bearer 0'}, provider._headers)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,301 @@
+"""Unit tests of lib.web_service_client against a local http.server"""
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from lib.common_namedtuples import EndPoint
+from lib.deadline import set_deadline
+from lib.http_cache import HIT, MISS, cache_stats, http_cache
+from lib.session_pool import close_sessions
+from lib.web_service_client import DEFAULT_TIMEOUT, SERVER_ERROR_STATUS, close_async_executor, request_timeout, \
+    send_request, send_request_async, send_requests, _get_async_executor
+
+
+class RequestTimeoutTest(unittest.TestCase):
+
+    def tearDown(self):
+        set_deadline()
+
+    @staticmethod
+    def endpoint(timeout=None) -> EndPoint:
+        return EndPoint(uri='http://host/tasks', method='get', env='unit',
+                        options={} if timeout is None else {'timeout': timeout})
+
+    def test_default(self):
+        self.assertEqual((DEFAULT_TIMEOUT['connect'], DEFAULT_TIMEOUT['read']), request_timeout(self.endpoint()))
+
+    def test_one_value_for_both(self):
+        self.assertEqual((7, 7), request_timeout(self.endpoint(7)))
+
+    def test_partial_option_keeps_default(self):
+        self.assertEqual((DEFAULT_TIMEOUT['connect'], 15), request_timeout(self.endpoint({'read': 15})))
+        self.assertEqual((3, DEFAULT_TIMEOUT['read']), request_timeout(self.endpoint({'connect': 3})))
+
+    def test_no_read_timeout(self):
+        self.assertEqual((DEFAULT_TIMEOUT['connect'], None), request_timeout(self.endpoint({'read': None})))
+
+    def test_clipped_to_deadline(self):
+        set_deadline(2)
+        connect, read = request_timeout(self.endpoint({'read': None}))
+        self.assertLessEqual(connect, 2)
+        self.assertLessEqual(read, 2)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # requests of the server running at the same time, and the max seen
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        try:
+            if self.path.startswith('/slow'):
+                time.sleep(0.2)
+            if self.path.startswith('/broken'):
+                self._send_broken()
+            elif self.path.startswith('/cached'):
+                self._send_cached()
+            else:
+                self._send_json()
+        finally:
+            with cls.lock:
+                cls.active -= 1
+
+    def _send_json(self):
+        body = json.dumps({'path': self.path}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_cached(self):
+        """Body in the requested language, validated with an ETag per language, /cached/<value> sets Cache-Control"""
+        language = self.headers.get('Accept-Language', 'en')
+        etag = f'"{language}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        body = json.dumps({'language': language}).encode()
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Vary', 'Accept-Language')
+        if self.path.startswith('/cached/'):
+            self.send_header('Cache-Control', self.path[len('/cached/'):])
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_broken(self):
+        """Promise more bytes than sent and drop the connection"""
+        self.send_response(200)
+        self.send_header('Content-Length', '100000')
+        self.end_headers()
+        self.wfile.write(b'{"partial": ')
+        self.wfile.flush()
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(handler: type) -> ThreadingHTTPServer:
+    """Serve handler on a background thread, on a free port of 127.0.0.1"""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def stop_server(server: ThreadingHTTPServer) -> None:
+    server.shutdown()
+    server.server_close()
+
+
+class LocalServerTestCase(unittest.TestCase):
+    """Serves _Handler on a background thread for the tests of the class"""
+    handler = _Handler
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = start_server(cls.handler)
+        cls.base_url = f'http://127.0.0.1:{cls.server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        stop_server(cls.server)
+        close_sessions()
+
+    def endpoint(self, path: str, base_url: str = None, **options) -> EndPoint:
+        return EndPoint(uri=f'{base_url or self.base_url}{path}', method='get', env='unit', options=options)
+
+
+class SendRequestAsyncTest(LocalServerTestCase):
+
+    def tearDown(self):
+        close_async_executor()
+
+    def test_gather(self):
+        async def _send_all():
+            return await asyncio.gather(*(send_request_async(self.endpoint(f'/tasks/{i}')) for i in range(20)))
+
+        responses = asyncio.run(_send_all())
+        self.assertEqual([200] * 20, [response.status for response in responses])
+        self.assertEqual([{'path': f'/tasks/{i}'} for i in range(20)], [response.data for response in responses])
+
+    def test_executor_is_shared_across_threads(self):
+        executors = []
+
+        def _get():
+            executors.append(_get_async_executor())
+
+        threads = [threading.Thread(target=_get) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(1, len(set(map(id, executors))))
+
+    def test_close_async_executor(self):
+        response = asyncio.run(send_request_async(self.endpoint('/before')))
+        self.assertEqual(200, response.status)
+        close_async_executor()
+        # a new executor is started for calls after close
+        response = asyncio.run(send_request_async(self.endpoint('/after')))
+        self.assertEqual({'path': '/after'}, response.data)
+
+
+class StreamedResponseTest(LocalServerTestCase):
+
+    def test_streamed(self):
+        response = send_request(self.endpoint('/tasks', stream=True))
+        self.assertEqual(200, response.status)
+        self.assertEqual({'path': '/tasks'}, response.data)
+        self.assertEqual(len(response.content), response.body.size)
+
+    def test_streamed_response_is_compared_without_reading_file(self):
+        response = send_request(self.endpoint('/tasks', stream=True))
+        os.remove(response.body.path)
+        self.assertEqual(response, response._replace())
+        self.assertEqual(response.body, response._asdict()['body'])
+        self.assertIn(response.body.digest, repr(response))
+
+    def test_broken_stream(self):
+        path = os.path.join(self.temp_dir(), 'broken.body')
+        response = send_request(self.endpoint('/broken', stream={'path': path}))
+        self.assertEqual(SERVER_ERROR_STATUS, response.status)
+        self.assertTrue(response.error)
+        self.assertFalse(os.path.exists(path))
+
+    def temp_dir(self) -> str:
+        temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(temp_dir.cleanup)
+        return temp_dir.name
+
+
+class HttpCacheTest(LocalServerTestCase):
+
+    def setUp(self):
+        http_cache.clear()
+
+    def tearDown(self):
+        http_cache.clear()
+
+    def cached_endpoint(self, language: str, **options) -> EndPoint:
+        return self.endpoint('/cached', **{'cache': True, **options})._replace(headers={'Accept-Language': language})
+
+    def test_conditional_request(self):
+        first = send_request(self.cached_endpoint('fr'))
+        second = send_request(self.cached_endpoint('fr'))
+        self.assertEqual((MISS, HIT), (first.cache, second.cache))
+        self.assertEqual({'language': 'fr'}, second.data)
+
+    def test_no_store_and_private_are_not_stored(self):
+        for directive in ('no-store', 'private, max-age=60'):
+            with self.subTest(directive=directive):
+                endpoint = self.endpoint(f'/cached/{directive}', cache=True)
+                send_request(endpoint)
+                self.assertEqual(MISS, send_request(endpoint).cache)
+        # other directives do not prevent storing
+        endpoint = self.endpoint('/cached/max-age=60', cache=True)
+        send_request(endpoint)
+        self.assertEqual(HIT, send_request(endpoint).cache)
+
+    def test_stats(self):
+        before = cache_stats()
+        send_request(self.cached_endpoint('fr'))
+        send_request(self.cached_endpoint('fr'))
+        self.assertEqual({'hits': 1, 'misses': 1, 'stores': 1},
+                         {name: count - before[name] for name, count in cache_stats().items()})
+
+    def test_vary_headers_are_part_of_key(self):
+        send_request(self.cached_endpoint('fr'))
+        german = send_request(self.cached_endpoint('de'))
+        self.assertEqual(MISS, german.cache)
+        self.assertEqual({'language': 'de'}, german.data)
+        self.assertEqual({'language': 'fr'}, send_request(self.cached_endpoint('fr')).data)
+
+    def test_large_body_is_not_stored(self):
+        send_request(self.cached_endpoint('fr', cache={'max_body': 4}))
+        self.assertEqual(MISS, send_request(self.cached_endpoint('fr', cache={'max_body': 4})).cache)
+
+    def test_streamed_endpoint_is_not_cached(self):
+        send_request(self.cached_endpoint('fr', stream=True))
+        response = send_request(self.cached_endpoint('fr', stream=True))
+        self.assertEqual('', response.cache)
+        self.assertEqual({'language': 'fr'}, response.data)
+
+
+class _OtherHandler(_Handler):
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+
+class SendRequestsTest(LocalServerTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # a second host, scheme+host of sessions and per_host slots include the port
+        cls.other_server = start_server(_OtherHandler)
+        cls.other_url = f'http://127.0.0.1:{cls.other_server.server_port}'
+
+    @classmethod
+    def tearDownClass(cls):
+        stop_server(cls.other_server)
+        super().tearDownClass()
+
+    def setUp(self):
+        _Handler.max_active = _OtherHandler.max_active = 0
+
+    def test_ordered(self):
+        endpoints = (self.endpoint(f'/tasks/{i}', self.other_url if i % 2 else None) for i in range(30))
+        responses = list(send_requests(endpoints, max_in_flight=4, per_host=2))
+        self.assertEqual([{'path': f'/tasks/{i}'} for i in range(30)], [response.data for response in responses])
+        self.assertLessEqual(_Handler.max_active, 2)
+        self.assertLessEqual(_OtherHandler.max_active, 2)
+
+    def test_busy_host_does_not_hold_other_hosts(self):
+        # slow host is capped at one request, its queued requests must not occupy the other worker threads
+        endpoints = [self.endpoint(f'/slow/{i}') for i in range(4)] + \
+                    [self.endpoint(f'/fast/{i}', self.other_url) for i in range(4)]
+        paths = [response.data['path'] for response in send_requests(endpoints, max_in_flight=4, per_host=1,
+                                                                     ordered=False)]
+        self.assertEqual(1, _Handler.max_active)
+        self.assertCountEqual([f'/fast/{i}' for i in range(4)], paths[:4])
+        self.assertEqual([f'/slow/{i}' for i in range(4)], paths[4:])
+
+
+if __name__ == '__main__':
+    unittest.main()
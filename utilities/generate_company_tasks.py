@@ -0,0 +1,50 @@
+import json
+
+from lib.data_factory import DataFactory
+from lib.get_endpoint import call_endpoints, endpoints
+from lib.manage_test_data import get_test_data
+from lib.utils import format_response, trace
+
+FACTORY_TEST_DATA = 'company_tasks_svc/generate_company_tasks.json'
+
+
+@trace(text="Generate company tasks")
+def generate_tasks(command_args: dict):
+    """
+    Generate company tasks from data factory spec in test data and create them for a client in batches of at most the
+    createCompanyTasks batch_limit, or write them to a json lines file when output file is provided
+    :return: None
+    """
+    # Check required arguments
+    assert command_args.get('companyid'), "Required argument 'companyid' is missing"
+    assert command_args.get('ueid'), "Required argument 'ueid' is missing"
+
+    create_endpoint = endpoints.company_tasks_svc.createCompanyTasks
+    # batches never exceed the endpoint limit, a larger --batch-size or spec batch_size is capped
+    batch_limit = getattr(create_endpoint, 'batch_limit', None)
+    test_data = get_test_data(command_args.get('test_data') or FACTORY_TEST_DATA)
+    factory = DataFactory.from_spec(test_data['factory'],
+                                    args={'companyid': command_args.get('companyid'),
+                                          'ueid': command_args.get('ueid')},
+                                    seed=command_args.get('seed'),
+                                    count=command_args.get('count'),
+                                    batch_size=command_args.get('batch_size') or batch_limit)
+    if batch_limit:
+        factory.batch_size = min(factory.batch_size, batch_limit)
+    if command_args.get('output'):
+        with open(command_args.get('output'), 'w') as f:
+            for task in factory.records():
+                f.write(f'{json.dumps(task)}\n')
+        print(f"Company tasks written to {command_args.get('output')}")
+        return
+
+    endpoint_inputs = {'headers': test_data.get('headers', {}),
+                       'args': {'companyid': command_args.get('companyid'), 'ueid': command_args.get('ueid')},
+                       'command_args': command_args}
+    calls = ((create_endpoint, {**endpoint_inputs, 'json': batch})
+             for batch in factory.batches())
+    created = 0
+    for response in call_endpoints(calls, max_in_flight=command_args.get('max_in_flight')):
+        assert response.status == 200, f"Create operation failed! Error: {format_response(response)}"
+        created += len(response.data.get('content', []))
+    print(f"{created} Company tasks created successfully!")
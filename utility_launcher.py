@@ -1,7 +1,7 @@
 from argparse import ArgumentParser, SUPPRESS
 
 from lib.utils import format_env
-from utilities import delete_all_company_tasks, nacha_svc
+from utilities import delete_all_company_tasks, generate_company_tasks, nacha_svc
 from utilities.kafka import kafka_producer
 
 DELETE_ALL_COMPANY_TASKS = 'delete_all_company_tasks'
@@ -9,12 +9,14 @@ NACHA_TOKENIZE = 'nacha_tokenize'
 NACHA_DETOKENIZE = 'nacha_detokenize'
 CODSG_DOCUSIGN_TEMPLATE_LOADER = 'codgs_docusign_template_loader'
 KAFKA_PRODUCER = 'kafka_producer'
+GENERATE_COMPANY_TASKS = 'generate_company_tasks'
 
 mapper = {
     DELETE_ALL_COMPANY_TASKS: delete_all_company_tasks.delete_tasks,
     NACHA_TOKENIZE: nacha_svc.tokenize,
     NACHA_DETOKENIZE: nacha_svc.detokenize,
     KAFKA_PRODUCER: kafka_producer.producer,
+    GENERATE_COMPANY_TASKS: generate_company_tasks.generate_tasks,
 }
 """Must declare the utility.function name here. Note: No () after function name"""
 
@@ -65,6 +67,21 @@ def commandline_args() -> dict:
     kafka_producer_parser.add_argument('-mk', '--message-key', required=True,
                                        help='Message key. If not provided, will be a random UUID')
     kafka_producer_parser.add_argument('-mv', '--message-value', required=True, help='message value')
+    # Generate company tasks - bulk create tasks generated from data factory spec in test data
+    generate_tasks_parser = subparsers.add_parser(GENERATE_COMPANY_TASKS, parents=[common])
+    generate_tasks_parser.add_argument('-u', '--utility', help=SUPPRESS, default=GENERATE_COMPANY_TASKS)
+    generate_tasks_parser.add_argument('-c', '--companyid', required=True, help='companyid')
+    generate_tasks_parser.add_argument('-ue', '--ueid', required=True, help='ueid of task assignees')
+    generate_tasks_parser.add_argument('-n', '--count', type=int, help='Number of tasks (default from spec)')
+    generate_tasks_parser.add_argument('-bs', '--batch-size', type=int,
+                                       help='Tasks per request (default and maximum from endpoint batch_limit)')
+    generate_tasks_parser.add_argument('-sd', '--seed', type=int, help='Random seed (default from spec)')
+    generate_tasks_parser.add_argument('-td', '--test-data',
+                                       help='Test data file with "factory" spec '
+                                            '(default=company_tasks_svc/generate_company_tasks.json)')
+    generate_tasks_parser.add_argument('-mf', '--max-in-flight', type=int, default=8,
+                                       help='Max create requests running at the same time (default=8)')
+    generate_tasks_parser.add_argument('-o', '--output', help='Write tasks to json lines file instead of creating them')
 
     return format_env(parser.parse_args().__dict__)
 